@@ -0,0 +1,188 @@
+# anchor_tracker.py - Re-ubica los anclas del HUD (sereno, heart, mana) si el contenido del proyector se corre
+#
+# Las coordenadas de los anclas salen de los locators (coords_sereno.json, coords_boss.json) o de
+# locate_bars al arrancar. Si el proyector de OBS se mueve/cambia de tamaño, el contenido queda
+# corrido dentro del client y los ROIs leen pixels equivocados hasta reiniciar.
+# AnchorTracker, cada verify_every ticks, busca cada ancla solo en una ventana de ±margin pixels
+# alrededor de donde estaba (el ROI "anchor:<nombre>" se captura junto con los demás ROIs).
+# Si no aparece ahí, pide un frame completo y hace la búsqueda completa (template_search.locate).
+# Las posiciones se reemplazan de una sola asignación (dict nuevo) y `version` sube: el loop
+# reconstruye sus ROIs y cambia el RoiRegistry de una vez.
+#
+#   python ../common/anchor_tracker.py   → hunt sintética con el contenido corrido a mitad: costo por tick y
+#                                          recuperación (desde supermonkatk/ o supermonkhealing/: usa su img/)
+import time
+
+import cv2
+
+from template_search import locate
+
+VERIFY_EVERY = 20       # ticks entre verificaciones
+ANCHOR_MARGIN = 12      # pixels alrededor de la última posición en la verificación barata
+
+
+class AnchorTracker:
+    """
+    anchors = AnchorTracker(); anchors.add("sereno", TEMPLATES.get(...), x, y); anchors.register(rois)
+    En el loop: if anchors.update(views, grab_frame): (reconstruir ROIs desde anchors.position(...)).
+    grab_frame() → Frame/array BGR(X) del client completo; solo se llama si un ancla se perdió.
+    """
+
+    def __init__(self, verify_every=VERIFY_EVERY, margin=ANCHOR_MARGIN, threshold=0.88):
+        self.verify_every = verify_every
+        self.margin = margin
+        self.threshold = threshold
+        self._templates = {}
+        self._pos = {}              # name → (x, y) top-left en coords del client; se reemplaza entero
+        self.version = 0
+        self._ticks = 0
+        self.verified = 0
+        self.moved = 0
+        self.full_searches = 0
+        self.lost = set()
+
+    def add(self, name, template, x, y):
+        self._templates[name] = template
+        self._pos = {**self._pos, name: (int(x), int(y))}
+
+    def names(self):
+        return list(self._templates)
+
+    def position(self, name):
+        return self._pos[name]
+
+    def positions(self):
+        """Snapshot de todas las posiciones (el dict no se modifica, se reemplaza)."""
+        return self._pos
+
+    def window(self, name):
+        x, y = self._pos[name]
+        t = self._templates[name]
+        m = self.margin
+        return x - m, y - m, t.w + 2 * m, t.h + 2 * m
+
+    def register(self, registry):
+        """Agrega (o mueve) el ROI de verificación de cada ancla en registry."""
+        for name in self._templates:
+            registry.register(f"anchor:{name}", *self.window(name))
+
+    def _search_window(self, name, view):
+        """(score, (x, y)) del ancla dentro de su ventana (coords del client)."""
+        t = self._templates[name]
+        roi = view.bgr()
+        if roi.shape[0] < t.h or roi.shape[1] < t.w:
+            return 0.0, None
+        res = cv2.matchTemplate(roi, t.bgr, cv2.TM_CCOEFF_NORMED)
+        _, val, _, (lx, ly) = cv2.minMaxLoc(res)
+        return float(val), (view.x0 + lx, view.y0 + ly)
+
+    def verify(self, views):
+        """Verificación barata de todas las anclas. Devuelve {name: (x, y)} movidas y el set de perdidas."""
+        moved, lost = {}, set()
+        for name in self._templates:
+            view = views.get(f"anchor:{name}")
+            if view is None:
+                lost.add(name)
+                continue
+            score, loc = self._search_window(name, view)
+            self.verified += 1
+            if score < self.threshold:
+                lost.add(name)
+            elif loc != self._pos[name]:
+                moved[name] = loc
+        return moved, lost
+
+    def relocate(self, frame, names):
+        """Búsqueda completa en el frame del client para names. Devuelve {name: (x, y)} encontradas."""
+        img = frame.bgr() if hasattr(frame, "bgr") else frame[..., :3]
+        found = {}
+        for name in names:
+            self.full_searches += 1
+            score, loc = locate(img, self._templates[name].bgr, self.threshold)
+            if score >= self.threshold:
+                found[name] = (int(loc[0]), int(loc[1]))
+        return found
+
+    def update(self, views, grab_frame=None, force=False):
+        """
+        Llamar una vez por tick. Cada verify_every ticks (o con force) verifica las anclas; si alguna no
+        está en su ventana y hay grab_frame, la busca en el frame completo. True si cambió alguna posición.
+        """
+        self._ticks += 1
+        if not force and self._ticks % self.verify_every:
+            return False
+        moved, lost = self.verify(views)
+        if lost and grab_frame is not None:
+            frame = grab_frame()
+            if frame is not None:
+                found = self.relocate(frame, lost)
+                for name, loc in found.items():
+                    if loc != self._pos[name]:
+                        moved[name] = loc
+                lost -= set(found)
+        self.lost = lost
+        if not moved:
+            return False
+        self._pos = {**self._pos, **moved}
+        self.moved += len(moved)
+        self.version += 1
+        return True
+
+
+# ========================
+# BENCHMARK
+# ========================
+def bench_anchor_tracker(frames=300, shift_at=150, shift=(37, -21)):
+    """
+    Hunt sintética con sereno.png pegado; en shift_at todo el contenido se corre `shift` pixels.
+    Compara el costo por tick de AnchorTracker contra buscar el ancla en el frame completo cada tick.
+    """
+    import numpy as np
+    from capture import Frame, RoiRegistry
+    from recorder import synthetic_hunt
+    from templates import TEMPLATES
+
+    tmpl = TEMPLATES.get("sereno.png")         # img/ del paquete desde el que se corre
+    ax, ay = 952, 11 + 40
+    dx, dy = shift
+    data = []
+    for i, (_, f) in enumerate(synthetic_hunt(frames=frames)):
+        f = f.copy()
+        f[ay:ay + tmpl.h, ax:ax + tmpl.w, :3] = tmpl.bgr
+        if i >= shift_at:
+            f = np.roll(f, (dy, dx), axis=(0, 1))
+        data.append(f)
+
+    anchors = AnchorTracker()
+    anchors.add("sereno", tmpl, ax, ay)
+    rois = RoiRegistry()
+    anchors.register(rois)
+
+    t_track = []
+    recovered_at = None
+    for i, f in enumerate(data):
+        frame = Frame(f)
+        t0 = time.perf_counter()
+        if anchors.update(rois.views(frame), lambda: frame):
+            anchors.register(rois)
+            if recovered_at is None and anchors.position("sereno") == (ax + dx, ay + dy):
+                recovered_at = i
+        t_track.append(time.perf_counter() - t0)
+
+    t_full = []
+    for f in data[::10]:
+        t0 = time.perf_counter()
+        locate(f[..., :3], tmpl.bgr, anchors.threshold)
+        t_full.append(time.perf_counter() - t0)
+
+    ms = np.array(t_track) * 1000
+    print(f"AnchorTracker: {frames} frames {data[0].shape[1]}x{data[0].shape[0]}, contenido corrido {shift} en el frame {shift_at}")
+    print(f"  búsqueda completa cada tick: {np.mean(t_full) * 1000:.2f} ms/tick")
+    print(f"  AnchorTracker (cada {anchors.verify_every} ticks, ±{anchors.margin} px): media {ms.mean():.3f} ms/tick, "
+          f"máx {ms.max():.2f} ms | verificaciones {anchors.verified}, búsquedas completas {anchors.full_searches}")
+    print(f"  posición final {anchors.position('sereno')} (esperada {(ax + dx, ay + dy)}) | "
+          f"recuperado en el frame {recovered_at} ({recovered_at - shift_at if recovered_at is not None else '—'} ticks después)")
+
+
+if __name__ == "__main__":
+    bench_anchor_tracker()
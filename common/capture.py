@@ -0,0 +1,629 @@
+# capture.py - Sesión de captura persistente (DC + bitmap reutilizados, buffer preasignado)
+import ctypes
+import time
+
+import numpy as np
+
+try:
+    import win32gui
+except ImportError:  # Linux / benchmarks: solo MemoryFrameSource
+    win32gui = None
+
+SRCCOPY = 0x00CC0020
+DIB_RGB_COLORS = 0
+BI_RGB = 0
+PW_RENDERFULLCONTENT = 2
+
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ("biSize", ctypes.c_uint32),
+        ("biWidth", ctypes.c_int32),
+        ("biHeight", ctypes.c_int32),
+        ("biPlanes", ctypes.c_uint16),
+        ("biBitCount", ctypes.c_uint16),
+        ("biCompression", ctypes.c_uint32),
+        ("biSizeImage", ctypes.c_uint32),
+        ("biXPelsPerMeter", ctypes.c_int32),
+        ("biYPelsPerMeter", ctypes.c_int32),
+        ("biClrUsed", ctypes.c_uint32),
+        ("biClrImportant", ctypes.c_uint32),
+    ]
+
+
+# ========================
+# FUENTES DE FRAMES
+# ========================
+class Win32WindowSource:
+    """
+    Captura una ventana con GDI. El DC de la ventana, el DC compatible y la DIB section
+    se crean en open() y se reutilizan hasta que cambie el tamaño.
+    print_flags=None → BitBlt; int → PrintWindow con esos flags (BitBlt si falla y fallback_bitblt).
+    El bitmap cubre la ventana completa; client_offset() ubica el client dentro de él.
+    Con tracker (WindowTracker) la geometría sale de su caché en vez de consultar al SO cada frame.
+    """
+
+    def __init__(self, hwnd, print_flags=None, fallback_bitblt=True, tracker=None):
+        if win32gui is None:
+            raise RuntimeError("Win32WindowSource requiere pywin32")
+        self.hwnd = hwnd
+        self.tracker = tracker
+        self.print_flags = print_flags
+        self.fallback_bitblt = fallback_bitblt
+        self._size = None
+        self._hwnd_dc = None
+        self._mem_dc = None
+        self._dib = None
+        self._old_obj = None
+        self._pixels = None
+
+    def size(self):
+        if win32gui.IsIconic(self.hwnd):
+            return None
+        if self.tracker is not None:
+            geo = self.tracker.geometry()
+            if geo is None:
+                return None
+            l, t, r, b = geo.left, geo.top, geo.right, geo.bottom
+        else:
+            l, t, r, b = win32gui.GetWindowRect(self.hwnd)
+        w, h = r - l, b - t
+        if w <= 0 or h <= 0:
+            return None
+        return w, h
+
+    def open(self, size):
+        self.close()
+        w, h = size
+        user32 = ctypes.windll.user32
+        gdi32 = ctypes.windll.gdi32
+        gdi32.CreateDIBSection.restype = ctypes.c_void_p
+        gdi32.SelectObject.restype = ctypes.c_void_p
+        gdi32.CreateCompatibleDC.restype = ctypes.c_void_p
+        user32.GetWindowDC.restype = ctypes.c_void_p
+
+        self._hwnd_dc = user32.GetWindowDC(self.hwnd)
+        self._mem_dc = gdi32.CreateCompatibleDC(ctypes.c_void_p(self._hwnd_dc))
+
+        bmi = BITMAPINFOHEADER()
+        bmi.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        bmi.biWidth = w
+        bmi.biHeight = -h  # top-down, igual que GetBitmapBits
+        bmi.biPlanes = 1
+        bmi.biBitCount = 32
+        bmi.biCompression = BI_RGB
+        bits = ctypes.c_void_p()
+        self._dib = gdi32.CreateDIBSection(
+            ctypes.c_void_p(self._mem_dc), ctypes.byref(bmi), DIB_RGB_COLORS,
+            ctypes.byref(bits), None, 0,
+        )
+        self._old_obj = gdi32.SelectObject(ctypes.c_void_p(self._mem_dc), ctypes.c_void_p(self._dib))
+
+        # Vista numpy (BGRX) sobre la memoria de la DIB section, sin copia
+        raw = (ctypes.c_uint8 * (w * h * 4)).from_address(bits.value)
+        self._pixels = np.frombuffer(raw, dtype=np.uint8).reshape(h, w, 4)
+        self._size = (w, h)
+
+    def read_into(self, buf) -> bool:
+        w, h = self._size
+        ok = False
+        if self.print_flags is not None:
+            try:
+                ok = ctypes.windll.user32.PrintWindow(self.hwnd, ctypes.c_void_p(self._mem_dc), self.print_flags) == 1
+            except Exception:
+                ok = False
+        if not ok and (self.print_flags is None or self.fallback_bitblt):
+            ok = bool(ctypes.windll.gdi32.BitBlt(
+                ctypes.c_void_p(self._mem_dc), 0, 0, w, h,
+                ctypes.c_void_p(self._hwnd_dc), 0, 0, SRCCOPY,
+            ))
+        if not ok:
+            return False
+        np.copyto(buf, self._pixels)
+        return True
+
+    def _geometry(self):
+        """Geometría del tracker para este frame; si no tiene, la consulta. None si la ventana ya no está."""
+        return self.tracker.geometry(refresh=False) or self.tracker.geometry(refresh=True)
+
+    def client_offset(self):
+        """Offset del client dentro del bitmap de la ventana, o None si se perdió la ventana."""
+        if self.tracker is not None:
+            geo = self._geometry()
+            if geo is None:
+                return None
+            return geo.client_x - geo.left, geo.client_y - geo.top
+        wL, wT, _, _ = win32gui.GetWindowRect(self.hwnd)
+        cx, cy = win32gui.ClientToScreen(self.hwnd, (0, 0))
+        return cx - wL, cy - wT
+
+    def client_rect(self):
+        """(offx, offy, w, h) del client dentro del bitmap, o None si se perdió la ventana."""
+        if self.tracker is not None:
+            geo = self._geometry()
+            if geo is None:
+                return None
+            return geo.client_x - geo.left, geo.client_y - geo.top, geo.client_w, geo.client_h
+        offx, offy = self.client_offset()
+        _, _, cw, ch = win32gui.GetClientRect(self.hwnd)
+        return offx, offy, cw, ch
+
+    def read_rects_into(self, bufs, rects) -> bool:
+        """Copia solo los rects (coords del client) a sus buffers. PrintWindow renderiza entero, pero solo se copian los ROI."""
+        offset = self.client_offset()
+        if offset is None:
+            return False
+        offx, offy = offset
+        if self.print_flags is not None:
+            ok = False
+            try:
+                ok = ctypes.windll.user32.PrintWindow(self.hwnd, ctypes.c_void_p(self._mem_dc), self.print_flags) == 1
+            except Exception:
+                ok = False
+            if not ok and not self.fallback_bitblt:
+                return False
+            if ok:
+                for buf, (x, y, w, h) in zip(bufs, rects):
+                    _copy_rect(buf, self._pixels, offx + x, offy + y)
+                return True
+        gdi32 = ctypes.windll.gdi32
+        for buf, (x, y, w, h) in zip(bufs, rects):
+            sx, sy = offx + x, offy + y
+            # BitBlt fallido (ventana minimizada / DC inválido): el bitmap quedó con el frame anterior
+            if not gdi32.BitBlt(
+                ctypes.c_void_p(self._mem_dc), sx, sy, w, h,
+                ctypes.c_void_p(self._hwnd_dc), sx, sy, SRCCOPY,
+            ):
+                return False
+            _copy_rect(buf, self._pixels, sx, sy)
+        return True
+
+    def close(self):
+        if self._mem_dc is None:
+            return
+        gdi32 = ctypes.windll.gdi32
+        self._pixels = None
+        gdi32.SelectObject(ctypes.c_void_p(self._mem_dc), ctypes.c_void_p(self._old_obj))
+        gdi32.DeleteObject(ctypes.c_void_p(self._dib))
+        gdi32.DeleteDC(ctypes.c_void_p(self._mem_dc))
+        ctypes.windll.user32.ReleaseDC(self.hwnd, ctypes.c_void_p(self._hwnd_dc))
+        self._hwnd_dc = self._mem_dc = self._dib = self._old_obj = None
+        self._size = None
+
+
+class MemoryFrameSource:
+    """
+    Fuente en memoria (sin win32) para benchmarks en Linux.
+    frames: lista de arrays BGRX (h, w, 4) uint8; se recorren en bucle.
+    """
+
+    def __init__(self, frames):
+        if not frames:
+            raise ValueError("MemoryFrameSource necesita al menos un frame")
+        self.frames = frames
+        self.index = 0
+
+    def size(self):
+        h, w = self.frames[self.index].shape[:2]
+        return w, h
+
+    def open(self, size):
+        pass
+
+    def client_rect(self):
+        w, h = self.size()
+        return 0, 0, w, h
+
+    def read_into(self, buf) -> bool:
+        np.copyto(buf, self.frames[self.index])
+        self.index = (self.index + 1) % len(self.frames)
+        return True
+
+    def read_rects_into(self, bufs, rects) -> bool:
+        frame = self.frames[self.index]
+        for buf, (x, y, w, h) in zip(bufs, rects):
+            _copy_rect(buf, frame, x, y)
+        self.index = (self.index + 1) % len(self.frames)
+        return True
+
+    def close(self):
+        pass
+
+
+def _copy_rect(dst, src, x, y):
+    """Copia src[y:y+h, x:x+w] en dst (h, w, 4); lo que cae fuera de src queda en negro."""
+    h, w = dst.shape[:2]
+    sh, sw = src.shape[:2]
+    x1, y1 = max(0, x), max(0, y)
+    x2, y2 = min(sw, x + w), min(sh, y + h)
+    if x2 <= x1 or y2 <= y1:
+        dst[...] = 0
+        return
+    if x1 != x or y1 != y or x2 != x + w or y2 != y + h:
+        dst[...] = 0
+    dst[y1 - y:y2 - y, x1 - x:x2 - x] = src[y1:y2, x1:x2]
+
+
+# ========================
+# REGISTRO DE ROIs
+# ========================
+class RoiRegistry:
+    """
+    Cada detector declara los rectángulos (coords del client) que lee.
+    La captura junta los ROIs cercanos en regiones y solo copia esas regiones.
+    """
+
+    def __init__(self, merge_gap=16):
+        self.merge_gap = merge_gap
+        self._rois = {}
+        self._layout = None
+        self.version = 0
+
+    def register(self, name, x, y, w, h):
+        self._rois[name] = (int(x), int(y), max(1, int(w)), max(1, int(h)))
+        self._layout = None
+        self.version += 1
+
+    def unregister(self, name):
+        if self._rois.pop(name, None) is not None:
+            self._layout = None
+            self.version += 1
+
+    def rect(self, name):
+        return self._rois[name]
+
+    def names(self):
+        return list(self._rois)
+
+    def views(self, frame):
+        """{name: Frame} recortando cada ROI de un frame completo del client (vistas, sin copia)."""
+        return {name: frame.crop(*rect) for name, rect in self._rois.items()}
+
+    def layout(self):
+        """
+        Devuelve (regions, placement): regions = [(x, y, w, h)], placement = {name: (idx, dx, dy, w, h)}.
+        Se recalcula solo cuando cambia el registro.
+        """
+        if self._layout is not None:
+            return self._layout
+        boxes = []  # [x1, y1, x2, y2, [names]]
+        for name, (x, y, w, h) in self._rois.items():
+            boxes.append([x, y, x + w, y + h, [name]])
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(boxes)):
+                for j in range(i + 1, len(boxes)):
+                    a, b = boxes[i], boxes[j]
+                    g = self.merge_gap
+                    if a[0] - g <= b[2] and b[0] - g <= a[2] and a[1] - g <= b[3] and b[1] - g <= a[3]:
+                        boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]), a[4] + b[4]]
+                        del boxes[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        regions = []
+        placement = {}
+        for idx, (x1, y1, x2, y2, names) in enumerate(boxes):
+            regions.append((x1, y1, x2 - x1, y2 - y1))
+            for name in names:
+                x, y, w, h = self._rois[name]
+                placement[name] = (idx, x - x1, y - y1, w, h)
+        self._layout = (regions, placement)
+        return self._layout
+
+
+# ========================
+# FRAME (vista BGRX sin copias)
+# ========================
+class Frame:
+    """
+    Vista sobre un buffer BGRX (h, w, 4) sin copiarlo. (x0, y0) son las coords del client
+    del pixel data[0, 0], así los detectores siempre usan coords del client, sea un frame
+    completo o solo un ROI. Los accesores devuelven vistas en el orden de canales pedido.
+    """
+
+    __slots__ = ("data", "x0", "y0")
+
+    def __init__(self, data, x0=0, y0=0):
+        self.data = data
+        self.x0 = x0
+        self.y0 = y0
+
+    @classmethod
+    def from_bitmap_bits(cls, bits, width, height):
+        """Envuelve el bytes de GetBitmapBits(True) sin copiarlo."""
+        return cls(np.frombuffer(bits, dtype=np.uint8).reshape(height, width, 4))
+
+    @property
+    def width(self):
+        return self.data.shape[1]
+
+    @property
+    def height(self):
+        return self.data.shape[0]
+
+    def crop(self, x, y, w, h):
+        """Sub-frame (vista) en coords del client; se recorta a lo que exista."""
+        x1, y1 = max(x, self.x0), max(y, self.y0)
+        x2 = min(x + w, self.x0 + self.width)
+        y2 = min(y + h, self.y0 + self.height)
+        x2, y2 = max(x1, x2), max(y1, y2)
+        return Frame(self.data[y1 - self.y0:y2 - self.y0, x1 - self.x0:x2 - self.x0], x1, y1)
+
+    def client(self, offx, offy, w, h):
+        """Recorte del client desde un frame de ventana completa (vista, origen del client = 0,0)."""
+        return Frame(self.crop(self.x0 + offx, self.y0 + offy, w, h).data, 0, 0)
+
+    def bgr(self):
+        return self.data[..., :3]
+
+    def rgb(self):
+        return self.data[..., 2::-1]
+
+    def pixel_rgb(self, x, y):
+        """(r, g, b) en coords del client; None si cae fuera."""
+        dx, dy = x - self.x0, y - self.y0
+        if 0 <= dx < self.width and 0 <= dy < self.height:
+            px = self.data[dy, dx]
+            return int(px[2]), int(px[1]), int(px[0])
+        return None
+
+
+# ========================
+# SESIÓN
+# ========================
+class CaptureSession:
+    """
+    Sesión abierta una vez por hwnd. Mantiene vivos los objetos GDI de la fuente y escribe
+    cada frame en el mismo buffer BGRX preasignado. Solo reabre/reasigna si cambia el tamaño.
+    El array devuelto por grab() se sobrescribe en el siguiente grab().
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._size = None
+        self._buffer = None
+        self.frames = 0
+        self.allocations = 0
+        self.reopens = 0
+        self.bytes_copied = 0
+        self._roi_key = None
+        self._roi_buffers = None
+        self._roi_views = None
+
+    def grab(self):
+        size = self.source.size()
+        if size is None:
+            return None
+        if size != self._size:
+            self.source.open(size)
+            self._size = size
+            self._buffer = None
+            self.reopens += 1
+        if self._buffer is None:
+            # primer frame completo, o grab_rois() ya abrió la fuente con este tamaño sin buffer
+            w, h = size
+            self._buffer = np.empty((h, w, 4), dtype=np.uint8)
+            self.allocations += 1
+        if not self.source.read_into(self._buffer):
+            return None
+        self.frames += 1
+        self.bytes_copied += self._buffer.nbytes
+        return self._buffer
+
+    def grab_frame(self):
+        """Frame del client (vista sobre el buffer de la sesión, sin copias extra)."""
+        buf = self.grab()
+        if buf is None:
+            return None
+        rect = self.source.client_rect()
+        if rect is None:
+            return None                         # la ventana se cerró entre el grab y la geometría
+        return Frame(buf).client(*rect)
+
+    def grab_rois(self, registry):
+        """
+        Captura solo las regiones del registro. Devuelve {name: Frame} con origen en el ROI.
+        Los buffers por región se preasignan y se reutilizan mientras no cambie el registro ni el tamaño.
+        """
+        size = self.source.size()
+        if size is None:
+            return None
+        if size != self._size:
+            self.source.open(size)
+            self._size = size
+            self._buffer = None
+            self._roi_key = None
+            self.reopens += 1
+        regions, placement = registry.layout()
+        key = (id(registry), registry.version)
+        if key != self._roi_key:
+            self._roi_buffers = [np.zeros((h, w, 4), dtype=np.uint8) for (_, _, w, h) in regions]
+            self._roi_views = {
+                name: Frame(self._roi_buffers[idx][dy:dy + h, dx:dx + w], *registry.rect(name)[:2])
+                for name, (idx, dx, dy, w, h) in placement.items()
+            }
+            self._roi_key = key
+            self.allocations += len(regions)
+        if not self.source.read_rects_into(self._roi_buffers, regions):
+            return None
+        self.frames += 1
+        self.bytes_copied += sum(b.nbytes for b in self._roi_buffers)
+        return self._roi_views
+
+    def close(self):
+        self.source.close()
+        self._size = None
+        self._buffer = None
+        self._roi_key = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def synthetic_bgrx_frames(n=4, w=1936, h=1048, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=(h, w, 4), dtype=np.uint8) for _ in range(n)]
+
+
+# ========================
+# BENCHMARK (Linux, sin win32)
+# ========================
+def bench_capture_session(ticks=200):
+    import tracemalloc
+
+    frames = synthetic_bgrx_frames()
+
+    # Antes: un buffer nuevo por tick (como GetBitmapBits + frombuffer + np.array)
+    src = MemoryFrameSource(frames)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        w, h = src.size()
+        buf = np.empty((h, w, 4), dtype=np.uint8)
+        src.read_into(buf)
+    t_old = (time.perf_counter() - t0) / ticks
+    _, peak_old = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Después: sesión persistente
+    session = CaptureSession(MemoryFrameSource(frames))
+    first = session.grab()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        buf = session.grab()
+    t_new = (time.perf_counter() - t0) / ticks
+    _, peak_new = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"Frame sintético: {frames[0].shape[1]}x{frames[0].shape[0]} BGRX, {ticks} ticks")
+    print(f"  por tick (buffer nuevo): {t_old * 1000:.3f} ms | pico mem {peak_old / 1e6:.1f} MB")
+    print(f"  CaptureSession:          {t_new * 1000:.3f} ms | pico mem {peak_new / 1e6:.1f} MB")
+    print(f"  asignaciones de buffer en sesión: {session.allocations} "
+          f"(reutiliza buffer: {buf is first})")
+
+
+def bench_roi_capture(ticks=200):
+    frames = synthetic_bgrx_frames()
+
+    healer = RoiRegistry()
+    healer.register("hp_bar", 1772, 120, 91, 1)
+    healer.register("mana_bar", 1772, 133, 91, 1)
+    healer.register("ring_slot", 1767, 224, 1, 1)
+
+    caster = RoiRegistry()
+    caster.register("harmony", 872, 0, 980, 320)
+    caster.register("boss", 1469, 716, 23, 19)
+
+    full = CaptureSession(MemoryFrameSource(frames))
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        full.grab()
+    t_full = (time.perf_counter() - t0) / ticks
+    b_full = full.bytes_copied / ticks
+
+    print(f"Frame sintético {frames[0].shape[1]}x{frames[0].shape[0]}, {ticks} ticks")
+    print(f"  full-frame: {t_full * 1000:.3f} ms/tick | {b_full / 1e3:.1f} KB/tick")
+    for label, reg in (("healer", healer), ("caster", caster)):
+        session = CaptureSession(MemoryFrameSource(frames))
+        t0 = time.perf_counter()
+        for _ in range(ticks):
+            session.grab_rois(reg)
+        t_roi = (time.perf_counter() - t0) / ticks
+        b_roi = session.bytes_copied / ticks
+        regions, _ = reg.layout()
+        print(f"  ROI {label:<7}: {t_roi * 1000:.3f} ms/tick | {b_roi / 1e3:.1f} KB/tick "
+              f"({len(regions)} regiones, {b_full / b_roi:.0f}x menos bytes)")
+
+
+def bench_frame_conversion(ticks=100):
+    """Ruta vieja del healer (PIL → np → cvtColor → crop → cvtColor) vs Frame sobre los bits crudos."""
+    import cv2
+    from PIL import Image
+
+    w, h = 1936, 1048
+    offx, offy, cw, ch = 8, 31, 1920, 1009
+    bits = synthetic_bgrx_frames(n=1, w=w, h=h)[0].tobytes()
+    probes = [(1772 + i * 10, 120) for i in range(9)]
+
+    def old_tick():
+        copies = 0
+        img = Image.frombuffer("RGB", (w, h), bits, "raw", "BGRX", 0, 1)
+        copies += 1
+        arr = np.array(img)
+        copies += 1
+        bgr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+        copies += 1
+        client_bgr = bgr[offy:offy + ch, offx:offx + cw]
+        copies += 0 if np.shares_memory(client_bgr, bgr) else 1
+        client_rgb = cv2.cvtColor(client_bgr, cv2.COLOR_BGR2RGB)
+        copies += 1
+        return [tuple(int(c) for c in client_rgb[y, x]) for x, y in probes], copies
+
+    def new_tick():
+        frame = Frame.from_bitmap_bits(bits, w, h).client(offx, offy, cw, ch)
+        copies = 0 if np.shares_memory(frame.data, np.frombuffer(bits, dtype=np.uint8)) else 1
+        return [frame.pixel_rgb(x, y) for x, y in probes], copies
+
+    old_px, old_copies = old_tick()
+    new_px, new_copies = new_tick()
+    assert old_px == new_px
+
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        old_tick()
+    t_old = (time.perf_counter() - t0) / ticks
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        new_tick()
+    t_new = (time.perf_counter() - t0) / ticks
+
+    print(f"Conversión BGRX {w}x{h} + 9 lecturas de pixel, {ticks} ticks")
+    print(f"  antes (PIL/cvtColor): {t_old * 1000:.3f} ms/tick | {old_copies} copias de frame")
+    print(f"  Frame (vistas):       {t_new * 1000:.3f} ms/tick | {new_copies} copias de frame")
+
+
+def check_frame_after_rois():
+    """grab_rois() y después grab_frame() en la misma sesión (escalada a frame completo de los anclas)."""
+    frames = synthetic_bgrx_frames(n=2, w=320, h=200)
+    rois = RoiRegistry()
+    rois.register("a", 10, 10, 40, 20)
+    session = CaptureSession(MemoryFrameSource(frames))
+    views = session.grab_rois(rois)
+    frame = session.grab_frame()
+    ok = views is not None and frame is not None and (frame.width, frame.height) == (320, 200)
+    ok &= bool(np.array_equal(frame.data, frames[1]))
+    print(f"grab_rois() → grab_frame(): {'ok' if ok else 'FALLA'}")
+    return ok
+
+
+def check_lost_window():
+    """Tracker sin geometría (la ventana se cerró): client_offset/client_rect dan None y la captura None."""
+    class LostTracker:
+        def geometry(self, refresh=True):
+            return None
+
+    class LostSource(MemoryFrameSource):
+        def client_rect(self):
+            return None
+
+    src = Win32WindowSource.__new__(Win32WindowSource)      # sin __init__: no hay win32 en Linux
+    src.tracker = LostTracker()
+    ok = src.client_offset() is None and src.client_rect() is None and src.read_rects_into([], []) is False
+    ok &= CaptureSession(LostSource(synthetic_bgrx_frames(n=1, w=64, h=48))).grab_frame() is None
+    print(f"ventana perdida → captura None: {'ok' if ok else 'FALLA'}")
+    return ok
+
+
+if __name__ == "__main__":
+    check_frame_after_rois()
+    check_lost_window()
+    bench_capture_session()
+    bench_roi_capture()
+    bench_frame_conversion()
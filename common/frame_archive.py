@@ -0,0 +1,378 @@
+# frame_archive.py - Archivo de frames indexado para grabaciones largas (np.memmap, sin cargar en RAM)
+#
+# Formato .smarc:
+#   HEADER (tamaño fijo)
+#   tabla de ROIs   (MAX_ROIS entradas: nombre, x, y, w, h, offset dentro del registro)
+#   índice          (max_frames entradas: ts float64 perf_counter, offset uint64 del registro)
+#   registros       (alineados a PAGE; cada uno = los pixels BGR del frame o de cada ROI seguidos)
+#
+# Todos los registros miden lo mismo, así el frame N está en data_off + N * record_bytes y el
+# índice solo se consulta para el ts. frame(N) y at_time(T) devuelven vistas del memmap (sin copia).
+# Con rois=... solo se guardan esos rectángulos (barras, ring, harmony, boss): ~KB por frame en vez de ~6 MB.
+#
+#   python frame_archive.py convert sesion.smrec sesion.smarc   → pasa una grabación .smrec a .smarc
+#   python frame_archive.py --bench                             → benchmark con frames sintéticos
+import os
+import sys
+import time
+
+import numpy as np
+
+from capture import Frame, RoiRegistry, _copy_rect
+
+MAGIC = 0x52414D53  # "SMAR"
+VERSION = 1
+PAGE = 4096
+MAX_ROIS = 16
+DEFAULT_MAX_FRAMES = 200_000    # ~5.5 h a 10 fps; el índice ocupa 3.2 MB
+STREAM_CHUNK_BYTES = 16 << 20   # buffer de stream(): 2 frames completos o cientos de frames de ROIs
+
+HEADER = np.dtype([
+    ("magic", "<u4"), ("version", "<u4"), ("width", "<u4"), ("height", "<u4"),
+    ("channels", "<u4"), ("roi_count", "<u4"), ("max_frames", "<u8"), ("count", "<u8"),
+    ("record_bytes", "<u8"), ("index_off", "<u8"), ("data_off", "<u8"),
+])
+ROI_ENTRY = np.dtype([
+    ("name", "S32"), ("x", "<i4"), ("y", "<i4"), ("w", "<u4"), ("h", "<u4"), ("offset", "<u8"),
+])
+INDEX_ENTRY = np.dtype([("ts", "<f8"), ("offset", "<u8")])
+
+ROI_TABLE_OFF = HEADER.itemsize
+INDEX_OFF = ROI_TABLE_OFF + ROI_ENTRY.itemsize * MAX_ROIS
+
+
+def _data_off(max_frames):
+    end = INDEX_OFF + INDEX_ENTRY.itemsize * max_frames
+    return (end + PAGE - 1) // PAGE * PAGE
+
+
+def _roi_rects(rois):
+    """RoiRegistry o {name: (x, y, w, h)} → lista [(name, x, y, w, h)]."""
+    if isinstance(rois, RoiRegistry):
+        return [(name, *rois.rect(name)) for name in rois.names()]
+    return [(name, *rect) for name, rect in rois.items()]
+
+
+class FrameArchiveWriter:
+    """
+    Misma interfaz que SessionRecorder: write(frame, ts) con el client completo.
+    El tamaño se fija con el primer frame. rois=None guarda el frame completo; con rois solo esos
+    rectángulos (lo que cae fuera del frame queda en negro). El contador del header se actualiza
+    después de escribir cada registro: si el proceso muere, el archivo queda legible hasta el último frame.
+    """
+
+    def __init__(self, path, rois=None, max_frames=DEFAULT_MAX_FRAMES):
+        self.path = path
+        self.max_frames = max_frames
+        self._rects = _roi_rects(rois) if rois is not None else None
+        if self._rects is not None and not 0 < len(self._rects) <= MAX_ROIS:
+            raise ValueError(f"entre 1 y {MAX_ROIS} ROIs")
+        self._f = None
+        self._header = self._index = None
+        self._record = None
+        self._parts = None
+        self.frames = 0
+
+    def _open(self, width, height):
+        channels = 3
+        data_off = _data_off(self.max_frames)
+        if self._rects is None:
+            record_bytes = width * height * channels
+        else:
+            record_bytes = sum(w * h * channels for _, _, _, w, h in self._rects)
+
+        self._f = open(self.path, "w+b")
+        self._f.truncate(data_off)
+        mm = np.memmap(self.path, dtype=np.uint8, mode="r+", shape=(data_off,))
+        self._mm = mm
+        self._header = mm[:HEADER.itemsize].view(HEADER)[0:1]
+        table = mm[ROI_TABLE_OFF:INDEX_OFF].view(ROI_ENTRY)
+        self._index = mm[INDEX_OFF:INDEX_OFF + INDEX_ENTRY.itemsize * self.max_frames].view(INDEX_ENTRY)
+
+        self._record = np.empty(record_bytes, dtype=np.uint8)
+        if self._rects is None:
+            self._parts = None
+        else:
+            self._parts = []
+            off = 0
+            for i, (name, x, y, w, h) in enumerate(self._rects):
+                table[i] = (name.encode("utf-8")[:32], x, y, w, h, off)
+                self._parts.append((x, y, self._record[off:off + w * h * channels].reshape(h, w, channels)))
+                off += w * h * channels
+
+        hdr = self._header
+        hdr["magic"] = MAGIC
+        hdr["version"] = VERSION
+        hdr["width"] = width
+        hdr["height"] = height
+        hdr["channels"] = channels
+        hdr["roi_count"] = 0 if self._rects is None else len(self._rects)
+        hdr["max_frames"] = self.max_frames
+        hdr["count"] = 0
+        hdr["record_bytes"] = record_bytes
+        hdr["index_off"] = INDEX_OFF
+        hdr["data_off"] = data_off
+        self._f.seek(data_off)
+
+    def write(self, frame, ts=None):
+        if isinstance(frame, Frame):
+            data, x0, y0 = frame.data, frame.x0, frame.y0
+        else:
+            data, x0, y0 = frame, 0, 0
+        if self._f is None:
+            self._open(data.shape[1], data.shape[0])
+        if self.frames >= self.max_frames:
+            raise ValueError(f"{self.path}: archivo lleno ({self.max_frames} frames)")
+
+        bgr = data[..., :3]
+        if self._parts is None:
+            h, w = int(self._header["height"][0]), int(self._header["width"][0])
+            if bgr.shape[:2] != (h, w):
+                raise ValueError(f"frame {bgr.shape[1]}x{bgr.shape[0]}, el archivo es {w}x{h}")
+            np.copyto(self._record.reshape(h, w, 3), bgr)
+        else:
+            for x, y, dst in self._parts:
+                _copy_rect(dst, bgr, x - x0, y - y0)
+
+        offset = self._f.tell()
+        self._f.write(self._record.data)
+        self._f.flush()
+        self._index[self.frames] = (time.perf_counter() if ts is None else ts, offset)
+        self.frames += 1
+        self._header["count"] = self.frames
+
+    def close(self):
+        if self._f is not None:
+            self._mm.flush()
+            self._header = self._index = self._mm = None
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FrameArchive:
+    """
+    Lector de .smarc. archive[N] / at_time(T) → Frame (frame completo) o {name: Frame} (solo ROIs),
+    siempre vistas del memmap. Los Frame de ROIs tienen su origen en coords del client, igual que
+    CaptureSession.grab_rois(). stream() recorre todo con un buffer fijo (memoria acotada).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        hdr = np.fromfile(path, dtype=HEADER, count=1)
+        if len(hdr) != 1 or int(hdr["magic"][0]) != MAGIC or int(hdr["version"][0]) != VERSION:
+            raise ValueError(f"{path} no es un archivo .smarc")
+        hdr = hdr[0]
+        self.width, self.height = int(hdr["width"]), int(hdr["height"])
+        self.channels = int(hdr["channels"])
+        self.record_bytes = int(hdr["record_bytes"])
+        self.max_frames = int(hdr["max_frames"])
+        self.data_off = int(hdr["data_off"])
+        self.index_off = int(hdr["index_off"])
+
+        table = np.fromfile(path, dtype=ROI_ENTRY, count=int(hdr["roi_count"]), offset=ROI_TABLE_OFF)
+        self.rois = {
+            e["name"].decode("utf-8"): (int(e["x"]), int(e["y"]), int(e["w"]), int(e["h"]), int(e["offset"]))
+            for e in table
+        } or None
+        self.refresh()
+
+    def refresh(self):
+        """Relee el contador (archivo que todavía se está grabando) y remapea."""
+        count = int(np.fromfile(self.path, dtype=HEADER, count=1)[0]["count"])
+        # solo registros completos, por si el writer está a mitad de uno
+        on_disk = (os.path.getsize(self.path) - self.data_off) // self.record_bytes
+        self.count = min(count, on_disk)
+        self.index = np.memmap(self.path, dtype=INDEX_ENTRY, mode="r",
+                               offset=self.index_off, shape=(self.max_frames,))
+        self.ts = self.index["ts"][:self.count]
+        self._data = np.memmap(self.path, dtype=np.uint8, mode="r", offset=self.data_off,
+                               shape=(max(1, self.count), self.record_bytes)) if self.count else None
+        return self.count
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def rect_registry(self):
+        """RoiRegistry con los ROIs guardados (para los detectores que declaran sus ROIs)."""
+        if self.rois is None:
+            return None
+        reg = RoiRegistry()
+        for name, (x, y, w, h, _) in self.rois.items():
+            reg.register(name, x, y, w, h)
+        return reg
+
+    def _wrap(self, record):
+        if self.rois is None:
+            return Frame(record.reshape(self.height, self.width, self.channels))
+        c = self.channels
+        return {
+            name: Frame(record[off:off + w * h * c].reshape(h, w, c), x, y)
+            for name, (x, y, w, h, off) in self.rois.items()
+        }
+
+    def frame(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self._wrap(self._data[i])
+
+    __getitem__ = frame
+
+    def index_at(self, t):
+        """Último frame con ts <= t. Estima la posición por el fps medio y corrige unos pocos pasos."""
+        n = self.count
+        if n == 0:
+            raise IndexError("archivo vacío")
+        ts = self.ts
+        t0, t1 = float(ts[0]), float(ts[n - 1])
+        if t <= t0:
+            return 0
+        if t >= t1:
+            return n - 1
+        i = int((t - t0) / (t1 - t0) * (n - 1))
+        for _ in range(8):
+            if ts[i] > t:
+                i -= 1
+            elif i + 1 < n and ts[i + 1] <= t:
+                i += 1
+            else:
+                return i
+        # fps muy irregular: búsqueda binaria
+        return int(np.searchsorted(ts, t, side="right")) - 1
+
+    def at_time(self, t):
+        i = self.index_at(t)
+        return float(self.ts[i]), self.frame(i)
+
+    def stream(self, start=0, stop=None, chunk_bytes=STREAM_CHUNK_BYTES):
+        """
+        Itera (ts, Frame | {name: Frame}) leyendo de a ~chunk_bytes con un buffer reutilizado:
+        la memoria no crece con el largo del archivo. Cada vista vale hasta el siguiente chunk.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        chunk_frames = max(1, chunk_bytes // self.record_bytes)
+        buf = np.empty((chunk_frames, self.record_bytes), dtype=np.uint8)
+        with open(self.path, "rb", buffering=0) as f:
+            f.seek(self.data_off + start * self.record_bytes)
+            i = start
+            while i < stop:
+                n = min(chunk_frames, stop - i)
+                got = f.readinto(memoryview(buf[:n]).cast("B")) // self.record_bytes
+                if got == 0:
+                    return
+                ts = np.array(self.index["ts"][i:i + got])
+                for k in range(got):
+                    yield float(ts[k]), self._wrap(buf[k])
+                i += got
+
+    def replay(self, speed=1.0):
+        """Como ReplaySource: respeta los tiempos grabados (speed=None → máxima velocidad)."""
+        t_rec0 = t_play0 = None
+        for ts, frame in self.stream():
+            if speed:
+                if t_rec0 is None:
+                    t_rec0, t_play0 = ts, time.perf_counter()
+                wait = t_play0 + (ts - t_rec0) / speed - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            yield ts, frame
+
+    def close(self):
+        self.index = self.ts = self._data = None
+
+
+# ========================
+# CONVERSIÓN Y BENCHMARK
+# ========================
+def convert(src_path, dst_path, rois=None):
+    """.smrec → .smarc (frame completo o solo rois)."""
+    from recorder import ReplaySource
+
+    with FrameArchiveWriter(dst_path, rois=rois) as arc:
+        for ts, frame in ReplaySource(src_path, speed=None):
+            arc.write(frame, ts=ts)
+    return arc.frames
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def bench_frame_archive(path="bench.smarc", frames=300, w=1920, h=1009, fps=10.0):
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, size=(h, w, 4), dtype=np.uint8)
+    rois = {
+        "hp_bar": (1768, 140, 93, 1), "mana_bar": (1768, 153, 93, 1), "ring_slot": (1767, 224, 1, 1),
+        "harmony": (872, 0, 980, 240), "boss": (1469, 716, 23, 19),
+    }
+
+    for label, kw in (("frame completo", {}), ("solo ROIs", {"rois": rois})):
+        t0 = time.perf_counter()
+        with FrameArchiveWriter(path, **kw) as arc:
+            for i in range(frames):
+                base[0, 0, 0] = i % 256
+                arc.write(base, ts=i / fps)
+        t_write = (time.perf_counter() - t0) / frames
+        size = os.path.getsize(path)
+
+        rss0 = _rss_mb()
+        t0 = time.perf_counter()
+        archive = FrameArchive(path)
+        t_open = time.perf_counter() - t0
+
+        idx = rng.integers(0, frames, size=2000)
+        t0 = time.perf_counter()
+        for i in idx:
+            f = archive[int(i)]
+        t_rand = (time.perf_counter() - t0) / len(idx)
+
+        times = rng.uniform(0, frames / fps, size=2000)
+        t0 = time.perf_counter()
+        for t in times:
+            _, f = archive.at_time(float(t))
+        t_time = (time.perf_counter() - t0) / len(times)
+        assert archive.index_at(12.34) == int(12.34 * fps)
+
+        peak = rss0
+        t0 = time.perf_counter()
+        n = 0
+        for ts, f in archive.stream():
+            if archive.rois is None:
+                _ = int(f.data[h // 2, w // 2, 1])
+            else:
+                _ = int(f["harmony"].data[0, 0, 1])
+            n += 1
+            if n % 50 == 0:
+                peak = max(peak, _rss_mb())
+        t_stream = time.perf_counter() - t0
+        archive.close()
+
+        print(f"Archivo .smarc, {label}: {frames} frames {w}x{h}")
+        print(f"  disco: {size / 1e6:.1f} MB ({size / frames / 1e3:.1f} KB/frame) | write {t_write * 1000:.2f} ms/frame")
+        print(f"  open {t_open * 1000:.2f} ms | frame[N] {t_rand * 1e6:.1f} µs | at_time(T) {t_time * 1e6:.1f} µs")
+        print(f"  stream: {n / t_stream:.0f} frames/s | RSS {rss0:.0f} → pico {peak:.0f} MB")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "convert":
+        print(f"{convert(sys.argv[2], sys.argv[3])} frames → {sys.argv[3]}")
+    elif "--bench" in sys.argv:
+        bench_frame_archive()
+    else:
+        print("Uso: python frame_archive.py convert in.smrec out.smarc | --bench")
@@ -0,0 +1,436 @@
+# frame_bus.py - Bus de frames en memoria compartida (un productor, varios lectores sin copia)
+#
+# Un solo proceso captura el proyector de OBS y publica el client en un ring buffer de
+# multiprocessing.shared_memory. Caster y healer leen siempre el último frame publicado.
+#
+#   python frame_bus.py            → productor real (win32)
+#   python frame_bus.py --bench    → productor sintético + varios lectores (Linux)
+#   python frame_bus.py --check    → cambio de tamaño con lector enganchado y ROIs copiados (Linux)
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from capture import Frame
+
+BUS_NAME = "supermonk_frames"
+BUS_SLOTS = 4
+PUBLISH_SECONDS = 0.05          # 20 fps, más rápido que el caster (100 ms) y el healer (150 ms)
+MAX_FRAME_AGE = 0.5             # frames más viejos → el lector vuelve a su captura propia
+REATTACH_SECONDS = 2.0
+
+MAGIC = 0x53464D42  # "SMFB"
+VERSION = 2
+
+# Dos segmentos: el de control (BUS_NAME, tamaño fijo, nunca se recrea) dice en qué segmento de datos
+# están los frames; el de datos ("<BUS_NAME>_<pid>_<generation>") se crea nuevo en cada cambio de
+# tamaño. En Windows un segmento no desaparece mientras haya lectores enganchados, así que reusar
+# el mismo nombre al recrearlo falla (FileExistsError): con un nombre por generación no hace falta.
+CONTROL = np.dtype([
+    ("magic", "<u4"), ("version", "<u4"), ("pid", "<u4"), ("generation", "<u4"),
+    ("closed", "<u4"), ("_pad", "<u4"),
+])
+
+# Cabecera del segmento de datos: magic, version, slots, width, height, channels, closed, _pad, latest_seq
+HEADER = np.dtype([
+    ("magic", "<u4"), ("version", "<u4"), ("slots", "<u4"), ("width", "<u4"),
+    ("height", "<u4"), ("channels", "<u4"), ("closed", "<u4"), ("_pad", "<u4"),
+    ("latest_seq", "<u8"),
+])
+SLOT_HEADER = np.dtype([("seq", "<u8"), ("ts", "<f8")])
+
+
+def data_name(name, pid, generation):
+    return f"{name}_{pid}_{generation}"
+
+
+def _layout(slots, width, height, channels):
+    frame_bytes = width * height * channels
+    slots_off = HEADER.itemsize
+    data_off = slots_off + SLOT_HEADER.itemsize * slots
+    # alinear los datos a 64 bytes
+    data_off = (data_off + 63) // 64 * 64
+    return slots_off, data_off, frame_bytes, data_off + frame_bytes * slots
+
+
+def _map(shm, slots, width, height, channels):
+    slots_off, data_off, frame_bytes, _ = _layout(slots, width, height, channels)
+    header = np.ndarray((), dtype=HEADER, buffer=shm.buf, offset=0)
+    slot_hdr = np.ndarray((slots,), dtype=SLOT_HEADER, buffer=shm.buf, offset=slots_off)
+    data = np.ndarray((slots, height, width, channels), dtype=np.uint8, buffer=shm.buf, offset=data_off)
+    return header, slot_hdr, data
+
+
+def _untrack(shm):
+    # quien no es dueño del segmento: que el resource_tracker no lo borre al salir
+    if os.name == "posix":
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+
+
+class FrameBusWriter:
+    """
+    Publica frames BGRX (h, w, 4). seq empieza en 1; 0 en un slot = escribiendo/vacío.
+    resize(w, h) pasa a un segmento de datos nuevo (generation + 1) sin tocar el de control.
+    """
+
+    def __init__(self, width, height, slots=BUS_SLOTS, name=BUS_NAME, channels=4):
+        self.name = name
+        self.slots = slots
+        self.channels = channels
+        try:
+            self._control_shm = shared_memory.SharedMemory(name=name, create=True, size=CONTROL.itemsize)
+            self._owns_control = True
+        except FileExistsError:
+            # quedó de un productor anterior (o sigue abierto por lectores en Windows): se reusa
+            self._control_shm = shared_memory.SharedMemory(name=name)
+            self._owns_control = False
+        self._control = np.ndarray((), dtype=CONTROL, buffer=self._control_shm.buf, offset=0)
+        if int(self._control["magic"]) != MAGIC:
+            self._control["generation"] = 0
+        self._control["magic"] = MAGIC
+        self._control["version"] = VERSION
+        self._control["pid"] = os.getpid()
+        self._control["closed"] = 0
+        self.shm = None
+        self.seq = 0
+        self._open_data(width, height)
+
+    def _open_data(self, width, height):
+        _, _, _, total = _layout(self.slots, width, height, self.channels)
+        generation = int(self._control["generation"]) + 1
+        shm = shared_memory.SharedMemory(name=data_name(self.name, os.getpid(), generation),
+                                         create=True, size=total)
+        header, slot_hdr, data = _map(shm, self.slots, width, height, self.channels)
+        slot_hdr["seq"] = 0
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["slots"] = self.slots
+        header["width"] = width
+        header["height"] = height
+        header["channels"] = self.channels
+        header["closed"] = 0
+        header["latest_seq"] = self.seq
+
+        old_shm = self.shm
+        if old_shm is not None:
+            self._header["closed"] = 1
+        self.shm = shm
+        self.width, self.height = width, height
+        self._header, self._slot_hdr, self._data = header, slot_hdr, data
+        # los lectores miran generation: se publica cuando el segmento nuevo ya está listo
+        self._control["generation"] = generation
+        if old_shm is not None:
+            old_shm.close()
+            old_shm.unlink()
+
+    def resize(self, width, height):
+        if (width, height) != (self.width, self.height):
+            self._open_data(width, height)
+
+    def publish(self, frame_data, ts=None):
+        """Copia el frame a su slot y lo marca como último. ts en time.perf_counter()."""
+        self.seq += 1
+        slot = self.seq % len(self._slot_hdr)
+        self._slot_hdr[slot]["seq"] = 0
+        np.copyto(self._data[slot], frame_data)
+        self._slot_hdr[slot]["ts"] = time.perf_counter() if ts is None else ts
+        self._slot_hdr[slot]["seq"] = self.seq
+        self._header["latest_seq"] = self.seq
+        return self.seq
+
+    def close(self):
+        self._control["closed"] = 1
+        self._header["closed"] = 1
+        self._header = self._slot_hdr = self._data = self._control = None
+        self.shm.close()
+        self.shm.unlink()
+        self._control_shm.close()
+        if self._owns_control:
+            self._control_shm.unlink()
+        else:
+            _untrack(self._control_shm)
+
+
+class FrameBusReader:
+    """
+    Lector: latest() devuelve una vista sin copia sobre el slot del último frame; el slot no se
+    reescribe hasta BUS_SLOTS-1 publicaciones después y valid(seq) lo confirma. read_rois() copia los
+    ROIs y verifica el slot después de copiar, así lo que devuelve nunca queda a medio reescribir.
+    Se (re)engancha solo al bus si todavía no existe, si el productor lo recreó o si cambió de tamaño.
+    untrack=False solo si el lector comparte resource_tracker con el productor (mismo árbol multiprocessing).
+    """
+
+    def __init__(self, name=BUS_NAME, untrack=True):
+        self.name = name
+        self.untrack = untrack
+        self.shm = None
+        self._control_shm = None
+        self._control = None
+        self.generation = None
+        self._next_attach = 0.0
+        self.last_seq = 0
+        self.torn = 0
+
+    def _open(self, name):
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except (FileNotFoundError, OSError):
+            return None
+        if self.untrack:
+            _untrack(shm)
+        return shm
+
+    def _attach(self):
+        now = time.perf_counter()
+        if now < self._next_attach:
+            return False
+        self._next_attach = now + REATTACH_SECONDS
+        if self._control_shm is None:
+            shm = self._open(self.name)
+            if shm is None:
+                return False
+            control = np.ndarray((), dtype=CONTROL, buffer=shm.buf, offset=0)
+            if int(control["magic"]) != MAGIC or int(control["version"]) != VERSION:
+                del control
+                shm.close()
+                return False
+            self._control_shm, self._control = shm, control
+        if int(self._control["closed"]):
+            return False
+        pid, generation = int(self._control["pid"]), int(self._control["generation"])
+        shm = self._open(data_name(self.name, pid, generation))
+        if shm is None:
+            return False
+        header = np.ndarray((), dtype=HEADER, buffer=shm.buf, offset=0)
+        if int(header["magic"]) != MAGIC or int(header["version"]) != VERSION or int(header["closed"]):
+            del header
+            shm.close()
+            return False
+        slots, w, h, c = (int(header[k]) for k in ("slots", "width", "height", "channels"))
+        del header
+        self.shm = shm
+        self.generation = generation
+        self._header, self._slot_hdr, self._data = _map(shm, slots, w, h, c)
+        return True
+
+    def _detach(self, control=False):
+        self._header = self._slot_hdr = self._data = None
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+        self.generation = None
+        if control and self._control_shm is not None:
+            self._control = None
+            self._control_shm.close()
+            self._control_shm = None
+
+    def latest(self):
+        """(seq, ts, Frame) del último frame publicado, o None."""
+        if self.shm is not None and (int(self._control["closed"]) or int(self._header["closed"])
+                                     or int(self._control["generation"]) != self.generation):
+            # productor cerrado o segmento de datos nuevo (cambio de tamaño): re-enganchar ya
+            self._detach(control=bool(int(self._control["closed"])))
+            self._next_attach = 0.0
+        if self.shm is None and not self._attach():
+            return None
+        seq = int(self._header["latest_seq"])
+        if seq == 0:
+            return None
+        slot = seq % len(self._slot_hdr)
+        ts = float(self._slot_hdr[slot]["ts"])
+        if int(self._slot_hdr[slot]["seq"]) != seq:
+            return None  # el productor ya está reescribiendo este slot
+        self.last_seq = seq
+        return seq, ts, Frame(self._data[slot])
+
+    def valid(self, seq):
+        """True si el slot de seq todavía no fue reescrito (chequear después de usar la vista)."""
+        if self.shm is None:
+            return False
+        return int(self._slot_hdr[seq % len(self._slot_hdr)]["seq"]) == seq
+
+    def read_rois(self, registry, max_age=MAX_FRAME_AGE):
+        """
+        {name: Frame} (copias) desde el último frame del bus, o None si no hay bus, el frame es viejo
+        o el productor reescribió el slot mientras se copiaba (el caller captura por su cuenta).
+        """
+        latest = self.latest()
+        if latest is None:
+            return None
+        seq, ts, frame = latest
+        if time.perf_counter() - ts > max_age:
+            return None
+        views = {name: Frame(view.data.copy(), view.x0, view.y0)
+                 for name, view in registry.views(frame).items()}
+        if not self.valid(seq):
+            self.torn += 1
+            return None
+        return views
+
+    def close(self):
+        self._detach(control=True)
+
+
+# ========================
+# PRODUCTOR REAL (win32)
+# ========================
+def run_producer(title_prefix="Windowed Projector (Source)"):
+    from capture import CaptureSession, Win32WindowSource, PW_RENDERFULLCONTENT
+    from window_tracker import WindowTracker, set_dpi_awareness
+
+    # mismas coordenadas de client que caster / healer (que también son DPI-aware)
+    set_dpi_awareness()
+    tracker = WindowTracker(title_prefix)
+    hwnd = None
+    session = None
+    writer = None
+    print("✅ Frame bus: productor iniciado")
+    try:
+        while True:
+            current = tracker.hwnd()
+            if current != hwnd:
+                if session is not None:
+                    session.close()
+                hwnd = current
+                session = CaptureSession(Win32WindowSource(
+                    hwnd, print_flags=PW_RENDERFULLCONTENT, tracker=tracker)) if hwnd else None
+            if session is None:
+                time.sleep(0.5)
+                continue
+            frame = session.grab_frame()
+            if frame is None:
+                time.sleep(0.5)
+                continue
+            try:
+                if writer is None:
+                    writer = FrameBusWriter(frame.width, frame.height)
+                else:
+                    writer.resize(frame.width, frame.height)
+            except OSError as e:
+                print(f"⚠️ Frame bus: no se pudo (re)crear el segmento: {e}")
+                time.sleep(REATTACH_SECONDS)
+                continue
+            writer.publish(frame.data)
+            time.sleep(PUBLISH_SECONDS)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer is not None:
+            writer.close()
+        if session is not None:
+            session.close()
+
+
+# ========================
+# BENCHMARK (productor sintético + varios lectores)
+# ========================
+def _bench_consumer(name, duration, out_queue):
+    reader = FrameBusReader(name, untrack=False)
+    latencies = []
+    torn = 0
+    last = 0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        latest = reader.latest()
+        if latest is None or latest[0] == last:
+            time.sleep(0.0005)
+            continue
+        seq, ts, frame = latest
+        latencies.append(time.perf_counter() - ts)
+        _ = int(frame.data[0, 0, 0]) + int(frame.data[-1, -1, 2])
+        if not reader.valid(seq):
+            torn += 1
+        last = seq
+    reader.close()
+    out_queue.put((latencies, torn))
+
+
+def bench_frame_bus(consumers=3, fps=60, duration=3.0, width=1920, height=1009):
+    import multiprocessing as mp
+
+    name = BUS_NAME + "_bench"
+    writer = FrameBusWriter(width, height, name=name)
+    frames = [np.full((height, width, 4), i * 40, dtype=np.uint8) for i in range(4)]
+
+    ctx = mp.get_context("spawn")  # procesos independientes, como caster y healer
+    q = ctx.Queue()
+    procs = [ctx.Process(target=_bench_consumer, args=(name, duration, q)) for _ in range(consumers)]
+    for p in procs:
+        p.start()
+
+    period = 1.0 / fps
+    published = 0
+    t_pub = []
+    end = time.perf_counter() + duration + 0.2
+    next_t = time.perf_counter()
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        writer.publish(frames[published % len(frames)])
+        t_pub.append(time.perf_counter() - t0)
+        published += 1
+        next_t += period
+        time.sleep(max(0.0, next_t - time.perf_counter()))
+
+    results = [q.get() for _ in procs]
+    for p in procs:
+        p.join()
+    writer.close()
+
+    print(f"Frame bus {width}x{height} BGRX, {fps} fps, {consumers} lectores, {duration:.1f}s")
+    print(f"  publicados: {published} | publish medio: {np.mean(t_pub) * 1000:.3f} ms")
+    for i, (lat, torn) in enumerate(results):
+        if not lat:
+            print(f"  lector {i}: sin frames")
+            continue
+        lat_ms = np.array(lat) * 1000
+        print(f"  lector {i}: {len(lat)} frames | latencia p50 {np.percentile(lat_ms, 50):.3f} ms "
+              f"p95 {np.percentile(lat_ms, 95):.3f} ms max {lat_ms.max():.3f} ms | reescritos {torn}")
+
+
+def check_resize_and_copies(name=BUS_NAME + "_check"):
+    """Cambio de tamaño con un lector enganchado y read_rois() con el slot reescrito durante la copia."""
+    from capture import RoiRegistry
+
+    writer = FrameBusWriter(320, 200, name=name)
+    reader = FrameBusReader(name, untrack=False)
+    rois = RoiRegistry()
+    rois.register("a", 10, 10, 40, 20)
+    writer.publish(np.full((200, 320, 4), 7, dtype=np.uint8))
+    first = reader.read_rois(rois)
+    writer.resize(400, 240)
+    writer.publish(np.full((240, 400, 4), 9, dtype=np.uint8))
+    second = reader.latest()
+    ok = first is not None and int(first["a"].data[0, 0, 0]) == 7
+    ok &= second is not None and (second[2].width, second[2].height) == (400, 240)
+    ok &= int(second[2].data[0, 0, 0]) == 9
+
+    # el productor alcanza el slot mientras se copian los ROIs → None (el caller captura por su cuenta)
+    views = rois.views
+    def views_then_overwrite(frame):
+        out = views(frame)
+        for _ in range(BUS_SLOTS):
+            writer.publish(np.zeros((240, 400, 4), dtype=np.uint8))
+        return out
+    rois.views = views_then_overwrite
+    ok &= reader.read_rois(rois) is None and reader.torn == 1
+
+    reader.close()
+    writer.close()
+    print(f"Frame bus: resize con lector enganchado + slot reescrito durante read_rois: {'ok' if ok else 'FALLA'}")
+    return ok
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        check_resize_and_copies()
+    elif "--bench" in sys.argv:
+        check_resize_and_copies()
+        bench_frame_bus()
+    else:
+        run_producer()
@@ -0,0 +1,299 @@
+# recorder.py - Grabación de frames del client y replay sin win32
+#
+# Formato .smrec (stream, append-only):
+#   MAGIC (8 bytes)
+#   por frame: RECORD (ts float64 perf_counter, height, width, channels uint32) + pixels BGR crudos
+# Se guarda BGR (sin el byte X del BGRX) para ocupar 3/4 del tamaño.
+#
+# Modo delta (MAGIC_DELTA, SessionRecorder(path, delta=True)):
+#   por frame: DELTA_RECORD (ts, height, width, channels, kind, tile, largo del payload) + payload zlib
+#   kind KEYFRAME: los pixels BGR completos
+#   kind DELTA:    bitmap de tiles cambiados (np.packbits) + XOR de esos tiles contra el frame anterior
+# Cada KEYFRAME_EVERY frames va un keyframe, así un archivo cortado o dañado se recupera rápido.
+# La UI, las barras y los iconos casi no cambian entre frames: la mayoría de los tiles no se guardan.
+#
+#   python recorder.py --bench [sesion.smrec]   → tasa de compresión y velocidad de decode
+import os
+import sys
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from capture import Frame
+
+MAGIC = b"SMREC\x00\x01\x00"
+MAGIC_DELTA = b"SMREC\x00\x02\x00"
+RECORD = struct.Struct("<dIII")
+DELTA_RECORD = struct.Struct("<dIIIBBI")
+KEYFRAME, DELTA = 0, 1
+
+DELTA_TILE = 32
+KEYFRAME_EVERY = 100            # 10 s a 10 fps
+ZLIB_LEVEL = 1                  # rápido: el recorder corre dentro del loop de captura
+
+
+def _tiles(canvas, tile):
+    """Vista (ty, tx, tile, tile, c) de un canvas (ty*tile, tx*tile, c), sin copia."""
+    hp, wp, c = canvas.shape
+    return canvas.reshape(hp // tile, tile, wp // tile, tile, c).swapaxes(1, 2)
+
+
+class _DeltaState:
+    """Canvas con padding a múltiplo de tile: el frame anterior, del lado del encoder o del decoder."""
+
+    def __init__(self, h, w, c, tile):
+        self.shape = (h, w, c)
+        self.tile = tile
+        ty, tx = -(-h // tile), -(-w // tile)
+        self.canvas = np.zeros((ty * tile, tx * tile, c), dtype=np.uint8)
+        self.tiles = _tiles(self.canvas, tile)
+        self.frame = self.canvas[:h, :w]
+
+
+class SessionRecorder:
+    """
+    Escribe frames (Frame o array BGR/BGRX) con timestamp monotónico.
+    delta=True: keyframe + tiles cambiados (XOR) comprimidos con zlib.
+    """
+
+    def __init__(self, path, delta=False, tile=DELTA_TILE, keyframe_every=KEYFRAME_EVERY):
+        self.path = path
+        self.delta = delta
+        self.tile = tile
+        self.keyframe_every = keyframe_every
+        self._f = open(path, "wb")
+        self._f.write(MAGIC_DELTA if delta else MAGIC)
+        self._state = None
+        self._cur = None
+        self.frames = 0
+        self.raw_bytes = 0
+        self.written_bytes = len(MAGIC)
+
+    def write(self, frame, ts=None):
+        data = frame.data if isinstance(frame, Frame) else frame
+        ts = time.perf_counter() if ts is None else ts
+        if self.delta:
+            self._write_delta(data[..., :3], ts)
+        else:
+            bgr = np.ascontiguousarray(data[..., :3])
+            h, w, c = bgr.shape
+            self._f.write(RECORD.pack(ts, h, w, c))
+            self._f.write(bgr.data)
+            self.written_bytes += RECORD.size + bgr.nbytes
+        self.raw_bytes += data.shape[0] * data.shape[1] * 3
+        self.frames += 1
+
+    def _write_delta(self, bgr, ts):
+        h, w, c = bgr.shape
+        st = self._state
+        if st is None or st.shape != (h, w, c):
+            st = self._state = _DeltaState(h, w, c, self.tile)
+            self._cur = _DeltaState(h, w, c, self.tile)
+            force_key = True
+        else:
+            force_key = self.frames % self.keyframe_every == 0
+
+        cur = self._cur
+        np.copyto(cur.frame, bgr)
+        if force_key:
+            kind = KEYFRAME
+            payload = zlib.compress(np.ascontiguousarray(cur.frame).data, ZLIB_LEVEL)
+        else:
+            kind = DELTA
+            changed = (cur.tiles != st.tiles).any(axis=(2, 3, 4))
+            xor = cur.tiles[changed] ^ st.tiles[changed]
+            payload = zlib.compress(np.packbits(changed).tobytes() + xor.tobytes(), ZLIB_LEVEL)
+        self._f.write(DELTA_RECORD.pack(ts, h, w, c, kind, self.tile, len(payload)))
+        self._f.write(payload)
+        self.written_bytes += DELTA_RECORD.size + len(payload)
+        # el frame actual pasa a ser la referencia (swap, sin copiar)
+        self._state, self._cur = cur, st
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplaySource:
+    """
+    Itera (ts, Frame) de un .smrec (crudo o delta). speed=1.0 respeta los tiempos grabados,
+    speed=N va N veces más rápido, speed=None va a máxima velocidad.
+    Los Frame tienen 3 canales (BGR); bgr()/rgb()/pixel_*() funcionan igual que con BGRX.
+    En modo delta el Frame es una vista del canvas del decoder: vale hasta el siguiente frame.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+
+    def _records(self):
+        with open(self.path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic == MAGIC_DELTA:
+                yield from self._delta_records(f)
+                return
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} no es una grabación .smrec")
+            while True:
+                head = f.read(RECORD.size)
+                if len(head) < RECORD.size:
+                    return
+                ts, h, w, c = RECORD.unpack(head)
+                raw = f.read(h * w * c)
+                if len(raw) < h * w * c:
+                    return  # grabación cortada a mitad de frame
+                yield ts, np.frombuffer(raw, dtype=np.uint8).reshape(h, w, c)
+
+    def _delta_records(self, f):
+        st = None
+        while True:
+            head = f.read(DELTA_RECORD.size)
+            if len(head) < DELTA_RECORD.size:
+                return
+            ts, h, w, c, kind, tile, size = DELTA_RECORD.unpack(head)
+            payload = f.read(size)
+            if len(payload) < size:
+                return  # grabación cortada a mitad de frame
+            raw = zlib.decompress(payload)
+            if kind == KEYFRAME:
+                if st is None or st.shape != (h, w, c) or st.tile != tile:
+                    st = _DeltaState(h, w, c, tile)
+                st.frame[...] = np.frombuffer(raw, dtype=np.uint8).reshape(h, w, c)
+            else:
+                if st is None:
+                    continue  # delta sin keyframe previo (archivo dañado): esperar al próximo keyframe
+                n_tiles = st.tiles.shape[0] * st.tiles.shape[1]
+                bits = (n_tiles + 7) // 8
+                changed = np.unpackbits(np.frombuffer(raw, dtype=np.uint8, count=bits),
+                                        count=n_tiles).view(bool).reshape(st.tiles.shape[:2])
+                if bits < len(raw):
+                    xor = np.frombuffer(raw, dtype=np.uint8, offset=bits).reshape(-1, tile, tile, c)
+                    st.tiles[changed] ^= xor
+            yield ts, st.frame
+
+    def __iter__(self):
+        t_rec0 = t_play0 = None
+        for ts, data in self._records():
+            if self.speed:
+                if t_rec0 is None:
+                    t_rec0, t_play0 = ts, time.perf_counter()
+                wait = t_play0 + (ts - t_rec0) / self.speed - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            yield ts, Frame(data)
+
+
+def synthetic_recording(path, frames=50, w=1920, h=1009, fps=10.0, seed=0):
+    """Grabación sintética (fondo fijo + una franja que cambia) para probar el replay en Linux."""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+    with SessionRecorder(path) as rec:
+        for i in range(frames):
+            frame = base.copy()
+            frame[100:110, (i * 13) % (w - 50):(i * 13) % (w - 50) + 50] = 255
+            rec.write(frame, ts=i / fps)
+    return path
+
+
+def synthetic_hunt(frames=300, w=1920, h=1009, fps=10.0, seed=0):
+    """
+    Frames parecidos a una hunt: UI fija con textura, un área de juego que se desplaza cuando el
+    personaje camina, criaturas que se mueven y barras de HP que suben y bajan.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:h, 0:w]
+    ui = np.stack([(xx // 7) % 64 + 40, (yy // 5) % 48 + 30, ((xx + yy) // 11) % 32 + 50], axis=-1).astype(np.uint8)
+    ui[rng.random((h, w)) < 0.05] = 200
+    gx, gy, gw, gh = 200, 40, 1100, 800
+    ground = rng.integers(0, 4, size=(gh // 32 + 4, gw // 32 + 4))
+    palette = np.array([[40, 90, 40], [60, 110, 50], [90, 90, 90], [30, 60, 120]], dtype=np.uint8)
+    floor = np.repeat(np.repeat(palette[ground], 32, axis=0), 32, axis=1)
+    creatures = rng.integers(0, [gw - 32, gh - 32], size=(6, 2))
+    frame = ui.copy()
+    dx = dy = 0
+    for i in range(frames):
+        if i % 8 < 4:  # camina 4 frames de cada 8
+            dx, dy = dx + 8, dy + (4 if i % 16 < 8 else 0)
+        tiles = np.roll(floor, (-(dy % 32), -(dx % 32)), axis=(0, 1))
+        frame[gy:gy + gh, gx:gx + gw] = tiles[:gh, :gw]
+        creatures = np.clip(creatures + rng.integers(-4, 5, size=creatures.shape), 0, [gw - 32, gh - 32])
+        for cx, cy in creatures:
+            frame[gy + cy:gy + cy + 32, gx + cx:gx + cx + 32] = (20, 20, 180)
+        hp = int(92 * (0.5 + 0.5 * np.sin(i / 20)))
+        frame[140, 1714:1806] = 30
+        frame[140, 1714:1714 + hp] = (79, 79, 211)
+        yield i / fps, frame
+
+
+def bench_delta(path=None, tmp="bench_delta.smrec", fps=10.0):
+    """Tasa de compresión y decode del modo delta sobre una grabación (o una hunt sintética)."""
+    if path:
+        source = ((ts, f.data) for ts, f in ReplaySource(path, speed=None))
+        label = path
+    else:
+        source = synthetic_hunt(fps=fps)
+        label = "hunt sintética"
+
+    t_enc = 0.0
+    with SessionRecorder(tmp, delta=True) as rec:
+        for ts, frame in source:
+            t0 = time.perf_counter()
+            rec.write(frame, ts=ts)
+            t_enc += time.perf_counter() - t0
+    frames, raw, written = rec.frames, rec.raw_bytes, rec.written_bytes
+    if not frames:
+        os.remove(tmp)
+        print("❌ Grabación vacía")
+        return
+
+    t0 = time.perf_counter()
+    n = 0
+    for ts, frame in ReplaySource(tmp, speed=None):
+        n += 1
+    t_dec = time.perf_counter() - t0
+    os.remove(tmp)
+
+    print(f"Delta .smrec ({label}): {frames} frames, tile {DELTA_TILE}px, keyframe cada {KEYFRAME_EVERY}")
+    print(f"  crudo {raw / 1e6:.1f} MB → delta {written / 1e6:.1f} MB | ratio {raw / written:.1f}x "
+          f"({written / frames / 1e3:.1f} KB/frame, ~{written / frames * fps * 3600 / 1e9:.2f} GB/hora a {fps:.0f} fps)")
+    print(f"  encode {t_enc / frames * 1000:.2f} ms/frame | decode {n / t_dec:.0f} frames/s "
+          f"({n / t_dec / fps:.0f}x tiempo real a {fps:.0f} fps)")
+
+
+def open_recorder(path, rois=None):
+    """
+    .smarc → FrameArchiveWriter (con rois solo guarda esos rectángulos);
+    otra extensión → SessionRecorder en modo delta.
+    """
+    if path.endswith(".smarc"):
+        from frame_archive import FrameArchiveWriter
+        return FrameArchiveWriter(path, rois=rois)
+    return SessionRecorder(path, delta=True)
+
+
+def open_replay(path, speed=1.0):
+    """
+    Itera (ts, frame) de un .smrec o .smarc. frame es un Frame del client completo,
+    o {name: Frame} si el .smarc se grabó solo con ROIs.
+    """
+    if path.endswith(".smarc"):
+        from frame_archive import FrameArchive
+        return FrameArchive(path).replay(speed)
+    return ReplaySource(path, speed=speed)
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        args = [a for a in sys.argv[1:] if a != "--bench"]
+        bench_delta(args[0] if args else None)
+    else:
+        print("Uso: python recorder.py --bench [sesion.smrec]")
@@ -0,0 +1,114 @@
+# template_search.py - Búsqueda de un template en el client completo: primero reducida, después fina
+#
+# Los locators (sereno_locator, boss_locator, locate_bars del healer) buscaban con
+# TM_CCOEFF_NORMED sobre los ~1920x1009 pixels del client a resolución completa.
+# locate() busca primero en una copia reducida (el template queda de ~COARSE_TEMPLATE_PX de lado),
+# toma los mejores picos separados y los refina a resolución completa en ventanas chicas.
+# El score devuelto siempre es el TM_CCOEFF_NORMED real en esa posición; si el mejor refinado no
+# llega al umbral se hace la búsqueda completa de siempre (mismo resultado que matchTemplate).
+#
+#   python ../common/template_search.py   → benchmark y comparación de coordenadas con frames sintéticos
+#                                           (desde la carpeta de un paquete: usa sus PNG)
+import os
+import time
+
+import cv2
+import numpy as np
+
+COARSE_TEMPLATE_PX = 6      # lado mínimo del template en la imagen reducida
+COARSE_CANDIDATES = 5       # picos de la búsqueda reducida que se refinan
+REFINE_MARGIN = 3           # pixels extra (a resolución completa) alrededor de cada pico
+
+LOCATE_STATS = {"pyramid": 0, "fallback": 0}
+
+
+def _full_search(image, templ):
+    res = cv2.matchTemplate(image, templ, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(res)
+    return float(max_val), max_loc
+
+
+def locate(image, templ, threshold, candidates=COARSE_CANDIDATES):
+    """
+    (score, (x, y)) del match de templ en image (ambos BGR), como matchTemplate + minMaxLoc.
+    Si ningún candidato de la búsqueda reducida llega a threshold, devuelve la búsqueda completa.
+    """
+    ih, iw = image.shape[:2]
+    th, tw = templ.shape[:2]
+    scale = COARSE_TEMPLATE_PX / min(th, tw)
+    if scale > 0.75 or th > ih or tw > iw:
+        # template chico o imagen chica: reducir no ahorra nada
+        LOCATE_STATS["fallback"] += 1
+        return _full_search(image, templ)
+
+    small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    small_t = cv2.resize(templ, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    res = cv2.matchTemplate(small, small_t, cv2.TM_CCOEFF_NORMED)
+    sth, stw = small_t.shape[:2]
+
+    m = int(np.ceil(1 / scale)) + REFINE_MARGIN
+    best_val, best_loc = -1.0, None
+    for _ in range(candidates):
+        _, val, _, (sx, sy) = cv2.minMaxLoc(res)
+        if val <= -1.0:
+            break
+        # suprimir el pico y sus vecinos (mismo objeto)
+        res[max(0, sy - sth // 2):sy + sth // 2 + 1, max(0, sx - stw // 2):sx + stw // 2 + 1] = -1.0
+        x0 = max(0, int(sx / scale) - m)
+        y0 = max(0, int(sy / scale) - m)
+        x1 = min(iw, int(sx / scale) + m + tw)
+        y1 = min(ih, int(sy / scale) + m + th)
+        if x1 - x0 < tw or y1 - y0 < th:
+            continue
+        val, (lx, ly) = _full_search(image[y0:y1, x0:x1], templ)
+        if val > best_val:
+            best_val, best_loc = val, (x0 + lx, y0 + ly)
+
+    if best_loc is not None and best_val >= threshold:
+        LOCATE_STATS["pyramid"] += 1
+        return best_val, best_loc
+    LOCATE_STATS["fallback"] += 1
+    return _full_search(image, templ)
+
+
+# ========================
+# BENCHMARK
+# ========================
+def _template_paths():
+    from templates import SEARCH_DIRS
+    names = ["sereno.png", "exorigranpug.png", "heart.png", "mana.png"]
+    paths = (os.path.join(d, n) for n in names for d in SEARCH_DIRS)
+    return list(dict.fromkeys(p for p in paths if os.path.exists(p)))
+
+
+def bench_locate(trials=10, w=1920, h=1009, threshold=0.88, seed=0):
+    from recorder import synthetic_hunt
+
+    rng = np.random.default_rng(seed)
+    frames = [f.copy() for _, f in synthetic_hunt(frames=trials * 7, w=w, h=h)][::7]
+    print(f"locate(): {trials} frames {w}x{h} por template, umbral {threshold}")
+    for path in _template_paths():
+        templ = cv2.imread(path, cv2.IMREAD_COLOR)
+        th, tw = templ.shape[:2]
+        same = 0
+        t_full = t_pyr = 0.0
+        LOCATE_STATS["pyramid"] = LOCATE_STATS["fallback"] = 0
+        for frame in frames:
+            img = frame.copy()
+            x, y = int(rng.integers(0, w - tw)), int(rng.integers(0, h - th))
+            img[y:y + th, x:x + tw] = templ
+            t0 = time.perf_counter()
+            ref = _full_search(img, templ)
+            t_full += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            got = locate(img, templ, threshold)
+            t_pyr += time.perf_counter() - t0
+            same += got[1] == ref[1] and got[1] == (x, y)
+        n = len(frames)
+        print(f"  {os.path.basename(path):18s} {tw}x{th}: completo {t_full / n * 1000:6.1f} ms | "
+              f"locate {t_pyr / n * 1000:5.1f} ms ({t_full / t_pyr:4.1f}x) | mismas coords {same}/{n} | "
+              f"fallbacks {LOCATE_STATS['fallback']}")
+
+
+if __name__ == "__main__":
+    bench_locate()
@@ -0,0 +1,117 @@
+# templates.py - Registro de templates del proceso: cada PNG se lee una vez, con sus estadísticas listas
+#
+# TEMPLATES.get("heart.png") busca por nombre en la carpeta del script que arrancó el proceso (supermonkatk/ o
+# supermonkhealing/), en el directorio actual y en sus img/ (o acepta una ruta).
+# Cada Template guarda la imagen BGR (uint8, como la usa cv2.matchTemplate), la versión float32
+# con media cero por canal y su norma (las usa IconProbe en supermonkatk/icon_probe.py para el NCC sin
+# matchTemplate).
+# check_mtime=True vuelve a leer el archivo si cambió en disco (para recalibrar sin reiniciar).
+#
+#   python ../common/templates.py   → benchmark: imread por llamada vs registro
+#                                     (desde la carpeta de un paquete: usa sus PNG)
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# este módulo vive en common/: los PNG están en la carpeta de cada paquete, no acá
+ROOT = os.path.dirname(os.path.abspath(sys.argv[0])) if sys.argv and sys.argv[0] else os.getcwd()
+SEARCH_DIRS = tuple(dict.fromkeys(os.path.join(base, sub) for base in (ROOT, os.getcwd()) for sub in ("", "img")))
+
+
+class Template:
+    __slots__ = ("name", "path", "mtime", "bgr", "h", "w", "zero_mean", "norm")
+
+    def __init__(self, name, path, mtime, bgr):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.bgr = bgr
+        self.h, self.w = bgr.shape[:2]
+        zm = bgr.astype(np.float32)
+        zm -= zm.reshape(-1, zm.shape[2]).mean(axis=0)
+        self.zero_mean = zm
+        self.norm = float(np.sqrt((zm.astype(np.float64) ** 2).sum()))
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+
+class TemplateRegistry:
+    def __init__(self, search_dirs=SEARCH_DIRS, check_mtime=False):
+        self.search_dirs = search_dirs
+        self.check_mtime = check_mtime
+        self._cache = {}
+        self.loads = 0
+
+    def _resolve(self, name):
+        if os.path.isabs(name):
+            return name if os.path.exists(name) else None
+        for d in self.search_dirs:
+            p = os.path.join(d, name)
+            if os.path.exists(p):
+                return p
+        return None
+
+    def get(self, name):
+        """Template por nombre de archivo (o ruta); None si no existe o no se puede leer."""
+        tmpl = self._cache.get(name)
+        if tmpl is not None:
+            if not self.check_mtime:
+                return tmpl
+            try:
+                if os.stat(tmpl.path).st_mtime_ns == tmpl.mtime:
+                    return tmpl
+            except OSError:
+                pass
+        path = self._resolve(name)
+        if path is None:
+            self._cache.pop(name, None)
+            return None
+        bgr = cv2.imread(path, cv2.IMREAD_COLOR)
+        if bgr is None:
+            self._cache.pop(name, None)
+            return None
+        self.loads += 1
+        tmpl = self._cache[name] = Template(name, path, os.stat(path).st_mtime_ns, bgr)
+        return tmpl
+
+    def bgr(self, name):
+        tmpl = self.get(name)
+        return None if tmpl is None else tmpl.bgr
+
+    def invalidate(self, name=None):
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
+
+
+TEMPLATES = TemplateRegistry()
+
+
+# ========================
+# BENCHMARK
+# ========================
+def bench_templates(n=2000):
+    names = [n_ for n_ in ("exorigranpug.png", "sereno.png", "heart.png", "mana.png") if TEMPLATES.get(n_) is not None]
+    print(f"Templates: {names} ({TEMPLATES.loads} lecturas de disco)")
+    for name in names:
+        tmpl = TEMPLATES.get(name)
+        t0 = time.perf_counter()
+        for _ in range(n // 10):
+            cv2.imread(tmpl.path, cv2.IMREAD_COLOR)
+        t_imread = (time.perf_counter() - t0) / (n // 10)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            TEMPLATES.get(name)
+        t_get = (time.perf_counter() - t0) / n
+        print(f"  {name:17s} {tmpl.w}x{tmpl.h}: imread {t_imread * 1e6:6.0f} µs | get {t_get * 1e6:4.2f} µs "
+              f"({t_imread / t_get:.0f}x)")
+
+
+if __name__ == "__main__":
+    bench_templates()
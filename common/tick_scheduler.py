@@ -0,0 +1,185 @@
+# tick_scheduler.py - Ticks a ritmo fijo contra deadlines absolutos (sin deriva), con estadísticas de atraso
+#
+# Los loops hacían trabajo de duración variable (captura, detección) y después time.sleep(periodo): el
+# período real es trabajo + sleep, así que el ritmo depende de cuánto tardó la captura y se va corriendo.
+# TickScheduler mantiene una grilla de deadlines t0, t0 + p, t0 + 2p, ... y duerme hasta el próximo:
+#   - sin deriva: el trabajo de un tick no corre los siguientes
+#   - si se atrasa más de un período (trabajo largo, pausa del SO) salta los ticks perdidos en vez de
+#     correrlos pegados; quedan contados en `skipped`
+#   - spin > 0: duerme hasta spin segundos antes y el resto lo espera girando sobre el reloj (precisión
+#     sub-ms a cambio de CPU). Por defecto spin=0, solo sleep: el atraso típico ya es ~0.1-0.2 ms y a 10 Hz
+#     sobra. El giro compite por la CPU con la captura, la detección y OBS; con un solo núcleo, si el SO
+#     desaloja al hilo mientras gira despierta tarde (hubo corridas de 1 CPU con error p50 2.7 ms y 4 ms
+#     de deriva, contra 0.017 ms solo sleep). Por eso con os.cpu_count() <= 1 el spin se ignora.
+#   - lateness (despertar - deadline) y work (tiempo entre despertar y el próximo wait) por tick;
+#     `overruns`: ticks cuyo trabajo duró más de un período
+#
+#   python tick_scheduler.py   → jitter a 10 Hz y 60 Hz: sleep(periodo) después del trabajo vs scheduler
+import os
+import time
+from collections import deque
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+class TickScheduler:
+    """
+    sched = TickScheduler(0.1)                      (o TickScheduler.rate(10))
+    while True:
+        sched.wait()                                → vuelve en el próximo deadline de la grilla
+        ...trabajo...
+    sched.wait(max_sleep) despierta antes si max_sleep vence primero (devuelve False: no es un tick y la
+    grilla no se mueve). Después de una pausa fuera del scheduler, reset() arranca la grilla de nuevo.
+    clock / sleep inyectables (con un reloj virtual usar spin=0: el spin gira sobre clock()). El loop que
+    además lleva cooldowns debería pasarles el mismo clock (ver supermonkhealing/main.py).
+    """
+
+    def __init__(self, period, spin=0.0, clock=time.perf_counter, sleep=time.sleep, history=4096):
+        self.period = float(period)
+        # con un solo núcleo girar le quita la CPU al trabajo del tick y puede despertar más tarde
+        self.spin = float(spin) if (os.cpu_count() or 1) > 1 else 0.0
+        self.clock = clock
+        self._sleep = sleep
+        self.deadline = None        # próximo deadline de la grilla
+        self.index = 0              # número del último tick en la grilla (cuenta los saltados)
+        self.ticks = 0
+        self.skipped = 0
+        self.overruns = 0
+        self.lateness = deque(maxlen=history)
+        self.work = deque(maxlen=history)
+        self._woke = None
+
+    @classmethod
+    def rate(cls, hz, **kwargs):
+        return cls(1.0 / hz, **kwargs)
+
+    def reset(self):
+        """La grilla arranca de nuevo en el próximo wait() (sin contar la pausa como atraso ni trabajo)."""
+        self.deadline = None
+        self._woke = None
+
+    def _sleep_until(self, t):
+        clock = self.clock
+        remaining = t - clock()
+        if remaining > self.spin:
+            self._sleep(remaining - self.spin)
+        if self.spin > 0:
+            while clock() < t:
+                pass
+
+    def wait(self, max_sleep=None):
+        """
+        Duerme hasta el próximo deadline (o max_sleep segundos si vence antes). True si es un tick de la
+        grilla, False si despertó antes por max_sleep.
+        """
+        now = self.clock()
+        if self._woke is not None:
+            work = now - self._woke
+            self.work.append(work)
+            if work > self.period:
+                self.overruns += 1
+        if self.deadline is None:
+            self.deadline = now
+
+        if max_sleep is not None and now + max_sleep < self.deadline:
+            self._sleep_until(now + max(0.0, max_sleep))
+            self._woke = self.clock()
+            return False
+
+        self._sleep_until(self.deadline)
+        woke = self.clock()
+        self._woke = woke
+        late = woke - self.deadline
+        self.lateness.append(late)
+        missed = int(late // self.period) if late >= self.period else 0
+        self.skipped += missed
+        self.index += missed + 1
+        self.ticks += 1
+        self.deadline += (missed + 1) * self.period
+        return True
+
+    def run(self, callback, ticks=None):
+        """callback(index) en cada tick hasta ticks ticks o hasta que devuelva False."""
+        self.reset()
+        n = 0
+        while ticks is None or n < ticks:
+            self.wait()
+            n += 1
+            if callback(self.index) is False:
+                break
+
+    def stats(self):
+        """Atraso (p50/p95/p99/máx, s), trabajo medio (s), ticks, saltados y overruns."""
+        late = sorted(self.lateness)
+        return {
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "overruns": self.overruns,
+            "late_p50": _percentile(late, 50),
+            "late_p95": _percentile(late, 95),
+            "late_p99": _percentile(late, 99),
+            "late_max": late[-1] if late else 0.0,
+            "work_mean": sum(self.work) / len(self.work) if self.work else 0.0,
+        }
+
+
+# ========================
+# BENCHMARK
+# ========================
+def _jitter_case(period, ticks, mode, spin, seed):
+    """Despertares [(t, índice en la grilla)] de un loop con trabajo variable."""
+    import random
+
+    rng = random.Random(seed)
+    wakes = []
+
+    def step(index):
+        wakes.append((time.perf_counter(), index))
+        # captura + detección: entre 10% y 40% del período, y un 2% de ticks de 2.5 períodos
+        time.sleep(period * (2.5 if rng.random() < 0.02 else rng.uniform(0.1, 0.4)))
+
+    sched = TickScheduler(period, spin=spin)
+    if mode == "sleep":
+        for i in range(ticks):
+            step(i)
+            time.sleep(period)
+    else:
+        sched.run(step, ticks)
+    return wakes, sched
+
+
+def bench_tick_scheduler(seconds=3.0, seed=0):
+    import platform
+
+    cpus = os.cpu_count() or 1
+    print(f"TickScheduler: {seconds:.0f} s por caso, trabajo 10–40% del período + 2% de ticks de 2.5 períodos, "
+          f"{platform.system()}, {cpus} CPU" + (" (spin ignorado: igual a solo sleep)" if cpus <= 1 else ""))
+    for hz in (10, 60):
+        period = 1.0 / hz
+        ticks = int(seconds * hz)
+        print(f"  {hz} Hz (período {period * 1000:.1f} ms):")
+        for label, mode, spin in (("sleep(periodo) tras el trabajo", "sleep", 0.0),
+                                  ("TickScheduler, solo sleep", "sched", 0.0),
+                                  ("TickScheduler, spin 2 ms", "sched", 0.002)):
+            wakes, sched = _jitter_case(period, ticks, mode, spin, seed)
+            (t0, i0), (t1, i1) = wakes[0], wakes[-1]
+            # intervalo entre ticks consecutivos de la grilla (los saltados no cuentan)
+            err = sorted(abs(tb - ta - period) * 1000 for (ta, ia), (tb, ib) in zip(wakes, wakes[1:]) if ib == ia + 1)
+            drift = (t1 - t0 - (i1 - i0) * period) * 1000
+            line = (f"    {label:31s}: {(len(wakes) - 1) / (t1 - t0):5.2f} ticks/s | error del intervalo "
+                    f"p50 {_percentile(err, 50):6.3f} ms p99 {_percentile(err, 99):6.3f} ms | "
+                    f"deriva {drift:7.1f} ms")
+            if mode == "sched":
+                s = sched.stats()
+                line += (f" | atraso p50 {s['late_p50'] * 1000:.3f} / p99 {s['late_p99'] * 1000:.3f} / "
+                         f"máx {s['late_max'] * 1000:.2f} ms, saltados {s['skipped']}, overruns {s['overruns']}")
+            print(line)
+
+
+if __name__ == "__main__":
+    bench_tick_scheduler()
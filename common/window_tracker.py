@@ -0,0 +1,210 @@
+# window_tracker.py - hwnd del proyector OBS + geometría de ventana/client en caché
+#
+# El tracker resuelve el hwnd una vez (EnumWindows) y luego solo lo revalida con IsWindow +
+# título. La geometría se guarda y solo se recalcula cuando GetWindowRect cambia (move/resize).
+# Las llamadas al SO pasan por `api` (el módulo win32gui en producción, FakeWindowApi en tests).
+import ctypes
+import time
+from collections import Counter, namedtuple
+
+try:
+    import win32gui
+except ImportError:  # Linux / benchmarks: solo FakeWindowApi
+    win32gui = None
+
+WindowGeometry = namedtuple(
+    "WindowGeometry",
+    "left top right bottom client_x client_y client_w client_h",
+)
+
+
+def set_dpi_awareness():
+    """Coordenadas en pixels reales en pantallas escaladas (igual en todos los procesos que capturan)."""
+    try:
+        ctypes.windll.shcore.SetProcessDpiAwareness(2)
+    except Exception:
+        try:
+            ctypes.windll.user32.SetProcessDPIAware()
+        except Exception:
+            pass
+
+
+class WindowTracker:
+    def __init__(self, title_prefix, api=None, substring=False):
+        self.title_prefix = title_prefix
+        self.substring = substring
+        self.api = api if api is not None else win32gui
+        self._hwnd = None
+        self._rect = None
+        self._geometry = None
+        self.lookups = 0        # EnumWindows completos
+        self.hits = 0           # geometría servida desde caché
+        self.misses = 0         # geometría recalculada (primera vez, move o resize)
+
+    def _matches(self, title):
+        if self.substring:
+            return self.title_prefix.lower() in (title or "").lower()
+        return (title or "").startswith(self.title_prefix)
+
+    def _find(self):
+        self.lookups += 1
+        found = []
+        def enum_cb(hwnd, _):
+            if self.api.IsWindowVisible(hwnd) and self._matches(self.api.GetWindowText(hwnd)):
+                found.append(hwnd)
+        self.api.EnumWindows(enum_cb, None)
+        return found[0] if found else None
+
+    def hwnd(self):
+        """hwnd válido del proyector (o None). Solo enumera si el cacheado dejó de ser válido."""
+        h = self._hwnd
+        if h is not None and self.api.IsWindow(h) and self._matches(self.api.GetWindowText(h)):
+            return h
+        self._hwnd = self._find()
+        self._rect = None
+        self._geometry = None
+        return self._hwnd
+
+    def geometry(self, refresh=True):
+        """
+        WindowGeometry actual. Un GetWindowRect por llamada; el resto solo si se movió o cambió de tamaño.
+        refresh=False devuelve la última geometría sin tocar el SO (para el resto del mismo frame).
+        """
+        if not refresh and self._geometry is not None:
+            return self._geometry
+        h = self._hwnd if self._hwnd is not None else self.hwnd()
+        if h is None:
+            return None
+        try:
+            rect = self.api.GetWindowRect(h)
+        except Exception:
+            self._hwnd = None
+            return None
+        if rect == self._rect and self._geometry is not None:
+            self.hits += 1
+            return self._geometry
+        self.misses += 1
+        _, _, cw, ch = self.api.GetClientRect(h)
+        cx, cy = self.api.ClientToScreen(h, (0, 0))
+        left, top, right, bottom = rect
+        self._rect = rect
+        self._geometry = WindowGeometry(left, top, right, bottom, cx, cy, max(1, cw), max(1, ch))
+        return self._geometry
+
+    def invalidate(self):
+        self._rect = None
+        self._geometry = None
+
+
+# ========================
+# FAKE (tests / benchmarks en Linux)
+# ========================
+class FakeWindowApi:
+    """Imita las funciones de win32gui que usa el tracker y cuenta cada llamada."""
+
+    def __init__(self):
+        self.windows = {}   # hwnd -> dict(title, rect, client_origin, client_size, visible)
+        self.calls = Counter()
+
+    def add_window(self, hwnd, title, rect=(0, 0, 100, 100), client_origin=None, client_size=None, visible=True):
+        left, top, right, bottom = rect
+        self.windows[hwnd] = {
+            "title": title,
+            "rect": tuple(rect),
+            "client_origin": client_origin or (left, top),
+            "client_size": client_size or (right - left, bottom - top),
+            "visible": visible,
+        }
+
+    def move(self, hwnd, dx, dy):
+        w = self.windows[hwnd]
+        l, t, r, b = w["rect"]
+        w["rect"] = (l + dx, t + dy, r + dx, b + dy)
+        cx, cy = w["client_origin"]
+        w["client_origin"] = (cx + dx, cy + dy)
+
+    def close(self, hwnd):
+        self.windows.pop(hwnd, None)
+
+    def EnumWindows(self, cb, extra):
+        self.calls["EnumWindows"] += 1
+        for hwnd in list(self.windows):
+            cb(hwnd, extra)
+
+    def IsWindow(self, hwnd):
+        self.calls["IsWindow"] += 1
+        return hwnd in self.windows
+
+    def IsWindowVisible(self, hwnd):
+        self.calls["IsWindowVisible"] += 1
+        return self.windows[hwnd]["visible"]
+
+    def GetWindowText(self, hwnd):
+        self.calls["GetWindowText"] += 1
+        return self.windows[hwnd]["title"]
+
+    def GetWindowRect(self, hwnd):
+        self.calls["GetWindowRect"] += 1
+        return self.windows[hwnd]["rect"]
+
+    def GetClientRect(self, hwnd):
+        self.calls["GetClientRect"] += 1
+        w, h = self.windows[hwnd]["client_size"]
+        return 0, 0, w, h
+
+    def ClientToScreen(self, hwnd, pt):
+        self.calls["ClientToScreen"] += 1
+        cx, cy = self.windows[hwnd]["client_origin"]
+        return cx + pt[0], cy + pt[1]
+
+
+def bench_window_tracker(ticks=1000, other_windows=150, move_every=250):
+    prefix = "Windowed Projector (Source)"
+
+    def make_api():
+        api = FakeWindowApi()
+        for i in range(other_windows):
+            api.add_window(1000 + i, f"Ventana {i}")
+        api.add_window(42, prefix + " - Tibia", rect=(-8, -8, 1928, 1040),
+                       client_origin=(0, 23), client_size=(1920, 1009))
+        return api
+
+    # Antes: find_obs_window() + crop_client_area() del healer en cada tick
+    api = make_api()
+    t0 = time.perf_counter()
+    for i in range(ticks):
+        if i and i % move_every == 0:
+            api.move(42, 5, 0)
+        found = None
+        def enum_cb(hwnd, _):
+            nonlocal found
+            if api.IsWindowVisible(hwnd) and api.GetWindowText(hwnd).startswith(prefix):
+                found = hwnd
+        api.EnumWindows(enum_cb, None)
+        api.GetWindowRect(found)
+        api.ClientToScreen(found, (0, 0))
+        api.GetClientRect(found)
+        api.GetClientRect(found)
+    t_old = (time.perf_counter() - t0) / ticks
+    old_calls = sum(api.calls.values()) / ticks
+
+    api = make_api()
+    tracker = WindowTracker(prefix, api=api)
+    t0 = time.perf_counter()
+    for i in range(ticks):
+        if i and i % move_every == 0:
+            api.move(42, 5, 0)
+        tracker.hwnd()
+        tracker.geometry()
+    t_new = (time.perf_counter() - t0) / ticks
+    new_calls = sum(api.calls.values()) / ticks
+
+    print(f"WindowTracker: {ticks} ticks, {other_windows + 1} ventanas, move cada {move_every} ticks")
+    print(f"  antes:   {old_calls:.1f} llamadas/tick | {t_old * 1e6:.1f} µs/tick")
+    print(f"  tracker: {new_calls:.1f} llamadas/tick | {t_new * 1e6:.1f} µs/tick")
+    print(f"  EnumWindows: {tracker.lookups} | geometría hits {tracker.hits} / misses {tracker.misses}")
+    print(f"  llamadas: {dict(api.calls)}")
+
+
+if __name__ == "__main__":
+    bench_window_tracker()
@@ -6,6 +6,15 @@ from pathlib import Path
 
 ROOT_DIR = Path(__file__).parent.resolve()
 
+def run_frame_bus():
+    common_dir = ROOT_DIR / "common"
+    if not (common_dir / "frame_bus.py").exists():
+        print("⚠️ No se encontró common/frame_bus.py, cada módulo capturará por su cuenta")
+        return
+
+    print("✅ Iniciando FRAME BUS (captura compartida del proyector)...")
+    subprocess.Popen(["python", "frame_bus.py"], cwd=str(common_dir))
+
 def run_attack():
     attack_dir = ROOT_DIR / "supermonkatk"
     if not attack_dir.exists():
@@ -35,10 +44,14 @@ def run_battle():
 
 def main():
     print("🚀 SUPERMONK GOD MODE - Lanzando todo el arsenal")
+    print("   → frame_bus (Captura compartida)")
     print("   → supermonkatk (Ataque inteligente)")
     print("   → supermonkhealing (Curación automática)")
     print("   → battle.py (Spam '3' toggle con '4')\n")
 
+    # Primero el productor de frames, así ataque y curación leen la misma captura
+    run_frame_bus()
+
     # Lanzar los tres módulos
     thread_attack = threading.Thread(target=run_attack)
     thread_healing = threading.Thread(target=run_healing)
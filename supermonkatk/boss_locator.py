@@ -9,6 +9,10 @@ import win32ui
 import win32con
 from PIL import Image
 
+import common_path  # noqa: F401  (../common en sys.path)
+from template_search import locate
+from templates import TEMPLATES
+
 # ========================
 # CONFIGURACIÓN
 # ========================
@@ -117,13 +121,12 @@ def main():
     win_img = capture_window_image(hwnd)
     client_bgr = crop_client_from_window_capture(hwnd, win_img)
 
-    template = cv2.imread(TEMPLATE_PATH, cv2.IMREAD_COLOR)
+    template = TEMPLATES.bgr(TEMPLATE_PATH)
     if template is None:
         print("❌ Error al leer la plantilla.")
         return
 
-    res = cv2.matchTemplate(client_bgr, template, cv2.TM_CCOEFF_NORMED)
-    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+    max_val, max_loc = locate(client_bgr, template, THRESHOLD)
 
     if max_val < THRESHOLD:
         print(f"❌ No se detectó el boss.")
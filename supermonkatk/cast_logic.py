@@ -0,0 +1,365 @@
+# cast_logic.py - Detección (harmony/boss) y decisión de casteo, sin win32
+#
+# caster_engine.py captura y presiona teclas; aquí solo se analiza un frame y se elige la tecla.
+# El mismo código corre con una grabación:
+#   python cast_logic.py sesion.smrec [--max] [--hunt | --boss]
+# (también .smarc de frame_archive.py, completo o solo ROIs)
+#   python cast_logic.py --bench-dirty [sesion.smrec]   → CPU por tick con y sin DirtyGate
+import os
+import sys
+import time
+import json
+from collections import namedtuple
+
+import numpy as np
+
+import common_path  # noqa: F401  (../common en sys.path)
+from anchor_tracker import AnchorTracker
+from capture import RoiRegistry
+from detector_pipeline import DetectorPipeline
+from multi_match import MultiTemplateMatcher
+from icon_probe import IconProbe
+from templates import TEMPLATES
+from config import (
+    IMGS_DIR, COORDS_PATH,
+    ROI_LEFT_OFFSET, ROI_TOP_OFFSET, ROI_WIDTH, ROI_HEIGHT,
+    BOSS_JITTER, THRESHOLD, HOTKEY_LOW, HOTKEY_HIGH, HOTKEY_BOSS_PRI, HOTKEY_BOSS_HIGH, DETECTOR_WORKERS,
+)
+
+
+def clamp_roi(x1, y1, x2, y2, max_w, max_h):
+    x1 = max(0, min(x1, max_w))
+    y1 = max(0, min(y1, max_h))
+    x2 = max(0, min(x2, max_w))
+    y2 = max(0, min(y2, max_h))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+# ========================
+# TEMPLATES Y COORDS
+# ========================
+def load_templates():
+    templates = []
+    for i in range(6):
+        img = TEMPLATES.bgr(os.path.join(IMGS_DIR, f"harmony{i}.png"))
+        if img is not None:
+            templates.append((i, img))
+    return templates
+
+def load_boss_template():
+    """Template (templates.py) de exorigranpug.png, con su media y norma ya calculadas; None si no existe."""
+    tmpl = TEMPLATES.get(os.path.join(IMGS_DIR, "exorigranpug.png"))
+    if tmpl is None:
+        print("❌ No se encontró exorigranpug.png")
+    return tmpl
+
+def load_boss_probe():
+    """IconProbe del boss (ROI fijo de coords_boss.json ± BOSS_JITTER); None si no hay template."""
+    tmpl = load_boss_template()
+    if tmpl is None:
+        return None
+    return IconProbe(tmpl, jitter=BOSS_JITTER, threshold=THRESHOLD)
+
+def load_boss_coords():
+    json_path = os.path.join(IMGS_DIR, "coords_boss.json")
+    if not os.path.exists(json_path):
+        print("❌ No se encontró coords_boss.json → Ejecuta boss_locator.py")
+        return None
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        roi = data["roi"]
+        return roi["x1"], roi["y1"], roi["x2"], roi["y2"]
+    except Exception as e:
+        print(f"❌ Error leyendo coords_boss.json: {e}")
+        return None
+
+def load_sereno_anchor():
+    """top_left_rel de sereno.png (coords del client) o None."""
+    if not os.path.exists(COORDS_PATH):
+        print("❌ coords_sereno.json no existe.")
+        return None
+    with open(COORDS_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    ser = data["sereno"]
+    return int(ser["top_left_rel"]["x"]), int(ser["top_left_rel"]["y"])
+
+def build_rois(sereno_xy, boss_coords, client_w, client_h, boss_probe=None):
+    """
+    ROIs que leen los detectores, en coords del client (ambos JSON guardan coords del client).
+    El del boss solo si hay boss_probe, con el margen de su jitter (IconProbe.expand).
+    """
+    sx, sy = sereno_xy
+    rois = RoiRegistry()
+    roi_harmony = clamp_roi(
+        sx - ROI_LEFT_OFFSET,
+        sy - ROI_TOP_OFFSET,
+        sx - ROI_LEFT_OFFSET + ROI_WIDTH,
+        sy - ROI_TOP_OFFSET + ROI_HEIGHT,
+        client_w, client_h,
+    )
+    if roi_harmony:
+        x1_h, y1_h, x2_h, y2_h = roi_harmony
+        rois.register("harmony", x1_h, y1_h, x2_h - x1_h, y2_h - y1_h)
+
+    if boss_probe is not None and boss_coords is not None:
+        bx1, by1, bx2, by2 = boss_coords
+        x, y, w, h = boss_probe.expand(bx1, by1, bx2 - bx1, by2 - by1)
+        roi_boss = clamp_roi(x, y, x + w, y + h, client_w, client_h)
+        if roi_boss:
+            x1_b, y1_b, x2_b, y2_b = roi_boss
+            rois.register("boss", x1_b, y1_b, x2_b - x1_b, y2_b - y1_b)
+    return rois
+
+def load_anchors(sereno_xy):
+    """AnchorTracker con sereno.png en su posición de coords_sereno.json (vacío si falta el PNG)."""
+    anchors = AnchorTracker(threshold=THRESHOLD)
+    tmpl = TEMPLATES.get(os.path.join(IMGS_DIR, "sereno.png"))
+    if tmpl is not None:
+        anchors.add("sereno", tmpl, *sereno_xy)
+    return anchors
+
+def anchored_rois(anchors, sereno_xy, boss_coords, client_w, client_h, boss_probe=None):
+    """
+    build_rois con la posición actual de sereno (AnchorTracker) en vez de la del JSON.
+    El boss se corre lo mismo que sereno (todo el contenido del proyector se mueve junto).
+    """
+    if "sereno" in anchors.names():
+        sx, sy = anchors.position("sereno")
+        dx, dy = sx - sereno_xy[0], sy - sereno_xy[1]
+        if boss_coords is not None and (dx or dy):
+            x1, y1, x2, y2 = boss_coords
+            boss_coords = (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+        sereno_xy = (sx, sy)
+    rois = build_rois(sereno_xy, boss_coords, client_w, client_h, boss_probe)
+    anchors.register(rois)
+    return rois
+
+# ========================
+# DETECCIÓN
+# ========================
+# lo que ve la decisión en cada frame
+CastObservation = namedtuple("CastObservation", "harmony boss")
+
+def detect_harmony(roi_img_harmony, matcher):
+    """(nivel, score) del mejor template; nivel None si ninguno llega a THRESHOLD. matcher: MultiTemplateMatcher."""
+    level, score, _ = matcher.match(roi_img_harmony)
+    if score >= THRESHOLD:
+        return level, score
+    return None, score
+
+def detect_boss(roi_boss, boss_probe):
+    return boss_probe.present(roi_boss)
+
+def harmony_detector(matcher, gate=None, tracker=None):
+    """fn(views) → nivel de harmony o None (gate: DirtyGate; tracker: HarmonyTracker)."""
+    if tracker is not None:
+        find = tracker.detect
+    else:
+        find = lambda f: detect_harmony(f.bgr(), matcher)
+
+    def detect_level(views):
+        view = views.get("harmony")
+        if view is None:
+            return None
+        level, _ = find(view) if gate is None else gate.cached("harmony", view, find)
+        return level
+    return detect_level
+
+def boss_detector(boss_probe, gate=None):
+    """fn(views) → True si el icono del boss está en su ROI."""
+    find = lambda f: detect_boss(f.bgr(), boss_probe)
+
+    def detect_present(views):
+        view = views.get("boss")
+        if view is None:
+            return False
+        return find(view) if gate is None else gate.cached("boss", view, find)
+    return detect_present
+
+def detect(views, matcher, boss_probe, gate=None, tracker=None):
+    """
+    (nivel de harmony o None, boss_detected) de los ROIs de un frame, en serie.
+    Con gate (DirtyGate) los ROIs que no cambiaron reutilizan el resultado anterior.
+    Con tracker (HarmonyTracker) harmony se busca solo alrededor del último match.
+    """
+    return (harmony_detector(matcher, gate, tracker)(views),
+            boss_detector(boss_probe, gate)(views))
+
+def cast_pipeline(matcher, boss_probe, gate=None, tracker=None, workers=DETECTOR_WORKERS):
+    """
+    DetectorPipeline de harmony y boss → CastObservation(harmony, boss) por frame. En paralelo solo si
+    hay más de una CPU (o config.DETECTOR_WORKERS lo pide); si no, en serie en el thread del loop.
+    """
+    return DetectorPipeline({
+        "harmony": harmony_detector(matcher, gate, tracker),
+        "boss": boss_detector(boss_probe, gate),
+    }, CastObservation, workers)
+
+# ========================
+# DECISIÓN
+# ========================
+def choose_cast_key(active_hunt, active_boss, boss_detected, last_harmony):
+    """Tecla a castear este ciclo (o None)."""
+    if active_boss:
+        if boss_detected:
+            return HOTKEY_BOSS_PRI  # "1"
+        elif last_harmony is not None:
+            if last_harmony >= 5:
+                return HOTKEY_BOSS_HIGH  # "2"
+            else:
+                return HOTKEY_LOW  # "f9"
+        else:
+            return HOTKEY_LOW
+
+    elif active_hunt and last_harmony is not None:
+        if last_harmony >= 5:
+            return HOTKEY_HIGH
+        else:
+            return HOTKEY_LOW
+    return None
+
+# ========================
+# REPLAY
+# ========================
+def replay(path, speed=1.0, active_hunt=True, active_boss=False):
+    """Pasa una grabación .smrec/.smarc por la misma detección/decisión que run_cast_loop (sin teclas)."""
+    from recorder import open_replay
+    from config import CYCLE_SECONDS
+    from dirty import DirtyGate
+    from harmony_tracker import HarmonyTracker
+
+    sereno = load_sereno_anchor()
+    if sereno is None:
+        return
+    matcher = MultiTemplateMatcher(load_templates())
+    tracker = HarmonyTracker(matcher)
+    boss_probe = load_boss_probe()
+    boss_coords = load_boss_coords()
+    anchors = load_anchors(sereno)
+
+    rois = None
+    gate = DirtyGate()
+    pipeline = cast_pipeline(matcher, boss_probe, gate, tracker)
+    last_harmony = None
+    last_cycle = None
+    tick_times = []
+    casts = 0
+    for ts, frame in open_replay(path, speed=speed):
+        if rois is None and not isinstance(frame, dict):
+            rois = anchored_rois(anchors, sereno, boss_coords, frame.width, frame.height, boss_probe)
+        t0 = time.perf_counter()
+        views = frame if isinstance(frame, dict) else rois.views(frame)
+        level, boss_detected = pipeline.run(views)
+        if not isinstance(frame, dict) and anchors.update(views, lambda: frame):
+            rois = anchored_rois(anchors, sereno, boss_coords, frame.width, frame.height, boss_probe)
+            print(f"  t={ts:.3f}s 📍 sereno re-ubicado en {anchors.position('sereno')}")
+        if level is not None:
+            last_harmony = level
+        key = None
+        if last_cycle is None or ts - last_cycle >= CYCLE_SECONDS:
+            key = choose_cast_key(active_hunt, active_boss, boss_detected, last_harmony)
+            if key is not None:
+                last_cycle = ts
+        tick_times.append(time.perf_counter() - t0)
+        if key is not None:
+            casts += 1
+            print(f"  t={ts:.3f}s harmony={last_harmony} boss={boss_detected} → {key}")
+
+    pipeline.close()
+    if not tick_times:
+        print("❌ Grabación vacía")
+        return
+    ms = np.array(tick_times) * 1000
+    print(f"Replay: {len(ms)} frames | {casts} casts | detección p50 {np.percentile(ms, 50):.3f} ms "
+          f"p95 {np.percentile(ms, 95):.3f} ms max {ms.max():.3f} ms")
+    print(f"  ROIs sin cambios (detector salteado): harmony {gate.skip_rate('harmony'):.0%} | boss {gate.skip_rate('boss'):.0%}")
+    print(f"  harmony: {tracker.full_searches} búsquedas completas, {tracker.tracked} trackeadas")
+
+
+# ========================
+# BENCHMARK
+# ========================
+def synthetic_cast_frames(frames=300, w=1920, h=1009, fps=10.0, idle_every=40, idle_len=20):
+    """
+    Hunt sintética (recorder.synthetic_hunt) con el icono de harmony y el boss pegados en sus ROIs.
+    Cada idle_every frames hay idle_len frames quietos (personaje parado esperando respawn).
+    """
+    from recorder import synthetic_hunt
+
+    sx, sy = load_sereno_anchor()
+    harmony = dict(load_templates())
+    boss = load_boss_template().bgr
+    bx1, by1, _, _ = load_boss_coords()
+    hx, hy = sx - ROI_LEFT_OFFSET + 100, max(0, sy - ROI_TOP_OFFSET) + 60
+    hunt = synthetic_hunt(frames=frames, w=w, h=h, fps=fps)
+    frame = None
+    for i in range(frames):
+        if frame is None or i % idle_every >= idle_len:
+            _, frame = next(hunt)
+            frame = frame.copy()
+        else:
+            next(hunt)
+        icon = harmony[(i // 60) % len(harmony)]
+        frame[hy:hy + icon.shape[0], hx:hx + icon.shape[1]] = icon
+        if (i // 30) % 2 == 0:
+            frame[by1:by1 + boss.shape[0], bx1:bx1 + boss.shape[1]] = boss
+        else:
+            frame[by1:by1 + boss.shape[0], bx1:bx1 + boss.shape[1]] = 30
+        yield i / fps, frame
+
+
+def bench_dirty_gate(path=None):
+    """CPU de detección por tick con y sin DirtyGate, sobre una grabación o frames sintéticos."""
+    from recorder import open_replay
+    from dirty import DirtyGate
+
+    matcher = MultiTemplateMatcher(load_templates())
+    boss_probe = load_boss_probe()
+    boss_coords = load_boss_coords()
+    sereno = load_sereno_anchor()
+    if path:
+        frames = [(ts, {k: v.data.copy() for k, v in f.items()} if isinstance(f, dict) else f.data.copy())
+                  for ts, f in open_replay(path, speed=None)]
+    else:
+        frames = [(ts, f.copy()) for ts, f in synthetic_cast_frames()]
+    if not frames:
+        print("❌ Grabación vacía")
+        return
+
+    from capture import Frame
+    results = {}
+    for label, gate in (("sin gate", None), ("DirtyGate", DirtyGate())):
+        rois = None
+        out = []
+        t_cpu0 = time.process_time()
+        t0 = time.perf_counter()
+        for ts, data in frames:
+            frame = Frame(data)
+            if rois is None:
+                rois = build_rois(sereno, boss_coords, frame.width, frame.height, boss_probe)
+            out.append(detect(rois.views(frame), matcher, boss_probe, gate))
+        t_wall = (time.perf_counter() - t0) / len(frames)
+        t_cpu = (time.process_time() - t_cpu0) / len(frames)
+        results[label] = out
+        extra = ""
+        if gate is not None:
+            extra = f" | salteados harmony {gate.skip_rate('harmony'):.0%} boss {gate.skip_rate('boss'):.0%}"
+        print(f"  {label:9s}: {t_wall * 1000:.2f} ms/tick (CPU {t_cpu * 1000:.2f} ms){extra}")
+    same = results["sin gate"] == results["DirtyGate"]
+    print(f"  mismos resultados: {same} ({len(frames)} frames)")
+
+
+if __name__ == "__main__":
+    if "--bench-dirty" in sys.argv:
+        args = [a for a in sys.argv[1:] if not a.startswith("--")]
+        print(f"DirtyGate ({args[0] if args else 'hunt sintética'}):")
+        bench_dirty_gate(args[0] if args else None)
+        sys.exit(0)
+    if len(sys.argv) < 2:
+        print("Uso: python cast_logic.py sesion.smrec|sesion.smarc [--max] [--hunt | --boss]")
+        sys.exit(1)
+    boss_mode = "--boss" in sys.argv
+    replay(sys.argv[1], speed=None if "--max" in sys.argv else 1.0,
+           active_hunt=not boss_mode, active_boss=boss_mode)
@@ -15,12 +15,15 @@ TOGGLE_ACTIVE_HUNT_KEY = "\\"       # Modo hunt normal
 
 PRESS_TIMES = 1
 CYCLE_SECONDS = 0.5        # cada 500 ms (2 veces por segundo)
+TICK_SECONDS = 0.1         # captura + detección a ritmo fijo (tick_scheduler.py)
+DETECTOR_WORKERS = None    # threads de harmony/boss: None = auto (serie con 1 CPU), 0 = serie
 INTER_PRESS_DELAY = 0.0
 
 THRESHOLD = 0.90
 
 OBS_TITLE_SUBSTRING = "Windowed Projector (Source)"
 
+# ROI de harmony relativa a sereno.png, en coords del client (igual que coords_sereno.json)
 ROI_LEFT_OFFSET = 80
 ROI_TOP_OFFSET = 80
 ROI_WIDTH = 980
@@ -32,6 +35,7 @@ BOSS_ROI_Y1 = 699
 BOSS_ROI_X2 = 1497
 BOSS_ROI_Y2 = 737
 BOSS_IMG_NAME = "exorigranpug.png"
+BOSS_JITTER = 2                     # px de tolerancia alrededor de coords_boss.json (corrimiento del proyector)
 
 THRESHOLD = 0.88  # Más estable que 0.90
 
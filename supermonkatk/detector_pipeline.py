@@ -0,0 +1,145 @@
+# detector_pipeline.py - Detectores independientes de un mismo frame en paralelo, resultado en una sola tupla
+#
+# Cada detector es fn(views) → resultado (views = {name: Frame} del frame actual). DetectorPipeline
+# los corre en un ThreadPoolExecutor acotado (el último en el thread que llama, sin esperar a un worker)
+# y junta los resultados en un namedtuple con un campo por detector, que es lo que recibe la decisión.
+# matchTemplate / dft / numpy sueltan el GIL, así que la latencia por frame tiende a la del detector
+# más lento en lugar de la suma. Con un solo detector (o workers=0) corre en serie, sin threads.
+# Con una sola CPU no hay nada que solapar y los threads solo agregan el costo de submit/result (medido
+# 0.96-0.97x): workers=None (por defecto) corre en serie si os.cpu_count() <= 1. config.DETECTOR_WORKERS
+# lo fija a mano.
+#
+#   python detector_pipeline.py   → serie vs pipeline con matchTemplate sobre ROIs de frames sintéticos
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import common_path  # noqa: F401  (../common en sys.path)
+
+
+def default_workers(detectors):
+    """Workers para detectors detectores: 0 (serie) con una sola CPU; si no, uno por detector extra."""
+    cpus = os.cpu_count() or 1
+    if cpus <= 1:
+        return 0
+    return min(detectors - 1, cpus)
+
+
+class DetectorPipeline:
+    """
+    pipe = DetectorPipeline({"harmony": fn_h, "boss": fn_b}, CastObservation)
+    obs = pipe.run(views)   → CastObservation(harmony=..., boss=...)
+    Sin observation se arma un namedtuple "Observation" con los nombres de los detectores.
+    timings: último tiempo (s) de cada detector; last_latency: tiempo total del último run().
+    workers=None: un worker por detector extra, ninguno (serie) con una sola CPU.
+    """
+
+    def __init__(self, detectors, observation=None, workers=None):
+        self.detectors = dict(detectors)
+        self.observation = observation or namedtuple("Observation", list(self.detectors))
+        if workers is None:
+            workers = default_workers(len(self.detectors))
+        self.workers = max(0, workers)
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="detector") if self.workers else None
+        self.timings = dict.fromkeys(self.detectors, 0.0)
+        self.last_latency = 0.0
+
+    def _timed(self, name, fn, views):
+        t0 = time.perf_counter()
+        try:
+            return fn(views)
+        finally:
+            self.timings[name] = time.perf_counter() - t0
+
+    def run(self, views):
+        t0 = time.perf_counter()
+        items = list(self.detectors.items())
+        if self._pool is None or len(items) == 1:
+            results = {name: self._timed(name, fn, views) for name, fn in items}
+        else:
+            *rest, (last_name, last_fn) = items
+            futures = [(name, self._pool.submit(self._timed, name, fn, views)) for name, fn in rest]
+            results = {last_name: self._timed(last_name, last_fn, views)}
+            for name, fut in futures:
+                results[name] = fut.result()
+        self.last_latency = time.perf_counter() - t0
+        return self.observation(**results)
+
+    def serial(self, views):
+        """Mismos detectores, uno después del otro en el thread actual (referencia / benchmark)."""
+        t0 = time.perf_counter()
+        results = {name: self._timed(name, fn, views) for name, fn in self.detectors.items()}
+        self.last_latency = time.perf_counter() - t0
+        return self.observation(**results)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ========================
+# BENCHMARK
+# ========================
+def bench_detector_pipeline(frames=30, seed=0):
+    """
+    Cuatro detectores matchTemplate de distinto tamaño sobre ROIs de una hunt sintética
+    (mismos PNGs que usan los detectores reales). Serie vs DetectorPipeline, mismo frame.
+    """
+    import cv2
+    import numpy as np
+    from capture import Frame, RoiRegistry
+    from recorder import synthetic_hunt
+    from templates import TEMPLATES
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    names = [n for n in ("img/sereno.png", "img/exorigranpug.png", "heart.png", "mana.png", "sereno.png")
+             if os.path.exists(os.path.join(root, n))]
+    rois = RoiRegistry()
+    sizes = [(980, 251), (640, 200), (400, 160), (240, 120)]
+    detectors = {}
+    rng = np.random.default_rng(seed)
+    for i, (w, h) in enumerate(sizes):
+        tmpl = TEMPLATES.get(os.path.join(root, names[i % len(names)]))
+        name = f"det{i}"
+        rois.register(name, int(rng.integers(0, 1920 - w)), int(rng.integers(0, 1009 - h)), w, h)
+
+        def detect(views, name=name, tmpl=tmpl):
+            res = cv2.matchTemplate(views[name].bgr(), tmpl.bgr, cv2.TM_CCOEFF_NORMED)
+            return round(float(cv2.minMaxLoc(res)[1]), 6)
+        detectors[name] = detect
+
+    data = [f.copy() for _, f in synthetic_hunt(frames=frames)]
+    # workers fijos: se mide el pipeline con threads aunque el default acá sea serie
+    with DetectorPipeline(detectors, workers=len(detectors) - 1) as pipe:
+        pipe.run(rois.views(Frame(data[0])))        # arranca los workers
+        lat_serial, lat_pipe, slowest = [], [], []
+        same = True
+        for f in data:
+            views = rois.views(Frame(f))
+            a = pipe.serial(views)
+            lat_serial.append(pipe.last_latency)
+            slowest.append(max(pipe.timings.values()))
+            b = pipe.run(views)
+            lat_pipe.append(pipe.last_latency)
+            same &= a == b
+
+    ms = lambda v: f"media {np.mean(v) * 1000:6.2f} ms, peor {np.max(v) * 1000:6.2f} ms"
+    print(f"DetectorPipeline: {len(detectors)} detectores matchTemplate, {frames} frames, "
+          f"{pipe.workers} workers + thread principal, {os.cpu_count()} CPU "
+          f"(por defecto acá: {default_workers(len(detectors))} workers)")
+    print(f"  serie:               {ms(lat_serial)}")
+    print(f"  pipeline:            {ms(lat_pipe)}  ({np.mean(lat_serial) / np.mean(lat_pipe):.2f}x)")
+    print(f"  detector más lento:  {ms(slowest)}")
+    print(f"  mismos resultados: {same}")
+
+
+if __name__ == "__main__":
+    bench_detector_pipeline()
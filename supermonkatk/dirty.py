@@ -0,0 +1,69 @@
+# dirty.py - Detección barata de cambios por ROI para no repetir detectores sobre pixels iguales
+#
+# Por cada ROI se guarda una copia (muestreada cada `step` pixels) del último frame analizado.
+# Si el ROI nuevo es idéntico (o cambió menos que `tolerance`, fracción de bytes distintos),
+# cached() devuelve el resultado anterior sin llamar al detector.
+# Comparar ~1 MB contra la copia cuesta ~0.1-0.3 ms; seis matchTemplate sobre el ROI de harmony, decenas de ms.
+import numpy as np
+
+
+class DirtyGate:
+    """
+    gate.cached("harmony", views["harmony"], detect) → detect(frame) solo si el ROI cambió.
+    step=1, tolerance=0.0 → solo reutiliza con bytes idénticos (lo seguro para iconos chicos
+    dentro de un ROI grande). Contadores por ROI: checks, skips.
+    """
+
+    def __init__(self, step=1, tolerance=0.0):
+        self.step = step
+        self.tolerance = tolerance
+        self._prev = {}
+        self._result = {}
+        self.checks = {}
+        self.skips = {}
+
+    def _sample(self, frame):
+        data = frame.data[..., :3]
+        if self.step > 1:
+            data = data[::self.step, ::self.step]
+        return data
+
+    def changed(self, name, frame):
+        """True si el ROI cambió desde la última llamada (y guarda el nuevo como referencia)."""
+        cur = self._sample(frame)
+        prev = self._prev.get(name)
+        self.checks[name] = self.checks.get(name, 0) + 1
+        if prev is not None and prev.shape == cur.shape:
+            if self.tolerance <= 0:
+                same = np.array_equal(prev, cur)
+            else:
+                same = np.count_nonzero(prev != cur) <= self.tolerance * prev.size
+            if same:
+                self.skips[name] = self.skips.get(name, 0) + 1
+                return False
+            np.copyto(prev, cur)
+        else:
+            self._prev[name] = cur.copy()
+        return True
+
+    def cached(self, name, frame, detect):
+        """Resultado de detect(frame), reutilizando el anterior si el ROI no cambió."""
+        if self.changed(name, frame) or name not in self._result:
+            self._result[name] = detect(frame)
+        return self._result[name]
+
+    def invalidate(self, name=None):
+        """Olvida la referencia (p.ej. si cambiaron los templates o la posición del ROI)."""
+        if name is None:
+            self._prev.clear()
+            self._result.clear()
+        else:
+            self._prev.pop(name, None)
+            self._result.pop(name, None)
+
+    def skip_rate(self, name):
+        checks = self.checks.get(name, 0)
+        return self.skips.get(name, 0) / checks if checks else 0.0
+
+    def stats(self):
+        return {name: (self.skips.get(name, 0), checks) for name, checks in self.checks.items()}
@@ -0,0 +1,126 @@
+# harmony_tracker.py - Harmony: búsqueda completa una vez, después solo alrededor de donde estaba
+#
+# El icono de harmony no se mueve entre frames. Con la posición del último match, cada template
+# se compara solo contra una ventana de (template + 2*margin) en vez de todo el ROI de 980x240.
+# Si el mejor score de la ventana cae bajo THRESHOLD (icono movido/tapado, ROI nuevo) se vuelve
+# a la búsqueda completa (MultiTemplateMatcher, el mismo resultado que cast_logic.detect_harmony()).
+#
+#   python harmony_tracker.py   → benchmark completo vs tracker sobre frames sintéticos
+import time
+
+import cv2
+
+from config import THRESHOLD
+import common_path  # noqa: F401  (../common en sys.path)
+
+TRACK_MARGIN = 6    # pixels alrededor del último match (cubre el corrimiento entre templates de distinto tamaño)
+
+
+class HarmonyTracker:
+    """
+    detect(frame) → (nivel o None, score). frame es el Frame del ROI de harmony (coords del client).
+    matcher: MultiTemplateMatcher con los templates de harmony (para la búsqueda completa).
+    """
+
+    def __init__(self, matcher, threshold=THRESHOLD, margin=TRACK_MARGIN):
+        self.matcher = matcher
+        self.templates = templates = matcher.templates
+        self.threshold = threshold
+        self.margin = margin
+        self.max_w = max(t.shape[1] for _, t in templates) if templates else 0
+        self.max_h = max(t.shape[0] for _, t in templates) if templates else 0
+        self.loc = None          # (x, y) en coords del client del último match
+        self.full_searches = 0
+        self.tracked = 0
+
+    def _search(self, img):
+        best_score, best_level, best_loc = -1, None, None
+        for level, tmpl in self.templates:
+            th, tw = tmpl.shape[:2]
+            if img.shape[0] < th or img.shape[1] < tw:
+                continue
+            res = cv2.matchTemplate(img, tmpl, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            if max_val > best_score:
+                best_score, best_level, best_loc = max_val, level, max_loc
+        return best_score, best_level, best_loc
+
+    def detect(self, frame):
+        if self.loc is not None:
+            m = self.margin
+            lx, ly = self.loc
+            win = frame.crop(lx - m, ly - m, self.max_w + 2 * m, self.max_h + 2 * m)
+            score, level, loc = self._search(win.bgr())
+            if score >= self.threshold:
+                self.tracked += 1
+                self.loc = (win.x0 + loc[0], win.y0 + loc[1])
+                return level, score
+
+        self.full_searches += 1
+        level, score, loc = self.matcher.match(frame.bgr())
+        if score >= self.threshold:
+            self.loc = (frame.x0 + loc[0], frame.y0 + loc[1])
+            return level, score
+        self.loc = None
+        return None, score
+
+    def reset(self):
+        self.loc = None
+
+
+# ========================
+# BENCHMARK
+# ========================
+def bench_harmony_tracker(frames=300, jump_at=150):
+    """Mismos frames, loop de matchTemplate completo vs HarmonyTracker. En jump_at el icono se mueve (fallback)."""
+    import numpy as np
+    from capture import Frame
+    from cast_logic import (synthetic_cast_frames, load_templates, load_boss_probe, load_boss_coords,
+                            load_sereno_anchor, build_rois)
+    from multi_match import MultiTemplateMatcher
+
+    templates = load_templates()
+    data = [f.copy() for _, f in synthetic_cast_frames(frames=frames)]
+    rois = build_rois(load_sereno_anchor(), load_boss_coords(), data[0].shape[1], data[0].shape[0],
+                      load_boss_probe())
+    hx, hy, hw, hh = rois.rect("harmony")
+    # a partir de jump_at el icono aparece 200 px más a la derecha
+    for f in data[jump_at:]:
+        roi = f[hy:hy + hh, hx:hx + hw]
+        roi[:, 200:] = roi[:, :-200].copy()
+        roi[:, :200] = 30
+
+    def run(detect):
+        out = []
+        t0 = time.perf_counter()
+        for f in data:
+            out.append(detect(rois.views(Frame(f))["harmony"]))
+        return out, (time.perf_counter() - t0) / len(data)
+
+    def full_search(v):
+        best_score, best_level = -1, None
+        for level, tmpl in templates:
+            _, max_val, _, _ = cv2.minMaxLoc(cv2.matchTemplate(v.bgr(), tmpl, cv2.TM_CCOEFF_NORMED))
+            if max_val > best_score:
+                best_score, best_level = max_val, level
+        return best_level if best_score >= THRESHOLD else None
+
+    full, t_full = run(full_search)
+    tracker = HarmonyTracker(MultiTemplateMatcher(templates))
+    tracked, t_track = run(lambda v: tracker.detect(v)[0])
+
+    roi_px = hw * hh
+    win_px = (tracker.max_w + 2 * tracker.margin) * (tracker.max_h + 2 * tracker.margin)
+    print(f"Harmony: {len(data)} frames, ROI {hw}x{hh}, ventana {tracker.max_w + 2 * tracker.margin}x"
+          f"{tracker.max_h + 2 * tracker.margin} ({roi_px / win_px:.0f}x menos pixels)")
+    print(f"  búsqueda completa: {t_full * 1000:.2f} ms/frame")
+    print(f"  tracker:           {t_track * 1000:.2f} ms/frame ({t_full / t_track:.0f}x) | "
+          f"búsquedas completas {tracker.full_searches}, trackeados {tracker.tracked}")
+    print(f"  mismos niveles: {full == tracked} | niveles vistos {sorted(set(l for l in full if l is not None))}")
+    if full != tracked:
+        diff = np.flatnonzero(np.array([a != b for a, b in zip(full, tracked)]))
+        print(f"  distintos en frames {diff[:10].tolist()}")
+
+
+if __name__ == "__main__":
+    bench_harmony_tracker()
@@ -0,0 +1,178 @@
+# icon_probe.py - "¿Está este icono conocido en este rect fijo?" sin matchTemplate
+#
+# Iconos del HUD que no se mueven (boss, slots, estados): el ROI mide lo mismo que el icono
+# más `jitter` pixels por lado, para tolerar un corrimiento chico del proyector de OBS.
+# IconProbe.score(roi) evalúa todas las posiciones (2*jitter+1)² de una vez:
+#   - "ncc": TM_CCOEFF_NORMED (mismo valor que matchTemplate). Las (2*jitter+1)² ventanas se copian una
+#     vez a una matriz y un solo producto contra [template con media cero | selector de canal] da, por
+#     ventana, el numerador y la suma de cada canal; la suma de cuadrados es un einsum sobre la misma matriz.
+#     Los pixels van corridos -128 (el NCC no cambia) para que esas sumas entren holgadas en float32.
+#   - "sad": 1 - diferencia absoluta media / 255 (más barato, para iconos sin variaciones de brillo).
+# Todos los buffers se reservan en el constructor: score() no pide memoria nueva por llamada.
+#
+#   python icon_probe.py   → latencia por llamada vs matchTemplate con el icono del boss
+# Medido en una máquina de 1 CPU (ruidoso, varía entre corridas), icono del boss 23x19:
+#   jitter 0: matchTemplate 48-78 µs | ncc 34-38 µs | sad 14-24 µs
+#   jitter 2: matchTemplate 79-100 µs | ncc 53-63 µs (~1.5x, alguna corrida empata) | sad 50-67 µs
+# Con jitter la copia de las 25 ventanas domina (~10 µs) y la ganancia es modesta; el camino con jitter 0
+# es el que de verdad ahorra. BOSS_JITTER (config.py) sigue en 2 porque el proyector se corre ±1-2 px.
+import time
+
+import cv2
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import common_path  # noqa: F401  (../common en sys.path)
+
+FLAT_VAR = 1e-3     # varianza por pixel bajo la cual la ventana se considera plana → score 0
+
+
+class IconProbe:
+    """
+    probe = IconProbe(TEMPLATES.get("exorigranpug.png"), jitter=2, threshold=0.88)
+    probe.expand(x1, y1, w, h) → rect del ROI a registrar; probe.present(roi) → bool;
+    probe.score(roi) → (score, (dx, dy)) del mejor corrimiento respecto del rect original.
+    Un ROI de otro tamaño (recortado en el borde, grabaciones viejas) se resuelve con matchTemplate.
+    """
+
+    def __init__(self, template, jitter=0, threshold=0.88, method="ncc"):
+        if method not in ("ncc", "sad"):
+            raise ValueError(f"method desconocido: {method}")
+        self.template = template
+        self.jitter = jitter
+        self.threshold = threshold
+        self.method = method
+        th, tw = template.h, template.w
+        n = 2 * jitter + 1
+        self.shape = (th + 2 * jitter, tw + 2 * jitter)
+        self.calls = 0
+        self.fallbacks = 0
+
+        self._buf = np.zeros(self.shape + (3,), dtype=np.float32)
+        # (n, n, th, tw, 3): vista de todas las posiciones sobre _buf, sin copiar,
+        # y su copia contigua (n², th*tw*3) para resolver todas las posiciones con un producto matriz-vector
+        self._windows = sliding_window_view(self._buf, (th, tw, 3))[:, :, 0]
+        self._cols = np.zeros((n, n, th, tw, 3), dtype=np.float32)
+        self._cols_2d = self._cols.reshape(n * n, -1)
+        self._scores = np.zeros((n, n), dtype=np.float32)
+        self._scores_1d = self._scores.reshape(-1)
+        if method == "ncc":
+            # columnas: template con media cero (numerador) y un 1 en cada pixel de cada canal (sumas)
+            self._proj = np.zeros((th * tw * 3, 4), dtype=np.float32)
+            self._proj[:, 0] = template.zero_mean.reshape(-1)
+            for c in range(3):
+                self._proj[c::3, 1 + c] = 1.0
+            self._out = np.zeros((n * n, 4), dtype=np.float32)
+            self._n_px = th * tw
+            self._norm2 = template.norm ** 2
+        else:
+            self._t = template.bgr[..., :3].astype(np.float32)
+            self._sad_scale = np.float32(1.0 / (255.0 * th * tw * 3))
+            self._ones = np.ones(th * tw * 3, dtype=np.float32)
+
+    def expand(self, x, y, w, h):
+        """Rect (x, y, w, h) del icono → rect del ROI con el margen de jitter."""
+        j = self.jitter
+        return x - j, y - j, w + 2 * j, h + 2 * j
+
+    def _ncc(self):
+        np.copyto(self._cols, self._windows)
+        # numerador (el template tiene media cero → sum(ventana * template)) y suma por canal, de una vez
+        np.dot(self._cols_2d, self._proj, out=self._out)
+        sum_sq = np.einsum("ij,ij->i", self._cols_2d, self._cols_2d).astype(np.float64)
+        sums = self._out[:, 1:].astype(np.float64)
+        # varianza de cada ventana, sumada sobre los canales: sum(x²) - sum(s²)/n
+        var = sum_sq - np.einsum("ij,ij->i", sums, sums) / self._n_px
+        flat = var < FLAT_VAR * self._n_px
+        var *= self._norm2
+        np.sqrt(var, out=var, where=~flat)
+        var[flat] = np.inf                          # ventana plana: score 0 (como matchTemplate)
+        np.divide(self._out[:, 0], var, out=self._scores_1d, casting="unsafe")
+
+    def _sad(self):
+        np.subtract(self._windows, self._t, out=self._cols)
+        np.abs(self._cols, out=self._cols)
+        np.dot(self._cols_2d, self._ones, out=self._scores_1d)     # suma por fila (dot es más rápido que sum)
+        self._scores *= self._sad_scale
+        np.subtract(1.0, self._scores, out=self._scores)
+
+    def score(self, roi):
+        """(score, (dx, dy)) del mejor corrimiento; dx/dy en [-jitter, jitter]."""
+        self.calls += 1
+        if roi.shape[:2] != self.shape:
+            return self._fallback(roi)
+        if self.method == "ncc":
+            np.subtract(roi[..., :3], np.float32(128), out=self._buf, casting="unsafe")
+            self._ncc()
+        else:
+            np.copyto(self._buf, roi[..., :3], casting="unsafe")
+            self._sad()
+        i = int(self._scores.argmax())
+        n = self._scores.shape[1]
+        return float(self._scores.flat[i]), (i % n - self.jitter, i // n - self.jitter)
+
+    def _fallback(self, roi):
+        self.fallbacks += 1
+        th, tw = self.template.h, self.template.w
+        if roi.shape[0] < th or roi.shape[1] < tw:
+            return 0.0, (0, 0)
+        if self.method == "ncc":
+            res = cv2.matchTemplate(roi[..., :3], self.template.bgr, cv2.TM_CCOEFF_NORMED)
+            _, val, _, (x, y) = cv2.minMaxLoc(res)
+        else:
+            res = cv2.matchTemplate(roi[..., :3], self.template.bgr, cv2.TM_SQDIFF)
+            val, _, (x, y), _ = cv2.minMaxLoc(res)
+            # sin SAD en matchTemplate: se reporta la SAD real en la mejor posición por SQDIFF
+            diff = np.abs(roi[y:y + th, x:x + tw, :3].astype(np.float32) - self.template.bgr)
+            val = 1.0 - float(diff.sum()) / (255.0 * th * tw * 3)
+        return float(val), (x - self.jitter, y - self.jitter)
+
+    def present(self, roi):
+        return self.score(roi)[0] >= self.threshold
+
+
+# ========================
+# BENCHMARK
+# ========================
+def bench_icon_probe(n=2000, jitter=2, seed=0):
+    import os
+    from templates import TEMPLATES
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "img", "exorigranpug.png")
+    tmpl = TEMPLATES.get(path) or TEMPLATES.get("heart.png")
+    rng = np.random.default_rng(seed)
+    th, tw = tmpl.h, tmpl.w
+    print(f"IconProbe: {os.path.basename(tmpl.path)} {tw}x{th}, {n} ROIs, la mitad con el icono")
+
+    def make_rois(j):
+        rois = rng.integers(0, 256, size=(n, th + 2 * j, tw + 2 * j, 3), dtype=np.uint8)
+        for i in range(n // 2):
+            dy, dx = rng.integers(0, 2 * j + 1, size=2)
+            noise = rng.integers(-8, 9, size=(th, tw, 3))
+            rois[i, dy:dy + th, dx:dx + tw] = np.clip(tmpl.bgr.astype(np.int16) + noise, 0, 255)
+        return rois
+
+    def mt(roi):
+        _, val, _, _ = cv2.minMaxLoc(cv2.matchTemplate(roi, tmpl.bgr, cv2.TM_CCOEFF_NORMED))
+        return val
+
+    for j in (0, jitter):
+        rois = make_rois(j)
+        t0 = time.perf_counter()
+        ref = [mt(r) for r in rois]
+        t_mt = (time.perf_counter() - t0) / n
+        line = f"  jitter {j}: matchTemplate {t_mt * 1e6:5.1f} µs"
+        for method in ("ncc", "sad"):
+            probe = IconProbe(tmpl, jitter=j, threshold=0.88 if method == "ncc" else 0.95, method=method)
+            t0 = time.perf_counter()
+            got = [probe.score(r)[0] for r in rois]
+            t = (time.perf_counter() - t0) / n
+            hits = sum(g >= probe.threshold for g in got)
+            line += f" | {method} {t * 1e6:5.1f} µs ({t_mt / t:.1f}x, {hits}/{n // 2} presentes)"
+            if method == "ncc":
+                line += f" |Δ| {np.abs(np.array(ref) - np.array(got)).max():.1e}"
+        print(line)
+
+
+if __name__ == "__main__":
+    bench_icon_probe()
@@ -1,4 +1,8 @@
 # main.py
+#   python main.py [--record sesion.smrec]   → graba el client para replay con cast_logic.py
+#   python main.py [--record sesion.smarc [--roi-only]]   → archivo indexado (frame_archive.py)
+import sys
+
 from hotkeys import start_listener
 from overlay_controller import start_overlays
 from caster_engine import set_dpi_awareness, run_cast_loop
@@ -14,7 +18,10 @@ def main():
     print(f"{TOGGLE_ACTIVE_HUNT_KEY} = activar / desactivar hunt mode")
     print(f"{TOGGLE_ACTIVE_BOSS_KEY} = activar / desactivar boss mode\n")
 
-    run_cast_loop()
+    record_path = None
+    if "--record" in sys.argv:
+        record_path = sys.argv[sys.argv.index("--record") + 1]
+    run_cast_loop(record_path, "--roi-only" in sys.argv)
 
 
 if __name__ == "__main__":
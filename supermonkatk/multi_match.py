@@ -0,0 +1,172 @@
+# multi_match.py - Varios templates contra el mismo ROI en una pasada (FFT), mismo score que TM_CCOEFF_NORMED
+#
+# El loop de harmony llamaba cv2.matchTemplate seis veces sobre el mismo ROI y cada llamada
+# recalculaba la DFT del ROI y sus estadísticas locales. Aquí, por frame:
+#   - una DFT por canal del ROI (compartida por todos los templates)
+#   - sumas por ventana (boxFilter) para la varianza local, una vez por tamaño de template
+#     y compartidas por todos los templates de ese tamaño
+#   - por template: producto de espectros (precalculados) + una DFT inversa
+# Los templates se guardan ya con media cero y su norma, así el numerador es una correlación directa.
+#
+#   python multi_match.py   → benchmark contra el loop de matchTemplate con ROIs sintéticos (PNGs reales)
+import time
+
+import cv2
+import numpy as np
+
+FLAT_VAR = 1e-3     # varianza (suma en la ventana) bajo la cual la ventana se considera plana
+
+
+class MultiTemplateMatcher:
+    """
+    templates: [(label, img BGR)] (p.ej. load_templates() → [(nivel, img)]).
+    match(roi) → (label, score, (x, y)) del mejor template; scores(roi) → {label: (score, (x, y))}.
+    Los scores son los de cv2.matchTemplate(..., TM_CCOEFF_NORMED) (diferencias ~1e-5 por float32).
+    """
+
+    def __init__(self, templates):
+        self.templates = list(templates)
+        self._prepared = []
+        for label, img in self.templates:
+            t = img.astype(np.float32)
+            t -= t.reshape(-1, t.shape[2]).mean(axis=0)
+            norm2 = float((t.astype(np.float64) ** 2).sum())
+            self._prepared.append((label, t, norm2))
+        self.shapes = sorted({t.shape[:2] for _, t, _ in self._prepared})
+        self._spectra = {}          # (roi_h, roi_w) → (dft_h, dft_w, [(label, (th, tw), [espectro por canal], norm2)])
+
+    def _template_spectra(self, rh, rw):
+        key = (rh, rw)
+        cached = self._spectra.get(key)
+        if cached is not None:
+            return cached
+        dh, dw = cv2.getOptimalDFTSize(rh), cv2.getOptimalDFTSize(rw)
+        spectra = []
+        for label, t, norm2 in self._prepared:
+            th, tw = t.shape[:2]
+            if th > rh or tw > rw:
+                continue
+            chans = []
+            for c in range(t.shape[2]):
+                pad = np.zeros((dh, dw), dtype=np.float32)
+                pad[:th, :tw] = t[..., c]
+                chans.append(cv2.dft(pad))
+            spectra.append((label, (th, tw), chans, norm2))
+        cached = self._spectra[key] = (dh, dw, spectra)
+        return cached
+
+    def score_maps(self, roi):
+        """{label: mapa de scores (rh-th+1, rw-tw+1)}, igual que matchTemplate por template."""
+        rh, rw, nc = roi.shape
+        dh, dw, spectra = self._template_spectra(rh, rw)
+        if not spectra:
+            return {}
+
+        # lado del ROI: una DFT por canal, para todos los templates
+        img = roi.astype(np.float32)
+        roi_spec = []
+        for c in range(nc):
+            pad = np.zeros((dh, dw), dtype=np.float32)
+            pad[:rh, :rw] = img[..., c]
+            roi_spec.append(cv2.dft(pad))
+        # suma de cuadrados de los canales juntos (el denominador solo usa el total)
+        ones = np.ones((1, nc), dtype=np.float64)
+        sq_img = cv2.transform(cv2.multiply(img, img), ones)
+
+        # varianza (sin normalizar) de cada ventana: una vez por tamaño de template
+        win_var = {}
+        for th, tw in self.shapes:
+            if th > rh or tw > rw:
+                continue
+            n = th * tw
+            oh, ow = rh - th + 1, rw - tw + 1
+            box = lambda a: cv2.boxFilter(a, cv2.CV_64F, (tw, th), anchor=(0, 0), normalize=False,
+                                          borderType=cv2.BORDER_CONSTANT)[:oh, :ow]
+            ws = box(img)
+            var = box(sq_img) - cv2.transform(cv2.multiply(ws, ws), ones) / n
+            # ventana plana: el numerador es solo ruido de la FFT → score 0 (como matchTemplate)
+            var[var < FLAT_VAR] = np.inf
+            win_var[(th, tw)] = var.astype(np.float32)
+
+        maps = {}
+        for label, (th, tw), chans, norm2 in spectra:
+            acc = cv2.mulSpectrums(roi_spec[0], chans[0], 0, conjB=True)
+            for c in range(1, nc):
+                acc += cv2.mulSpectrums(roi_spec[c], chans[c], 0, conjB=True)
+            num = cv2.idft(acc, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)[:rh - th + 1, :rw - tw + 1]
+            denom = cv2.sqrt(win_var[(th, tw)] * np.float32(norm2))
+            maps[label] = cv2.divide(num, denom)
+        return maps
+
+    def scores(self, roi):
+        out = {}
+        for label, m in self.score_maps(roi).items():
+            _, max_val, _, max_loc = cv2.minMaxLoc(m)
+            out[label] = (min(1.0, max_val), max_loc)
+        return out
+
+    def match(self, roi):
+        """(label, score, (x, y)) del mejor template; (None, -1.0, None) si ninguno entra en el ROI."""
+        best = (None, -1.0, None)
+        for label, (score, loc) in self.scores(roi).items():
+            if score > best[1]:
+                best = (label, score, loc)
+        return best
+
+
+# ========================
+# BENCHMARK
+# ========================
+def bench_multi_match(n_rois=20, roi_w=980, roi_h=251, seed=0):
+    from cast_logic import load_templates
+
+    templates = load_templates()
+    rng = np.random.default_rng(seed)
+    rois = []
+    for i in range(n_rois):
+        roi = rng.integers(0, 256, size=(roi_h, roi_w, 3), dtype=np.uint8)
+        roi = cv2.GaussianBlur(roi, (5, 5), 0)   # textura más parecida a la UI que ruido puro
+        roi[:, :150] = (40, 60, 40)              # zona plana (piso/fondo liso)
+        level, tmpl = templates[i % len(templates)]
+        th, tw = tmpl.shape[:2]
+        x, y = int(rng.integers(150, roi_w - tw)), int(rng.integers(0, roi_h - th))
+        roi[y:y + th, x:x + tw] = tmpl
+        rois.append((level, (x, y), roi))
+
+    def loop(roi):
+        best_score, best_level, best_loc = -1, None, None
+        for level, tmpl in templates:
+            res = cv2.matchTemplate(roi, tmpl, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            if max_val > best_score:
+                best_score, best_level, best_loc = max_val, level, max_loc
+        return best_level, best_score, best_loc
+
+    matcher = MultiTemplateMatcher(templates)
+    matcher.match(rois[0][2])  # espectros de los templates para este tamaño de ROI
+
+    t0 = time.perf_counter()
+    ref = [loop(r) for _, _, r in rois]
+    t_loop = (time.perf_counter() - t0) / n_rois
+    t0 = time.perf_counter()
+    got = [matcher.match(r) for _, _, r in rois]
+    t_multi = (time.perf_counter() - t0) / n_rois
+
+    same_level = all(a[0] == b[0] for a, b in zip(ref, got))
+    same_loc = all(a[2] == b[2] for a, b in zip(ref, got))
+    truth = all(g[0] == lvl and g[2] == loc for (lvl, loc, _), g in zip(rois, got))
+    max_diff = max(abs(a[1] - b[1]) for a, b in zip(ref, got))
+    # mapas completos contra matchTemplate para un ROI
+    maps = matcher.score_maps(rois[0][2])
+    map_diff = max(float(np.abs(maps[lvl] - cv2.matchTemplate(rois[0][2], t, cv2.TM_CCOEFF_NORMED)).max())
+                   for lvl, t in templates)
+
+    print(f"Multi-template: {len(templates)} templates ({len(matcher.shapes)} tamaños), {n_rois} ROIs {roi_w}x{roi_h}")
+    print(f"  loop matchTemplate: {t_loop * 1000:.2f} ms/ROI")
+    print(f"  MultiTemplateMatcher: {t_multi * 1000:.2f} ms/ROI ({t_loop / t_multi:.1f}x)")
+    print(f"  mismo nivel {same_level} | misma posición {same_loc} | nivel y posición reales {truth}")
+    print(f"  |Δscore| mejor {max_diff:.2e} | |Δ| mapas completos {map_diff:.2e}")
+
+
+if __name__ == "__main__":
+    bench_multi_match()
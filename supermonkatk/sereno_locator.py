@@ -9,6 +9,10 @@ import win32gui
 import win32ui
 import win32con
 
+import common_path  # noqa: F401  (../common en sys.path)
+from template_search import locate
+from templates import TEMPLATES
+
 OBS_TITLE_PREFIX = "Windowed Projector (Source)"
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -117,12 +121,11 @@ def crop_client_from_window_capture(hwnd, win_img_pil: Image.Image) -> np.ndarra
 
 
 def locate_template(search_bgr: np.ndarray, template_path: str, threshold: float):
-    templ = cv2.imread(template_path, cv2.IMREAD_COLOR)
+    templ = TEMPLATES.bgr(template_path)
     if templ is None:
         return {"found": False, "error": f"No pude leer template: {template_path}"}
 
-    res = cv2.matchTemplate(search_bgr, templ, cv2.TM_CCOEFF_NORMED)
-    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+    max_val, max_loc = locate(search_bgr, templ, threshold)
 
     if max_val < threshold:
         return {"found": False, "score": float(max_val), "error": "No match above threshold"}
@@ -0,0 +1,98 @@
+# bar_reader.py - Porcentaje exacto de la barra de HP/mana leyendo toda la fila de una vez
+#
+# Antes cada regla (3 spells, ring, 3 potions) leía un pixel en x0 + BAR_LENGTH_PX * pct / 100
+# y lo comparaba con el color de relleno. BarReader clasifica los BAR_LENGTH_PX + 1 pixels de la fila
+# con la tabla de colores compartida (color_lut.py) y devuelve el porcentaje lleno; las reglas comparan
+# contra ese número:
+#   pixel en int(L * pct / 100) sin color de relleno   ⇔   percent <= pct
+# (percent = 100 * pixels hasta el último pixel lleno / L, así la equivalencia es exacta).
+#
+#   python bar_reader.py   → barras sintéticas en cada porcentaje, comparadas con el muestreo por pixel
+import time
+
+import numpy as np
+
+import common_path  # noqa: F401  (../common en sys.path)
+
+
+class BarReader:
+    """
+    reader = BarReader(HUD_COLORS, BAR_LENGTH_PX); hp, hp_potion = reader.percents(views["hp_bar"], hp_x0, "hp", "hp_potion")
+    lut: ColorLut con las clases de relleno; view es el Frame del ROI de la barra (1 x L+1).
+    """
+
+    def __init__(self, lut, length):
+        self.lut = lut
+        self.length = length
+
+    def percents(self, view, x0, *classes):
+        """Porcentaje lleno por cada clase de color (una sola clasificación de la fila para todas). 0 si no hay ROI."""
+        if view is None or view.height == 0:
+            return tuple(0.0 for _ in classes)
+        bits = self.lut.classify(view.data[0])
+        skip = view.x0 - x0         # pixels de la barra recortados por el borde del client
+        out = []
+        for name in classes:
+            mask = (bits & self.lut.bit(name)) != 0
+            last = len(mask) - int(mask[::-1].argmax())     # pixels hasta el último lleno
+            filled = skip + last if mask.any() else 0
+            out.append(100.0 * filled / self.length)
+        return tuple(out)
+
+    def percent(self, view, x0, name):
+        return self.percents(view, x0, name)[0]
+
+
+# ========================
+# VERIFICACIÓN
+# ========================
+def check_bar_reader(length=None, seed=0):
+    """Barras sintéticas en cada porcentaje 0..100: percent() y las decisiones de cada umbral vs el muestreo por pixel."""
+    from capture import Frame
+    from color_lut import ColorLut, is_bar_filled
+    from healer_engine import HP_COLOR, MANA_COLOR, BAR_LENGTH_PX
+
+    L = length or BAR_LENGTH_PX
+    rng = np.random.default_rng(seed)
+    x0, y = 500, 300
+    errors = 0
+    t_pixel = t_reader = 0.0
+    checks = 0
+    lut = ColorLut()
+    lut.add("hp", HP_COLOR, 20)
+    lut.add("mana", MANA_COLOR, 25)
+    reader = BarReader(lut, L)
+    for name, color, tol in (("hp", HP_COLOR, 20), ("mana", MANA_COLOR, 25)):
+        bgr = np.array(color[::-1], dtype=np.int16)
+        for fill in range(101):
+            n = int(round(L * fill / 100))        # pixels llenos desde x0
+            row = np.empty((1, L + 1, 4), dtype=np.uint8)
+            row[..., 3] = 255
+            # relleno con ruido dentro de la tolerancia, resto oscuro (fondo de la barra vacía)
+            row[0, :n, :3] = np.clip(bgr + rng.integers(-tol, tol + 1, size=(n, 3)), 0, 255)
+            row[0, n:, :3] = rng.integers(0, 40, size=(L + 1 - n, 3))
+            view = Frame(row, x0, y)
+
+            t0 = time.perf_counter()
+            pct_read = reader.percent(view, x0, name)
+            t_reader += time.perf_counter() - t0
+            expected = 100.0 * n / L
+            errors += abs(pct_read - expected) > 1e-9
+
+            for pct in range(1, 101):
+                t0 = time.perf_counter()
+                old = not is_bar_filled(view.pixel_rgb(int(x0 + L * (pct / 100)), y), color, tol=tol)
+                t_pixel += time.perf_counter() - t0
+                errors += old != (pct_read <= pct)
+                checks += 1
+
+    print(f"BarReader: barras de {L} px, 0..100% (HP tol 20, mana tol 25), {checks} umbrales comparados")
+    print(f"  errores: {errors}")
+    print(f"  muestreo por pixel: {t_pixel / checks * 1e6:.2f} µs por umbral "
+          f"({t_pixel / checks * 1e6 * 9:.1f} µs para las ~9 lecturas de un tick)")
+    print(f"  BarReader: {t_reader / 202 * 1e6:.2f} µs por barra")
+    return errors == 0
+
+
+if __name__ == "__main__":
+    check_bar_reader()
@@ -0,0 +1,119 @@
+# color_lut.py - Clasificador de colores por tabla: cubo RGB → bits de clase, una indexación por lote de pixels
+#
+# is_bar_filled / is_ring_equipped comparaban canal por canal en Python (zip + abs) en cada llamada.
+# ColorLut construye una vez un cubo 256³ (uint8, 16 MB) donde cada celda tiene un bit por clase
+# de color registrada ("hp": (211, 79, 79) ± 20, ...). Clasificar N pixels es armar el índice
+# r<<16 | g<<8 | b (en frames BGRX sale directo de ver cada pixel como uint32) y una indexación.
+# Con bits en vez de un id por celda, las clases pueden solaparse (la misma barra con dos tolerancias).
+# Sin cuantizar: el resultado es idéntico a la comparación por canal.
+#
+#   python color_lut.py   → costo por pixel: comparación escalar vs tabla
+import time
+
+import numpy as np
+
+MAX_CLASSES = 8
+
+
+class ColorLut:
+    """
+    lut = ColorLut(); lut.add("hp", HP_COLOR, 20)        (colores en RGB, como pixel_rgb)
+    lut.mask(pixels, "hp") → bool por pixel; lut.classify(pixels) → bits de clase (uint8) por pixel.
+    pixels: array BGR o BGRX uint8 (..., 3|4), p.ej. Frame.data de un ROI.
+    """
+
+    def __init__(self):
+        self._cube = np.zeros(1 << 24, dtype=np.uint8)      # índice r<<16 | g<<8 | b
+        # el mismo cubo para leer pixels sueltos desde Python: lookup[r<<16 | g<<8 | b] → bits (int)
+        self.lookup = memoryview(self._cube)
+        self._bits = {}
+        self.colors = {}
+
+    def add(self, name, color_rgb, tol):
+        """Registra una clase: todos los (r, g, b) a ≤ tol por canal de color_rgb. Devuelve su bit."""
+        if name in self._bits:
+            raise ValueError(f"clase repetida: {name}")
+        if len(self._bits) >= MAX_CLASSES:
+            raise ValueError(f"máximo {MAX_CLASSES} clases de color")
+        bit = np.uint8(1 << len(self._bits))
+        cube = self._cube.reshape(256, 256, 256)
+        r, g, b = (int(c) for c in color_rgb)
+        cube[max(0, r - tol):r + tol + 1, max(0, g - tol):g + tol + 1, max(0, b - tol):b + tol + 1] |= bit
+        self._bits[name] = bit
+        self.colors[name] = (tuple(color_rgb), tol)
+        return bit
+
+    def bit(self, name):
+        return self._bits[name]
+
+    def index(self, pixels):
+        """Índice r<<16 | g<<8 | b de cada pixel BGR/BGRX."""
+        if pixels.shape[-1] == 4 and pixels.strides[-1] == 1 and pixels.strides[-2] == 4:
+            # BGRX contiguo por pixel: el uint32 little-endian es X<<24 | r<<16 | g<<8 | b
+            return pixels.view(np.uint32)[..., 0] & 0xFFFFFF
+        px = pixels[..., :3].astype(np.uint32)
+        return (px[..., 2] << 16) | (px[..., 1] << 8) | px[..., 0]
+
+    def classify(self, pixels):
+        """Bits de clase (uint8) de cada pixel."""
+        return self._cube[self.index(pixels)]
+
+    def mask(self, pixels, name):
+        """True donde el pixel pertenece a la clase name."""
+        return (self.classify(pixels) & self._bits[name]) != 0
+
+    def contains(self, pixel_rgb, name):
+        """Un pixel suelto (r, g, b) o None (fuera del frame) → bool."""
+        if pixel_rgb is None:
+            return False
+        r, g, b = pixel_rgb
+        return bool(self._cube[(r << 16) | (g << 8) | b] & self._bits[name])
+
+
+# ========================
+# BENCHMARK
+# ========================
+def is_bar_filled(pixel, expected, tol=20):
+    """La comparación de antes, canal por canal en Python: referencia de los benches (color_lut, bar_reader)."""
+    if pixel is None: return False
+    r,g,b = int(pixel[0]), int(pixel[1]), int(pixel[2])
+    er,eg,eb = expected
+    return all(abs(c - e) <= tol for c,e in zip((r,g,b),(er,eg,eb)))
+
+def bench_color_lut(seed=0):
+    from healer_engine import HP_COLOR
+
+    lut = ColorLut()
+    t0 = time.perf_counter()
+    lut.add("hp", HP_COLOR, 20)
+    t_build = time.perf_counter() - t0
+    rng = np.random.default_rng(seed)
+    bgr = np.array(HP_COLOR[::-1])
+    print(f"ColorLut: cubo 256³ ({lut._cube.nbytes >> 20} MB), add() {t_build * 1000:.2f} ms")
+    for n in (1, 91, 10_000):
+        px = np.empty((n, 4), dtype=np.uint8)
+        px[:, 3] = 255
+        px[:, :3] = np.clip(bgr + rng.integers(-30, 31, size=(n, 3)), 0, 255)
+        rgb = [(int(p[2]), int(p[1]), int(p[0])) for p in px]
+
+        reps = max(1, 20_000 // n)
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            ref = [is_bar_filled(p, HP_COLOR, 20) for p in rgb]
+        t_scalar = (time.perf_counter() - t0) / (reps * n)
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            got = lut.mask(px, "hp")
+        t_lut = (time.perf_counter() - t0) / (reps * n)
+        same = ref == got.tolist()
+        if n == 1:
+            t0 = time.perf_counter()
+            for _ in range(reps):
+                lut.contains(rgb[0], "hp")
+            t_lut = (time.perf_counter() - t0) / reps
+        print(f"  {n:6d} pixel{'s' if n > 1 else ' (contains)'}: escalar {t_scalar * 1e9:7.0f} ns/pixel | tabla {t_lut * 1e9:6.1f} ns/pixel "
+              f"({t_scalar / t_lut:5.1f}x) | mismas decisiones {same}")
+
+
+if __name__ == "__main__":
+    bench_color_lut()
@@ -0,0 +1,11 @@
+# common_path.py - Pone ../common en sys.path: captura, frame bus, templates, anclas, grabación y scheduler
+# son los mismos para ataque y curación y viven una sola vez ahí.
+#
+# Los módulos de este paquete que usan algo de common hacen `import common_path` antes de esos imports
+# (main.py de la raíz los lanza con cwd = carpeta del paquete, así que sys.path[0] es esta carpeta).
+import os
+import sys
+
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common")
+if COMMON_DIR not in sys.path:
+    sys.path.insert(1, COMMON_DIR)
@@ -0,0 +1,194 @@
+# cooldowns.py - Cooldowns de spells, potions, ring y globales en un solo lugar, con el próximo "listo" en un heap
+#
+# Antes cada cooldown era un _last_*_ts suelto (time.time()) que se comparaba contra su duración, y el loop
+# dormía POLL_SECONDS fijo aunque el próximo spell estuviera listo 20 ms después (más 0.6 s fijos tras
+# cambiar el ring). Cooldowns guarda por slot el instante en que vuelve a estar listo:
+#   ready(name)   → un dict lookup, O(1)
+#   next_ready()  → el menor instante futuro, desde un heap (entradas viejas se descartan al mirarlo)
+# así el loop puede dormir justo hasta el próximo momento en que algo puede dispararse o hasta el próximo
+# frame, lo que llegue antes. El reloj es time.monotonic (no salta con cambios de hora del sistema) o
+# cualquier callable: VirtualClock para simular / probar sin dormir de verdad.
+#
+#   python cooldowns.py   → simulación con reloj virtual: demora entre "listo" y la tecla, poll fijo vs next_ready
+import heapq
+import time
+
+NEVER = float("-inf")
+
+
+class VirtualClock:
+    """Reloj manual: clock() → instante actual; sleep(dt) / advance(dt) lo mueven sin dormir."""
+
+    def __init__(self, t=0.0):
+        self.t = float(t)
+
+    def __call__(self):
+        return self.t
+
+    def advance(self, dt):
+        self.t += max(0.0, dt)
+        return self.t
+
+    sleep = advance
+
+
+class Cooldowns:
+    """
+    cds = Cooldowns(); cds.add("spells", 0.5); cds.add("spell:hard_healing", 1.0)
+    if cds.ready("spells", now): ...; cds.fire("spells", now)
+    cds.next_ready(now) → instante en que el próximo slot en cooldown vuelve a estar listo (None: ninguno).
+    now es opcional en todos los métodos (por defecto clock()).
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._duration = {}
+        self.ready_at = {}          # name → instante en que vuelve a estar listo (solo lectura afuera)
+        self._heap = []             # (ready_at, name); vale solo si coincide con _ready_at[name]
+
+    def add(self, name, duration):
+        """Registra (o cambia la duración de) un slot. Arranca listo."""
+        self._duration[name] = float(duration)
+        self.ready_at.setdefault(name, NEVER)
+
+    def names(self):
+        return list(self._duration)
+
+    def duration(self, name):
+        return self._duration[name]
+
+    def ready(self, name, now=None):
+        return (self.clock() if now is None else now) >= self.ready_at[name]
+
+    def remaining(self, name, now=None):
+        return max(0.0, self.ready_at[name] - (self.clock() if now is None else now))
+
+    def fire(self, name, now=None, duration=None):
+        """Marca el uso de name: vuelve a estar listo en now + duración. Devuelve ese instante."""
+        now = self.clock() if now is None else now
+        ready_at = now + (self._duration[name] if duration is None else duration)
+        self.ready_at[name] = ready_at
+        heapq.heappush(self._heap, (ready_at, name))
+        return ready_at
+
+    def unfire(self, name, ready_at):
+        """
+        Deshace el fire() que devolvió ready_at (la tecla no llegó a salir): el slot vuelve a estar listo.
+        Si hubo un fire() posterior no toca nada. True si deshizo.
+        """
+        if self.ready_at.get(name) != ready_at:
+            return False
+        self.ready_at[name] = NEVER
+        return True
+
+    def reset(self, name=None):
+        """Deja listo un slot (o todos)."""
+        for n in ([name] if name is not None else list(self.ready_at)):
+            self.ready_at[n] = NEVER
+        if name is None:
+            self._heap.clear()
+
+    def next_ready(self, now=None):
+        """Menor instante > now en que un slot en cooldown queda listo, o None si no hay ninguno."""
+        now = self.clock() if now is None else now
+        heap = self._heap
+        while heap:
+            ready_at, name = heap[0]
+            if ready_at != self.ready_at[name] or ready_at <= now:
+                heapq.heappop(heap)         # reemplazada por un fire() posterior, o ya está listo
+                continue
+            return ready_at
+        return None
+
+    def sleep_for(self, since, limit=None):
+        """
+        Segundos desde ahora (clock()) hasta que quede listo algo que estaba en cooldown en since, el
+        instante del último tick: lo que quedó listo mientras se procesaba el tick da 0. Acotado por
+        limit; limit si no hay nada en cooldown.
+        """
+        nxt = self.next_ready(since)
+        if nxt is None:
+            return limit
+        wait = max(0.0, nxt - self.clock())
+        return wait if limit is None else min(wait, limit)
+
+
+# ========================
+# SIMULACIÓN
+# ========================
+def simulate(duration=120.0, poll=0.15, seed=0):
+    """
+    HP bajo todo el tiempo (cada slot dispara apenas está listo): 3 spells / 2 potions con sus cooldowns
+    y los globales de grupo. El loop duerme poll fijo, o hasta min(próximo frame, next_ready).
+    Devuelve la demora media/máx entre "el slot quedó listo" y "se tocó la tecla", y los ticks.
+    """
+    import random
+
+    slots = {"spells": 0.5, "spell:hard": 1.0, "spell:mid": 1.0, "spell:light": 1.0,
+             "potions": 1.0, "potion:hard": 1.0, "potion:mana": 1.0}
+    groups = {"spells": ["spell:hard", "spell:mid", "spell:light"],
+              "potions": ["potion:hard", "potion:mana"]}
+
+    def run(exact):
+        rng = random.Random(seed)
+        clock = VirtualClock()
+        cds = Cooldowns(clock)
+        for name, d in slots.items():
+            cds.add(name, d)
+        delays, ticks = [], 0
+        next_frame = 0.0
+        while clock() < duration:
+            now = clock()
+            ticks += 1
+            for group, rules in groups.items():
+                if not cds.ready(group, now):
+                    continue
+                for rule in rules:
+                    if cds.ready(rule, now):
+                        became_ready = max(cds.ready_at[group], cds.ready_at[rule], 0.0)
+                        delays.append(now - became_ready)
+                        cds.fire(rule, now)
+                        cds.fire(group, now)
+                        break
+            # captura + decisión + tecla: unos ms
+            clock.advance(rng.uniform(0.004, 0.012))
+            next_frame += poll
+            if exact:
+                clock.sleep(cds.sleep_for(now, limit=next_frame - clock()))
+            else:
+                clock.sleep(poll)
+            next_frame = max(next_frame, clock())
+        return delays, ticks
+
+    out = {}
+    for label, exact in (("poll fijo", False), ("next_ready", True)):
+        delays, ticks = run(exact)
+        out[label] = (sum(delays) / len(delays), max(delays), len(delays), ticks)
+    return out
+
+
+def bench_cooldowns(n=200_000):
+    cds = Cooldowns()
+    for i in range(16):
+        cds.add(f"slot{i}", 0.5 + i * 0.1)
+    t0 = time.perf_counter()
+    for i in range(n):
+        cds.ready("slot3", i * 0.01)
+    t_ready = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for i in range(n):
+        now = i * 0.01
+        cds.fire(f"slot{i & 15}", now)
+        cds.next_ready(now)
+    t_fire = (time.perf_counter() - t0) / n
+    return t_ready, t_fire
+
+
+if __name__ == "__main__":
+    res = simulate()
+    print("Cooldowns: HP bajo 120 s (reloj virtual), poll 150 ms, 3 spells + 2 potions")
+    for label, (mean, worst, fired, ticks) in res.items():
+        print(f"  {label:10s}: demora listo→tecla media {mean * 1000:5.1f} ms, máx {worst * 1000:5.1f} ms | "
+              f"{fired} teclas en {ticks} ticks")
+    t_ready, t_fire = bench_cooldowns()
+    print(f"  ready() {t_ready * 1e9:.0f} ns | fire() + next_ready() {t_fire * 1e9:.0f} ns")
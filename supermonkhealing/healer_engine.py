@@ -0,0 +1,323 @@
+# healer_engine.py - Detección y decisión del healer (sin win32)
+#
+# main.py captura y manda las teclas; aquí solo se leen las barras/ring de un frame y se decide
+# qué tecla tocar. Así el mismo código corre en vivo o con una grabación:
+#   python healer_engine.py sesion.smrec          → replay en tiempo real
+#   python healer_engine.py sesion.smrec --max    → replay a máxima velocidad
+#   (también .smarc de frame_archive.py, completo o solo ROIs)
+import os
+import sys
+import time
+import json
+from collections import namedtuple
+
+import numpy as np
+
+import common_path  # noqa: F401  (../common en sys.path)
+from anchor_tracker import AnchorTracker
+from bar_reader import BarReader
+from capture import RoiRegistry
+from color_lut import ColorLut
+from cooldowns import Cooldowns
+from heal_rules import compile_rules
+from hp_trend import HpTrend
+from input_dispatch import EMERGENCY, NORMAL
+from ring_slot import RingSlotDetector, ENERGY, RING_PATCH, SLOT_DARK_COLOR, SLOT_DARK_TOLERANCE
+from template_search import locate
+from templates import TEMPLATES
+
+# ====================== CONFIG Y ARCHIVOS ======================
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(ROOT, "config_ring.json")
+HEART_TEMPLATE = os.path.join(ROOT, "heart.png")
+MANA_TEMPLATE = os.path.join(ROOT, "mana.png")
+
+def load_config():
+    if not os.path.exists(CONFIG_PATH):
+        raise FileNotFoundError(f"No existe {CONFIG_PATH}")
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+CFG = load_config()
+
+OBS_TITLE_PREFIX = CFG["obs_title_prefix"]
+THRESHOLD = CFG["template_threshold"]
+OFFSET_TO_X0 = CFG["offset_to_x0"]
+BAR_LENGTH_PX = CFG["bar_length_px"]
+POLL_SECONDS = CFG["poll_seconds"]
+
+EQUIP_BELOW = CFG.get("equip_below_percent", 60)
+UNEQUIP_ABOVE = CFG.get("unequip_above_percent", 85)
+RING_COOLDOWN = CFG.get("cooldown_sec", 0.6)
+# tras equipar/desequipar el ring, las potions esperan a que el client procese el cambio
+RING_SETTLE = CFG.get("ring_settle_sec", 0.6)
+MIN_MANA_TO_EQUIP = CFG.get("min_mana_percent_to_equip", 30)
+
+PREDICT_CFG = CFG.get("prediction", {})
+PREDICT_ENABLED = PREDICT_CFG.get("enabled", False)
+# la próxima oportunidad de castear: el siguiente poll + la latencia de OBS
+PREDICT_LEAD = POLL_SECONDS + PREDICT_CFG.get("latency_sec", 0.05)
+
+RING_SLOT_X = 1767
+RING_SLOT_Y = 224
+# [dx, dy] del slot respecto de heart.png (top-left); sin esto se calibra desde RING_SLOT_X/Y al ubicar las barras
+RING_SLOT_OFFSET = CFG.get("ring_slot_offset")
+
+# colores del HUD (RGB) y tolerancias por canal → una sola tabla para barras y ring
+COLORS_CFG = CFG.get("colors", {})
+HP_COLOR = tuple(COLORS_CFG.get("hp", (211, 79, 79)))
+MANA_COLOR = tuple(COLORS_CFG.get("mana", (83, 80, 218)))
+ENERGY_RING_COLOR = tuple(COLORS_CFG.get("energy_ring", (145, 255, 248)))
+HP_TOLERANCE = COLORS_CFG.get("hp_tolerance", 20)
+POTION_TOLERANCE = COLORS_CFG.get("potion_tolerance", 25)
+RING_TOLERANCE = COLORS_CFG.get("ring_tolerance", 20)
+
+HUD_COLORS = ColorLut()
+HUD_COLORS.add("hp", HP_COLOR, HP_TOLERANCE)                 # spells y ring
+HUD_COLORS.add("hp_potion", HP_COLOR, POTION_TOLERANCE)      # potions de HP
+HUD_COLORS.add("mana", MANA_COLOR, POTION_TOLERANCE)
+HUD_COLORS.add("energy_ring", ENERGY_RING_COLOR, RING_TOLERANCE)
+HUD_COLORS.add("slot_dark", SLOT_DARK_COLOR, SLOT_DARK_TOLERANCE)
+
+# hotkey=None → solo log; priority: clase de la tecla en la cola de input_dispatch.py
+Action = namedtuple("Action", "hotkey log priority", defaults=(NORMAL,))
+
+# ====================== DETECCIÓN ======================
+def _below(trend, value, pct, predict=False):
+    """
+    None si la regla no dispara. "" si value ya está en/bajo pct; " (pred …)" (texto para el log)
+    si la tendencia lo pone bajo pct antes del próximo poll.
+    """
+    if value <= pct:
+        return ""
+    if predict and PREDICT_ENABLED:
+        projected = trend.projected(PREDICT_LEAD, value)
+        if projected <= pct:
+            return f" (pred {projected:.0f}% en {PREDICT_LEAD * 1000:.0f} ms, {trend.dps():.0f}%/s)"
+    return None
+
+
+class HealerEngine:
+    """Posición de las barras, ROIs que se leen y cooldowns. tick() no toca teclado ni ventanas."""
+
+    def __init__(self, clock=time.monotonic):
+        self.hp_x0 = self.hp_y = self.mana_x0 = self.mana_y = None
+        self.rois = RoiRegistry()
+        # heart.png / mana.png: se verifican cada pocos ticks y se re-ubican si el proyector se corre
+        self.anchors = AnchorTracker(threshold=THRESHOLD)
+        self.ring_slot = RingSlotDetector(HUD_COLORS, "energy_ring", "slot_dark")
+        self.bar_reader = BarReader(HUD_COLORS, BAR_LENGTH_PX)
+        self.hp_trend = HpTrend()
+        self.mana_trend = HpTrend()
+
+        # todos los cooldowns (spells, potions, ring y globales) sobre el reloj que pase el caller:
+        # main.py el mismo que su TickScheduler, el replay el tiempo de la grabación
+        self.cooldowns = Cooldowns(clock)
+        self.cooldowns.add("ring", RING_COOLDOWN)
+        self.cooldowns.add("ring_settle", RING_SETTLE)
+        # spells / potions compilados de config_ring.json; cada regla tiene su slot en self.cooldowns
+        self.rules = compile_rules(CFG, self.cooldowns)
+        # hotkey → ((slot, ready_at), ...) del último fire() de su Action, para cancel()
+        self._fired = {}
+
+    def locate_bars(self, client_bgr):
+        heart = TEMPLATES.get(HEART_TEMPLATE)
+        if heart is None: return False
+        max_val, max_loc = locate(client_bgr, heart.bgr, THRESHOLD)
+        if max_val < THRESHOLD: return False
+        self.anchors = AnchorTracker(threshold=THRESHOLD)
+        self.anchors.add("heart", heart, *max_loc)
+        if self.ring_slot.offset is None:
+            if RING_SLOT_OFFSET:
+                self.ring_slot.offset = tuple(RING_SLOT_OFFSET)
+            else:
+                self.ring_slot.calibrate(max_loc, (RING_SLOT_X, RING_SLOT_Y))
+
+        if MIN_MANA_TO_EQUIP > 0:
+            mana = TEMPLATES.get(MANA_TEMPLATE)
+            if mana is not None:
+                mv_m, ml_m = locate(client_bgr, mana.bgr, THRESHOLD)
+                if mv_m >= THRESHOLD:
+                    self.anchors.add("mana", mana, *ml_m)
+
+        self._bars_from_anchors()
+        print(f"✅ HP barra: x0={self.hp_x0}, y={self.hp_y}")
+        if self.mana_x0: print(f"✅ Mana barra: x0={self.mana_x0}, y={self.mana_y}")
+        return True
+
+    def _bars_from_anchors(self):
+        """Posición de las barras desde heart/mana (top-left) y ROIs nuevos."""
+        pos = self.anchors.positions()
+        heart = TEMPLATES.get(HEART_TEMPLATE)
+        self.hp_x0 = pos["heart"][0] + heart.w // 2 + OFFSET_TO_X0
+        self.hp_y = pos["heart"][1] + heart.h // 2
+        self.mana_x0 = self.mana_y = None
+        if "mana" in pos:
+            mana = TEMPLATES.get(MANA_TEMPLATE)
+            self.mana_x0 = pos["mana"][0] + mana.w // 2 + OFFSET_TO_X0
+            self.mana_y = pos["mana"][1] + mana.h // 2
+        self.register_rois()
+
+    def track(self, views, grab_frame=None):
+        """
+        Verifica heart/mana cada AnchorTracker.verify_every ticks (grab_frame() → frame completo, solo si
+        se perdieron). Si se movieron, recalcula las barras y cambia self.rois. True si hubo cambio.
+        """
+        if not self.anchors.update(views, grab_frame):
+            return False
+        self._bars_from_anchors()
+        print(f"📍 Barras re-ubicadas: HP x0={self.hp_x0}, y={self.hp_y}")
+        return True
+
+    def use_rois(self, views):
+        """Posición de las barras desde ROIs ya recortados (.smarc solo ROIs: no hay frame para locate)."""
+        self.hp_x0, self.hp_y = views["hp_bar"].x0, views["hp_bar"].y0
+        if "mana_bar" in views:
+            self.mana_x0, self.mana_y = views["mana_bar"].x0, views["mana_bar"].y0
+        self.register_rois()
+
+    def register_rois(self):
+        # registro nuevo y un solo cambio de referencia: el loop nunca ve barras a medio mover
+        rois = RoiRegistry()
+        rois.register("hp_bar", self.hp_x0, self.hp_y, BAR_LENGTH_PX + 1, 1)
+        if self.mana_x0:
+            rois.register("mana_bar", self.mana_x0, self.mana_y, BAR_LENGTH_PX + 1, 1)
+        heart = self.anchors.positions().get("heart")
+        if heart is not None and self.ring_slot.offset is not None:
+            rois.register("ring_slot", *self.ring_slot.rect(heart))
+        else:
+            half = RING_PATCH // 2
+            rois.register("ring_slot", RING_SLOT_X - half, RING_SLOT_Y - half, RING_PATCH, RING_PATCH)
+        self.anchors.register(rois)
+        self.rois = rois
+
+    def _mark(self, hotkey, *slots):
+        ready_at = self.cooldowns.ready_at
+        self._fired[hotkey] = tuple((slot, ready_at[slot]) for slot in slots)
+
+    def cancel(self, hotkey):
+        """
+        La tecla no se apretó (input_dispatch la descartó o venció): deshace los cooldowns que marcó su
+        Action, así la regla puede volver a dispararse en el próximo tick. True si deshizo alguno.
+        """
+        undone = [self.cooldowns.unfire(slot, at) for slot, at in self._fired.pop(hotkey, ())]
+        return any(undone)
+
+    def tick(self, rois, now):
+        """Evalúa spells, ring y potions sobre los ROIs de un frame. Devuelve la lista de Action."""
+        actions = []
+        mana_x0 = self.mana_x0
+
+        # una lectura por barra: spells/ring comparan HP con HP_TOLERANCE, potions con POTION_TOLERANCE
+        hp, hp_potion = self.bar_reader.percents(rois["hp_bar"], self.hp_x0, "hp", "hp_potion")
+        mana = None
+        if mana_x0:
+            mana = self.bar_reader.percent(rois.get("mana_bar"), mana_x0, "mana")
+            self.mana_trend.push(now, mana)
+        self.hp_trend.push(now, hp)
+
+        values = (hp, hp_potion, mana)
+        trends = (self.hp_trend, self.hp_trend, self.mana_trend)
+
+        # === 1. HEALING SPELLS ===
+        spells = self.rules.spells
+        if spells.ready(now):
+            hit = spells.pick(now, values, trends, _below)
+            if hit:
+                rule, below = hit
+                self._mark(rule.hotkey, rule.slot, spells.name)
+                ts = time.strftime('%H:%M:%S')
+                actions.append(Action(rule.hotkey, f"[{ts}] {rule.label}{below} → {rule.hotkey}", rule.priority))
+
+        # === 2. ENERGY RING ===
+        if self.cooldowns.ready("ring", now):
+            current_equipped = self.ring_slot.classify(rois.get("ring_slot")) == ENERGY
+
+            hp_low = hp <= EQUIP_BELOW
+            hp_high = hp > UNEQUIP_ABOVE
+
+            action = None
+            if hp_low and not current_equipped:
+                if MIN_MANA_TO_EQUIP > 0 and mana_x0:
+                    if mana <= MIN_MANA_TO_EQUIP:
+                        ts = time.strftime('%H:%M:%S')
+                        actions.append(Action(None, f"[{ts}] ⚠️ Mana < {MIN_MANA_TO_EQUIP}% → NO EQUIPO RING"))
+                        return actions
+                hotkey = "f17"
+                action = f"EQUIPANDO RING (HP ≤ {EQUIP_BELOW}%)"
+                priority = EMERGENCY
+
+            elif hp_high and current_equipped:
+                hotkey = "end"
+                action = f"DESEQUIPANDO RING (HP ≥ {UNEQUIP_ABOVE}%)"
+                priority = NORMAL
+
+            if action:
+                ts = time.strftime('%H:%M:%S')
+                actions.append(Action(hotkey, f"[{ts}] ⚡ {action}", priority))
+                self.cooldowns.fire("ring", now)
+                self.cooldowns.fire("ring_settle", now)
+                self._mark(hotkey, "ring", "ring_settle")
+
+        # === 3. POTIONS ===
+        potions = self.rules.potions
+        if potions.ready(now) and self.cooldowns.ready("ring_settle", now):
+            hit = potions.pick(now, values, trends, _below)
+            if hit:
+                rule, below = hit
+                self._mark(rule.hotkey, rule.slot, potions.name)
+                ts = time.strftime('%H:%M:%S')
+                actions.append(Action(rule.hotkey, f"[{ts}] {rule.label}{below} → {rule.hotkey}", rule.priority))
+
+        return actions
+
+
+# ====================== REPLAY ======================
+def replay(path, speed=1.0, drop=()):
+    """
+    Pasa una grabación .smrec/.smarc por el mismo HealerEngine.tick() que usa main.py (sin teclas).
+    drop: hotkeys que se simulan descartadas por input_dispatch → cancel() antes del tick siguiente.
+    """
+    from recorder import open_replay
+
+    engine = HealerEngine()
+    tick_times = []
+    n_actions = 0
+    not_sent = []
+    for ts, frame in open_replay(path, speed=speed):
+        for hotkey in not_sent:
+            engine.cancel(hotkey)
+        not_sent.clear()
+        if engine.hp_x0 is None:
+            if isinstance(frame, dict):
+                engine.use_rois(frame)
+            elif not engine.locate_bars(frame.bgr()):
+                continue
+        t0 = time.perf_counter()
+        views = frame if isinstance(frame, dict) else engine.rois.views(frame)
+        actions = engine.tick(views, ts)
+        if not isinstance(frame, dict):
+            engine.track(views, lambda: frame)
+        tick_times.append(time.perf_counter() - t0)
+        for action in actions:
+            dropped = action.hotkey is not None and action.hotkey in drop
+            if action.log:
+                print(f"  t={ts:.3f}s {action.log}{' (no enviada)' if dropped else ''}")
+            if dropped:
+                not_sent.append(action.hotkey)
+            n_actions += action.hotkey is not None and not dropped
+
+    if not tick_times:
+        print("❌ No se detectaron las barras en la grabación")
+        return
+    ms = np.array(tick_times) * 1000
+    print(f"Replay: {len(ms)} ticks | {n_actions} teclas | tick p50 {np.percentile(ms, 50):.3f} ms "
+          f"p95 {np.percentile(ms, 95):.3f} ms max {ms.max():.3f} ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python healer_engine.py sesion.smrec|sesion.smarc [--max] [--drop f1,f3]")
+        sys.exit(1)
+    drop = sys.argv[sys.argv.index("--drop") + 1].split(",") if "--drop" in sys.argv else ()
+    replay(sys.argv[1], speed=None if "--max" in sys.argv else 1.0, drop=drop)
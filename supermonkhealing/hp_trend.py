@@ -0,0 +1,179 @@
+# hp_trend.py - Tendencia de HP/mana: daño por segundo y HP proyectada para curar antes de cruzar el umbral
+#
+# Con poll de 150 ms + la latencia de OBS, una regla "HP ≤ 80%" recién dispara cuando la barra ya cruzó.
+# HpTrend guarda las últimas lecturas (t, %) en un ring buffer de numpy de tamaño fijo y ajusta una recta
+# (mínimos cuadrados) sobre los últimos window segundos:
+#   dps()              → % por segundo que se está perdiendo (0 si no baja)
+#   projected(lead)    → % estimado dentro de lead segundos
+#   time_to(pct)       → segundos hasta cruzar pct (inf si no baja)
+# HealerEngine dispara una regla si la lectura ya está bajo el umbral o, solo en los spells con
+# "predict": true y con "prediction.enabled", si la proyectada al próximo momento en que podría castear
+# (próximo poll + latencia) lo estaría. Es opt-in: las potions nunca predicen.
+#
+#   python hp_trend.py   → simulación determinista: curvas de HP sintéticas, umbral solo vs predictivo
+import math
+
+import numpy as np
+
+TREND_CAPACITY = 64         # lecturas guardadas (~10 s a 150 ms)
+TREND_WINDOW = 0.6          # segundos usados para la pendiente
+TREND_MIN_SAMPLES = 3       # menos lecturas → sin predicción
+
+
+class HpTrend:
+    def __init__(self, capacity=TREND_CAPACITY, window=TREND_WINDOW, min_samples=TREND_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._t = np.zeros(capacity, dtype=np.float64)
+        self._v = np.zeros(capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._slope = None          # caché de la pendiente hasta la próxima lectura
+
+    def __len__(self):
+        return self._count
+
+    def push(self, t, value):
+        i = self._next
+        self._t[i] = t
+        self._v[i] = value
+        self._next = (i + 1) % len(self._t)
+        self._count = min(self._count + 1, len(self._t))
+        self._slope = None
+
+    def clear(self):
+        self._next = self._count = 0
+        self._slope = None
+
+    def last(self):
+        if not self._count:
+            return None
+        i = self._next - 1
+        return self._t[i], self._v[i]
+
+    def slope(self):
+        """Pendiente (% por segundo) de la recta ajustada a las lecturas de los últimos window segundos."""
+        if self._slope is not None:
+            return self._slope
+        n = self._count
+        if n < self.min_samples:
+            self._slope = 0.0
+            return 0.0
+        t = self._t[:n]
+        v = self._v[:n]
+        t_last = self._t[self._next - 1]
+        mask = t >= t_last - self.window
+        if np.count_nonzero(mask) < self.min_samples:
+            self._slope = 0.0
+            return 0.0
+        tw = t[mask] - t_last
+        vw = v[mask]
+        tc = tw - tw.mean()
+        den = float(np.dot(tc, tc))
+        self._slope = float(np.dot(tc, vw - vw.mean())) / den if den > 0 else 0.0
+        return self._slope
+
+    def dps(self):
+        """% por segundo que se pierde (0 si la barra sube o está quieta)."""
+        return max(0.0, -self.slope())
+
+    def projected(self, lead, value=None):
+        """% estimado dentro de lead segundos (desde value o la última lectura). Solo proyecta bajadas."""
+        if value is None:
+            last = self.last()
+            if last is None:
+                return None
+            value = last[1]
+        return value - self.dps() * lead
+
+    def time_to(self, pct, value=None):
+        """Segundos hasta cruzar pct a la velocidad actual; 0 si ya está debajo, inf si no baja."""
+        if value is None:
+            last = self.last()
+            if last is None:
+                return math.inf
+            value = last[1]
+        if value <= pct:
+            return 0.0
+        dps = self.dps()
+        return (value - pct) / dps if dps > 0 else math.inf
+
+
+# ========================
+# SIMULACIÓN
+# ========================
+def _curves(duration):
+    """Curvas de HP (%) sintéticas y deterministas: f(t) → % real."""
+    def drain(rate, start=100.0):
+        return lambda t: max(0.0, start - rate * t)
+
+    def burst(t0, rate, base_rate=2.0):
+        return lambda t: max(0.0, 100.0 - base_rate * t - (rate * (t - t0) if t > t0 else 0.0))
+
+    def steps(hit, every, start=100.0):
+        return lambda t: max(0.0, start - hit * math.floor(t / every))
+
+    def wobble(amp=3.0, period=0.9):
+        # oscila cerca del tope sin bajar del umbral: no debería disparar nada
+        return lambda t: 97.0 - amp * (1 + math.sin(2 * math.pi * t / period)) / 2
+
+    return [
+        ("drenaje lento 5%/s", drain(5.0)),
+        ("drenaje 15%/s", drain(15.0)),
+        ("burst 40%/s en t=1.5", burst(1.5, 40.0)),
+        ("golpes de 8% c/0.4s", steps(8.0, 0.4)),
+        ("burst 80%/s en t=2.0", burst(2.0, 80.0)),
+        ("oscila 94-97% (sin daño real)", wobble()),
+    ]
+
+
+def simulate(poll=0.15, latency=0.05, bar_px=90, thresholds=(80, 88, 91), duration=8.0):
+    """
+    Lee cada curva cada `poll` s con `latency` s de atraso y cuantizada a los pixels de la barra
+    (como BarReader). Para cada umbral: primer disparo con umbral solo vs con predicción, y % real en ese momento.
+    """
+    lead = poll + latency
+    rows = []
+    for name, curve in _curves(duration):
+        for pct in thresholds:
+            fired = {}
+            for mode in ("umbral", "predictivo"):
+                trend = HpTrend()
+                t = 0.0
+                while t <= duration:
+                    seen = math.floor(curve(max(0.0, t - latency)) * bar_px / 100) * 100 / bar_px
+                    trend.push(t, seen)
+                    hit = seen <= pct
+                    if mode == "predictivo" and not hit:
+                        hit = trend.projected(lead, seen) <= pct
+                    if hit:
+                        fired[mode] = (t, curve(t))
+                        break
+                    t = round(t + poll, 9)
+            crossing = next((i * 0.001 for i in range(int(duration * 1000) + 1) if curve(i * 0.001) <= pct), None)
+            rows.append((name, pct, crossing, fired.get("umbral"), fired.get("predictivo")))
+    return rows
+
+
+def report(rows, poll=0.15, latency=0.05):
+    print(f"HpTrend: poll {poll * 1000:.0f} ms, latencia {latency * 1000:.0f} ms, ventana {TREND_WINDOW} s")
+    print(f"  {'curva':32s} umbral  cruce real | umbral solo        | predictivo         | antes")
+    gains = []
+    false_fires = 0
+    for name, pct, crossing, plain, pred in rows:
+        fmt = lambda f: f"t={f[0]:5.2f}s HP {f[1]:5.1f}%" if f else "       —          "
+        cross = f"{crossing:5.2f}s" if crossing is not None else "  —  "
+        gain = ""
+        if plain and pred:
+            gains.append(plain[0] - pred[0])
+            gain = f"{(plain[0] - pred[0]) * 1000:4.0f} ms"
+        if pred and crossing is None:
+            false_fires += 1
+        print(f"  {name:32s} {pct:5d}%  {cross}    | {fmt(plain)} | {fmt(pred)} | {gain}")
+    if gains:
+        print(f"  disparo anticipado: media {np.mean(gains) * 1000:.0f} ms, máx {max(gains) * 1000:.0f} ms | "
+              f"disparos sin cruce real: {false_fires}")
+
+
+if __name__ == "__main__":
+    report(simulate())
@@ -0,0 +1,296 @@
+# input_dispatch.py - Thread de envío de teclas: el loop de visión encola y sigue, nunca espera el down/up
+#
+# send_key_f17 / send_key_end duermen 30-50 ms entre down y up (y el fallback de keyboard más), y
+# mientras tanto no se lee ningún frame. InputDispatcher tiene una cola de prioridad acotada y un thread
+# que aprieta las teclas de a una con el backend:
+#   - prioridad: EMERGENCY < HEAL < NORMAL < MANA (menor = antes); un heal de emergencia pasa adelante de
+#     una mana potion que ya estaba en la cola (la tecla que se está apretando no se interrumpe)
+#   - coalescing: una tecla que ya está pendiente no se encola de nuevo (si llega con más prioridad,
+#     sube de prioridad y conserva su timestamp)
+#   - cola llena: entra si tiene más prioridad que la peor pendiente (que se descarta), si no se rechaza
+#   - max_age: una tecla que esperó más que eso ya no tiene sentido (el HP cambió) y se descarta
+#   - timestamps por tecla: encolada, empezada, enviada → espera en cola y total encolada→enviada
+#   - on_drop(hotkey, motivo): toda tecla aceptada o pedida que al final no se aprieta ("full", "displaced",
+#     "expired", "error", "closed") se avisa, para que el que la pidió no la dé por enviada (cooldowns).
+#     Se llama sin el lock tomado, desde el thread que la descartó. Las coalescidas sí salen: no se avisan.
+# El backend es cualquier objeto con press(hotkey) bloqueante: main.py usa win32; FakeBackend simula los
+# tiempos de down/up para probar orden y latencias en Linux.
+#
+#   python input_dispatch.py   → loop de visión con teclas en línea vs con dispatcher (FakeBackend)
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+EMERGENCY, HEAL, NORMAL, MANA = 0, 1, 2, 3
+PRIORITIES = {"emergency": EMERGENCY, "heal": HEAL, "normal": NORMAL, "mana": MANA}
+
+QUEUE_SIZE = 8
+MAX_AGE = 1.0           # s; None = sin vencimiento
+
+
+class KeyPress:
+    __slots__ = ("hotkey", "priority", "seq", "enqueued", "started", "sent", "coalesced")
+
+    def __init__(self, hotkey, priority, seq, enqueued):
+        self.hotkey = hotkey
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = enqueued
+        self.started = None
+        self.sent = None
+        self.coalesced = 0
+
+    def __repr__(self):
+        return f"KeyPress({self.hotkey!r}, prio={self.priority})"
+
+
+class FakeBackend:
+    """press(hotkey) duerme el tiempo de down/up de esa tecla y anota (hotkey, t_down, t_up)."""
+
+    def __init__(self, hold=None, default_hold=0.03, clock=time.perf_counter):
+        self.hold = {"f17": 0.03, "end": 0.05} if hold is None else dict(hold)
+        self.default_hold = default_hold
+        self.clock = clock
+        self.pressed = []
+
+    def press(self, hotkey):
+        t0 = self.clock()
+        time.sleep(self.hold.get(hotkey, self.default_hold))
+        self.pressed.append((hotkey, t0, self.clock()))
+
+
+class InputDispatcher:
+    """
+    dispatch = InputDispatcher(backend); dispatch.submit("f3", HEAL) → True si quedó encolada (o
+    coalescida); dispatch.close() al salir. sent: últimas KeyPress enviadas (con sus timestamps).
+    on_drop(hotkey, motivo) para cada tecla que no se va a apretar.
+    """
+
+    def __init__(self, backend, maxsize=QUEUE_SIZE, max_age=MAX_AGE, clock=time.perf_counter, history=1024,
+                 on_drop=None):
+        self.backend = backend
+        self.on_drop = on_drop
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.clock = clock
+        self._heap = []             # (priority, seq, KeyPress); vale si sigue en _pending con esa prioridad
+        self._pending = {}          # hotkey → KeyPress
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._busy = False          # hay una tecla apretándose
+        self.sent = deque(maxlen=history)
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0            # rechazadas o desplazadas por cola llena
+        self.expired = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="input-dispatch", daemon=True)
+        self._thread.start()
+
+    def submit(self, hotkey, priority=NORMAL):
+        now = self.clock()
+        displaced = None
+        with self._cond:
+            if self._closed:
+                accepted = False
+                reason = "closed"
+            else:
+                accepted, reason = True, None
+                self.submitted += 1
+                item = self._pending.get(hotkey)
+                if item is not None:
+                    item.coalesced += 1
+                    self.coalesced += 1
+                    if priority < item.priority:
+                        item.priority = priority
+                        heapq.heappush(self._heap, (priority, item.seq, item))
+                    return True
+                if len(self._pending) >= self.maxsize:
+                    worst = max(self._pending.values(), key=lambda p: (p.priority, p.seq))
+                    self.dropped += 1
+                    if priority >= worst.priority:
+                        accepted, reason = False, "full"
+                    else:
+                        del self._pending[worst.hotkey]     # su entrada en el heap queda vieja
+                        displaced = worst.hotkey
+                if accepted:
+                    item = KeyPress(hotkey, priority, next(self._seq), now)
+                    self._pending[hotkey] = item
+                    heapq.heappush(self._heap, (priority, item.seq, item))
+                    self._cond.notify()
+        if displaced is not None:
+            self._report([displaced], "displaced")
+        if not accepted:
+            self._report([hotkey], reason)
+        return accepted
+
+    def pending(self):
+        with self._cond:
+            return sorted(self._pending.values(), key=lambda p: (p.priority, p.seq))
+
+    def _report(self, hotkeys, reason):
+        if self.on_drop is None:
+            return
+        for hotkey in hotkeys:
+            try:
+                self.on_drop(hotkey, reason)
+            except Exception as e:
+                print(f"⚠️ Error en on_drop({hotkey}, {reason}): {e}")
+
+    def _pop(self, expired):
+        """Próxima KeyPress vigente (con el lock tomado), o None si no hay. Anota en expired las vencidas."""
+        heap = self._heap
+        while heap:
+            priority, _, item = heapq.heappop(heap)
+            if self._pending.get(item.hotkey) is not item or priority != item.priority:
+                continue                            # coalescida con más prioridad o desplazada
+            del self._pending[item.hotkey]
+            if self.max_age is not None and self.clock() - item.enqueued > self.max_age:
+                self.expired += 1
+                expired.append(item.hotkey)
+                continue
+            return item
+        return None
+
+    def _run(self):
+        while True:
+            expired = []
+            with self._cond:
+                item = self._pop(expired)
+                if item is None and not expired:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    continue
+                self._busy = item is not None
+            self._report(expired, "expired")
+            if item is None:
+                continue
+            item.started = self.clock()
+            try:
+                self.backend.press(item.hotkey)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Error enviando {item.hotkey}: {e}")
+                self._report([item.hotkey], "error")
+            item.sent = self.clock()
+            self.sent.append(item)
+            with self._cond:
+                self._busy = False
+
+    def join(self, timeout=None):
+        """Espera a que la cola se vacíe y termine la tecla en curso (para pruebas / al cerrar)."""
+        end = None if timeout is None else self.clock() + timeout
+        while True:
+            with self._cond:
+                if not self._pending and not self._busy:
+                    break
+            if end is not None and self.clock() > end:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def close(self, drain=True):
+        if drain:
+            self.join(timeout=2.0)
+        with self._cond:
+            self._closed = True
+            lost = list(self._pending)
+            self._pending.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+        self._report(lost, "closed")
+        self._thread.join(timeout=2.0)
+
+    def latency(self):
+        """(espera en cola, encolada→enviada) en s de las últimas teclas enviadas."""
+        items = list(self.sent)
+        return ([p.started - p.enqueued for p in items], [p.sent - p.enqueued for p in items])
+
+
+# ========================
+# BENCHMARK
+# ========================
+def _percentiles_ms(values):
+    if not values:
+        return "—"
+    v = sorted(values)
+    pick = lambda q: v[min(len(v) - 1, round(q / 100 * (len(v) - 1)))] * 1000
+    return f"p50 {pick(50):6.2f} ms p95 {pick(95):6.2f} ms máx {v[-1] * 1000:6.2f} ms"
+
+
+def bench_input_dispatch(ticks=120, poll=0.15, seed=0):
+    """
+    Loop de visión sintético (captura + tick ~3 ms) que cada tanto pide 1-3 teclas (f1-f6, f17, end).
+    En línea: el tick espera cada down/up. Con dispatcher: submit() y sigue.
+    """
+    import random
+
+    keys = [("f3", HEAL), ("f2", HEAL), ("f5", HEAL), ("f6", MANA), ("f17", EMERGENCY), ("end", NORMAL)]
+
+    def plan():
+        rng = random.Random(seed)
+        return [rng.sample(keys, rng.choice((0, 0, 0, 1, 1, 2))) for _ in range(ticks)]
+
+    def loop(send):
+        busy = []
+        for presses in plan():
+            t0 = time.perf_counter()
+            time.sleep(0.003)                       # captura + tick
+            for hotkey, prio in presses:
+                send(hotkey, prio)
+            busy.append(time.perf_counter() - t0)
+            time.sleep(max(0.0, poll / 3 - busy[-1]))     # poll acelerado 3x
+        return busy
+
+    inline = FakeBackend()
+    busy_inline = loop(lambda hotkey, prio: inline.press(hotkey))
+
+    dispatch = InputDispatcher(FakeBackend(), max_age=None)
+    busy_async = loop(dispatch.submit)
+    dispatch.join()
+    wait, total = dispatch.latency()
+    dispatch.close()
+
+    print(f"InputDispatcher: {ticks} ticks, {len(inline.pressed)} teclas (FakeBackend: f17 30 ms, end 50 ms, resto 30 ms)")
+    print(f"  teclas en línea:  tick de visión {_percentiles_ms(busy_inline)}")
+    print(f"  con dispatcher:   tick de visión {_percentiles_ms(busy_async)}")
+    print(f"                    espera en cola {_percentiles_ms(wait)} | encolada→enviada {_percentiles_ms(total)}")
+    print(f"                    enviadas {len(dispatch.sent)}, coalescidas {dispatch.coalesced}, "
+          f"descartadas {dispatch.dropped}")
+
+    # prioridad y coalescing: mientras se aprieta "end" (50 ms) llegan mana, f2 x3 y una emergencia
+    backend = FakeBackend()
+    dispatch = InputDispatcher(backend, max_age=None)
+    dispatch.submit("end", NORMAL)
+    time.sleep(0.005)
+    for hotkey, prio in (("f6", MANA), ("f2", HEAL), ("f2", HEAL), ("f2", HEAL), ("f17", EMERGENCY)):
+        dispatch.submit(hotkey, prio)
+    dispatch.join()
+    dispatch.close()
+    print(f"  orden con 'end' en curso + mana, f2 x3, f17 de emergencia: "
+          f"{' → '.join(k for k, _, _ in backend.pressed)} (coalescidas {dispatch.coalesced})")
+
+    # teclas que no salen: cola de 2, max_age 40 ms, 'end' (50 ms) en curso
+    drops = []
+    backend = FakeBackend()
+    dispatch = InputDispatcher(backend, maxsize=2, max_age=0.04,
+                               on_drop=lambda hotkey, why: drops.append((hotkey, why)))
+    dispatch.submit("end", NORMAL)
+    time.sleep(0.005)
+    dispatch.submit("f6", MANA)
+    dispatch.submit("f2", HEAL)
+    time.sleep(0.02)
+    dispatch.submit("f17", EMERGENCY)           # desplaza a f6
+    dispatch.submit("f5", MANA)                 # cola llena
+    dispatch.join()
+    dispatch.close()
+    print(f"  on_drop: enviadas {' → '.join(k for k, _, _ in backend.pressed)} | "
+          f"no enviadas {', '.join(f'{k} ({why})' for k, why in drops)}")
+
+
+if __name__ == "__main__":
+    bench_input_dispatch()
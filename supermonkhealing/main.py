@@ -1,18 +1,20 @@
-import os
+import sys
 import time
-import json
-import cv2
-import numpy as np
-from PIL import Image
-import win32gui
-import win32ui
 import win32con
 import win32api
 import keyboard  # pip install keyboard
-import threading
+from collections import deque
 
 from states import STATE, state_lock
+import common_path  # noqa: F401  (../common en sys.path)
+from capture import CaptureSession, Win32WindowSource
+from frame_bus import FrameBusReader
+from window_tracker import WindowTracker, set_dpi_awareness
+from recorder import open_recorder
+from tick_scheduler import TickScheduler
+from input_dispatch import InputDispatcher
 from overlay_controller import start_heal_overlay
+from healer_engine import HealerEngine, OBS_TITLE_PREFIX, EQUIP_BELOW, UNEQUIP_ABOVE, POLL_SECONDS
 
 # ====================== ENVÍO DE TECLAS ======================
 def send_key_f17():
@@ -42,164 +44,69 @@ def send_spell_key(hotkey):
             time.sleep(0.03)
             win32api.keybd_event(vk, 0, win32con.KEYEVENTF_KEYUP, 0)
 
-# ====================== CONFIG Y ARCHIVOS ======================
-ROOT = os.path.dirname(os.path.abspath(__file__))
-CONFIG_PATH = os.path.join(ROOT, "config_ring.json")
-HEART_TEMPLATE = os.path.join(ROOT, "heart.png")
-MANA_TEMPLATE = os.path.join(ROOT, "mana.png")
-
-def load_config():
-    if not os.path.exists(CONFIG_PATH):
-        raise FileNotFoundError(f"No existe {CONFIG_PATH}")
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-CFG = load_config()
-
-OBS_TITLE_PREFIX = CFG["obs_title_prefix"]
-THRESHOLD = CFG["template_threshold"]
-OFFSET_TO_X0 = CFG["offset_to_x0"]
-BAR_LENGTH_PX = CFG["bar_length_px"]
-POLL_SECONDS = CFG["poll_seconds"]
-
-EQUIP_BELOW = CFG.get("equip_below_percent", 60)
-UNEQUIP_ABOVE = CFG.get("unequip_above_percent", 85)
-RING_COOLDOWN = CFG.get("cooldown_sec", 0.6)
-MIN_MANA_TO_EQUIP = CFG.get("min_mana_percent_to_equip", 30)
-
-SPELLS_CFG = CFG.get("spells", {})
-SPELLS_ENABLED = SPELLS_CFG.get("enabled", True)
-SPELLS_GLOBAL_CD = SPELLS_CFG.get("global_cooldown_sec", 0.5)
-
-HARD_CFG = SPELLS_CFG.get("hard_healing", {})
-MID_CFG = SPELLS_CFG.get("mid_healing", {})
-LIGHT_CFG = SPELLS_CFG.get("light_healing", {})
-
-POTIONS_CFG = CFG.get("potions", {})
-POTIONS_ENABLED = POTIONS_CFG.get("enabled", True)
-
-HARD_POTION_CFG = POTIONS_CFG.get("hard_potion", {})
-MID_POTION_CFG = POTIONS_CFG.get("mid_potion", {})
-MANA_POTION_CFG = POTIONS_CFG.get("mana_potion", {})
-
-# Estado global
-_last_ring_ts = 0.0
-_last_spell_ts = 0.0
-_last_hard_ts = 0.0
-_last_mid_ts = 0.0
-_last_light_ts = 0.0
-_last_potion_ts = 0.0
-_last_hard_potion_ts = 0.0
-_last_mid_potion_ts = 0.0
-_last_mana_potion_ts = 0.0
-
-hp_x0 = hp_y = mana_x0 = mana_y = None
-
-RING_SLOT_X = 1767
-RING_SLOT_Y = 224
-ENERGY_RING_COLOR = (145, 255, 248)
-RING_TOLERANCE = 20
+class Win32KeyBackend:
+    """Backend de InputDispatcher: las teclas se aprietan en su thread, no en el loop de visión."""
 
-TIBIA_TITLE_PREFIX = "Tibia -"
+    def press(self, hotkey):
+        send_spell_key(hotkey)
 
 # ====================== DETECCIÓN ======================
+# hwnd del proyector y geometría en caché (solo enumera ventanas si el hwnd deja de ser válido)
+TRACKER = WindowTracker(OBS_TITLE_PREFIX)
+
 def find_obs_window():
-    found = None
-    def enum_cb(hwnd, _):
-        nonlocal found
-        if win32gui.IsWindowVisible(hwnd):
-            title = win32gui.GetWindowText(hwnd)
-            if title.startswith(OBS_TITLE_PREFIX):
-                found = hwnd
-    win32gui.EnumWindows(enum_cb, None)
-    return found
-
-def capture_window(hwnd):
-    left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-    w = max(1, right - left)
-    h = max(1, bottom - top)
-    dc = win32gui.GetWindowDC(hwnd)
-    mfc_dc = win32ui.CreateDCFromHandle(dc)
-    save_dc = mfc_dc.CreateCompatibleDC()
-    bitmap = win32ui.CreateBitmap()
-    bitmap.CreateCompatibleBitmap(mfc_dc, w, h)
-    save_dc.SelectObject(bitmap)
-    save_dc.BitBlt((0, 0), (w, h), mfc_dc, (0, 0), win32con.SRCCOPY)
-    bmpinfo = bitmap.GetInfo()
-    bmpstr = bitmap.GetBitmapBits(True)
-    img = Image.frombuffer("RGB", (bmpinfo["bmWidth"], bmpinfo["bmHeight"]), bmpstr, "raw", "BGRX", 0, 1)
-    win32gui.DeleteObject(bitmap.GetHandle())
-    save_dc.DeleteDC()
-    mfc_dc.DeleteDC()
-    win32gui.ReleaseDC(hwnd, dc)
-    return img
-
-def crop_client_area(img_pil, hwnd):
-    window_rect = win32gui.GetWindowRect(hwnd)
-    client_origin = win32gui.ClientToScreen(hwnd, (0, 0))
-    offset_x = client_origin[0] - window_rect[0]
-    offset_y = client_origin[1] - window_rect[1]
-    client_w, client_h = win32gui.GetClientRect(hwnd)[2], win32gui.GetClientRect(hwnd)[3]
-    img_cv = cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
-    h, w = img_cv.shape[:2]
-    return img_cv[max(0, int(offset_y)):min(h, int(offset_y + client_h)),
-                  max(0, int(offset_x)):min(w, int(offset_x + client_w))]
+    return TRACKER.hwnd()
+
+TIBIA_TITLE_PREFIX = "Tibia -"
+
+# Un solo reloj para el scheduler, los cooldowns y el `now` de cada tick (perf_counter: monótono y de
+# alta resolución también en Windows, donde time.monotonic puede ir de a ~15 ms)
+CLOCK = time.perf_counter
+
+# Barras, ROIs y cooldowns (detección y decisión, sin win32)
+ENGINE = HealerEngine(clock=CLOCK)
+
+_sessions = {}
+
+# Frames compartidos por el productor de frame_bus.py (si está corriendo)
+BUS = FrameBusReader()
+
+def _get_session(hwnd):
+    session = _sessions.get(hwnd)
+    if session is None:
+        for old in _sessions.values():
+            old.close()
+        _sessions.clear()
+        session = CaptureSession(Win32WindowSource(hwnd, tracker=TRACKER))
+        _sessions[hwnd] = session
+    return session
+
+def capture_client(hwnd):
+    """Frame del client completo (vista BGRX sobre el buffer reutilizado de la sesión)."""
+    return _get_session(hwnd).grab_frame()
+
+def capture_rois(hwnd):
+    """
+    Filas de las barras y pixel del ring → {name: Frame}. Usa el último frame del bus
+    compartido; si no hay productor (o está atrasado) captura solo los ROIs localmente.
+    """
+    views = BUS.read_rois(ENGINE.rois)
+    if views is None:
+        views = _get_session(hwnd).grab_rois(ENGINE.rois)
+    return views
 
 def locate_bars():
-    global hp_x0, hp_y, mana_x0, mana_y
     hwnd = find_obs_window()
     if not hwnd: return False
-    img = capture_window(hwnd)
-    client = crop_client_area(img, hwnd)
-
-    templ = cv2.imread(HEART_TEMPLATE, cv2.IMREAD_COLOR)
-    if templ is None: return False
-    res = cv2.matchTemplate(client, templ, cv2.TM_CCOEFF_NORMED)
-    _, max_val, _, max_loc = cv2.minMaxLoc(res)
-    if max_val < THRESHOLD: return False
-    th, tw = templ.shape[:2]
-    hp_x0 = max_loc[0] + tw // 2 + OFFSET_TO_X0
-    hp_y = max_loc[1] + th // 2
-
-    mana_x0 = mana_y = None
-    if MIN_MANA_TO_EQUIP > 0 and os.path.exists(MANA_TEMPLATE):
-        templ_mana = cv2.imread(MANA_TEMPLATE, cv2.IMREAD_COLOR)
-        if templ_mana is not None:
-            res_m = cv2.matchTemplate(client, templ_mana, cv2.TM_CCOEFF_NORMED)
-            _, mv_m, _, ml_m = cv2.minMaxLoc(res_m)
-            if mv_m >= THRESHOLD:
-                tmh, tmw = templ_mana.shape[:2]
-                mana_x0 = ml_m[0] + tmw // 2 + OFFSET_TO_X0
-                mana_y = ml_m[1] + tmh // 2
-
-    print(f"✅ HP barra: x0={hp_x0}, y={hp_y}")
-    if mana_x0: print(f"✅ Mana barra: x0={mana_x0}, y={mana_y}")
-    return True
-
-def get_pixel(client_rgb, x, y):
-    h, w = client_rgb.shape[:2]
-    if 0 <= x < w and 0 <= y < h:
-        return client_rgb[y, x]
-    return None
-
-def is_ring_equipped(client_rgb):
-    h, w = client_rgb.shape[:2]
-    if not (0 <= RING_SLOT_X < w and 0 <= RING_SLOT_Y < h):
-        return False
-    color = client_rgb[RING_SLOT_Y, RING_SLOT_X]
-    r,g,b = int(color[0]), int(color[1]), int(color[2])
-    er,eg,eb = ENERGY_RING_COLOR
-    return all(abs(c - e) <= RING_TOLERANCE for c,e in zip((r,g,b),(er,eg,eb)))
-
-def is_bar_filled(pixel, expected, tol=20):
-    if pixel is None: return False
-    r,g,b = int(pixel[0]), int(pixel[1]), int(pixel[2])
-    er,eg,eb = expected
-    return all(abs(c - e) <= tol for c,e in zip((r,g,b),(er,eg,eb)))
+    frame = capture_client(hwnd)
+    if frame is None: return False
+    return ENGINE.locate_bars(frame.bgr())
 
 # ====================== LOOP PRINCIPAL ======================
 if __name__ == "__main__":
     print("=== SuperMonk Healer: Spells + Ring + Potions + Overlay ===")
+    # mismas coordenadas de client que el productor de frame_bus.py y el caster
+    set_dpi_awareness()
 
     # Iniciar overlay y obtener función para chequear Tibia
     overlay_result = start_heal_overlay()
@@ -225,11 +132,34 @@ if __name__ == "__main__":
     print("   → Solo funciona cuando Tibia está en primer plano")
     print("   → Overlay visible solo en Tibia | Borde verde = ACTIVO\n")
 
+    # python main.py --record sesion.smrec → graba los frames para healer_engine.py
+    # python main.py --record sesion.smarc [--roi-only] → archivo indexado (frame_archive.py)
+    recorder = None
+    if "--record" in sys.argv:
+        record_path = sys.argv[sys.argv.index("--record") + 1]
+        recorder = open_recorder(record_path, ENGINE.rois if "--roi-only" in sys.argv else None)
+        print(f"⏺️ Grabando frames en {record_path}")
+
+    # teclas por la cola de prioridad (el loop no espera los 30-50 ms de cada down/up); las que la cola
+    # descarta o vencen vuelven acá y el próximo tick les deshace el cooldown (ENGINE.cancel)
+    not_sent = deque()
+    dispatch = InputDispatcher(Win32KeyBackend(),
+                               on_drop=lambda hotkey, reason: not_sent.append((hotkey, reason)))
+
+    # ticks de POLL_SECONDS contra deadlines fijos (el tiempo de captura no corre el ritmo)
+    sched = TickScheduler(POLL_SECONDS, clock=CLOCK)
+    wake = None
+
     try:
         while True:
+            # próximo tick de la grilla, o antes si sale de cooldown algo que no estaba listo en el último tick
+            sched.wait(wake)
+            wake = None
+
             # === CHEQUEO OBLIGATORIO: Tibia debe estar en primer plano ===
             if not is_tibia_foreground():
                 time.sleep(0.3)
+                sched.reset()
                 continue
 
             # === CHEQUEO: Healer activado por tecla o click ===
@@ -238,126 +168,53 @@ if __name__ == "__main__":
 
             if not active:
                 time.sleep(0.3)
+                sched.reset()
                 continue
 
             # === AHORA SÍ: EJECUTAR EL LOOP DE CURACIÓN ===
             hwnd = find_obs_window()
             if not hwnd:
                 time.sleep(0.5)
+                sched.reset()
+                continue
+
+            if recorder is not None:
+                # Grabando: frame completo del client (para poder recalibrar en el replay)
+                frame = capture_client(hwnd)
+                rois = ENGINE.rois.views(frame) if frame is not None else None
+            else:
+                rois = capture_rois(hwnd)
+            if rois is None:
+                time.sleep(0.5)
+                sched.reset()
                 continue
 
-            img = capture_window(hwnd)
-            client_bgr = crop_client_area(img, hwnd)
-            client_rgb = cv2.cvtColor(client_bgr, cv2.COLOR_BGR2RGB)
-
-            now = time.time()
-
-            # === 1. HEALING SPELLS ===
-            spell_used = False
-            if SPELLS_ENABLED and (now - _last_spell_ts) >= SPELLS_GLOBAL_CD:
-                spells = [
-                    (HARD_CFG, _last_hard_ts, "HARD"),
-                    (MID_CFG, _last_mid_ts, "MID"),
-                    (LIGHT_CFG, _last_light_ts, "LIGHT")
-                ]
-                for cfg, last_ts, name in spells:
-                    if not cfg.get("enabled", False):
-                        continue
-                    pct = cfg["hp_percent"]
-                    cd = cfg.get("cooldown_sec", 1.0)
-                    if (now - last_ts) < cd:
-                        continue
-
-                    pixel = get_pixel(client_rgb, int(hp_x0 + BAR_LENGTH_PX * (pct / 100)), hp_y)
-                    if not is_bar_filled(pixel, (211, 79, 79)):
-                        hotkey = cfg["hotkey"]
-                        send_spell_key(hotkey)
-                        ts = time.strftime('%H:%M:%S')
-                        print(f"[{ts}] 🩸 {name} HEALING HP≤{pct}% → {hotkey}")
-                        if name == "HARD":
-                            globals()['_last_hard_ts'] = now
-                        elif name == "MID":
-                            globals()['_last_mid_ts'] = now
-                        else:
-                            globals()['_last_light_ts'] = now
-                        _last_spell_ts = now
-                        spell_used = True
-                        break
-
-            # === 2. ENERGY RING ===
-            ring_used = False
-            if (now - _last_ring_ts) >= RING_COOLDOWN:
-                current_equipped = is_ring_equipped(client_rgb)
-
-                low_pixel = get_pixel(client_rgb, int(hp_x0 + BAR_LENGTH_PX * (EQUIP_BELOW / 100)), hp_y)
-                high_pixel = get_pixel(client_rgb, int(hp_x0 + BAR_LENGTH_PX * (UNEQUIP_ABOVE / 100)), hp_y)
-
-                hp_low = not is_bar_filled(low_pixel, (211, 79, 79))
-                hp_high = is_bar_filled(high_pixel, (211, 79, 79))
-
-                action = None
-                if hp_low and not current_equipped:
-                    if MIN_MANA_TO_EQUIP > 0 and mana_x0:
-                        mana_pixel = get_pixel(client_rgb, int(mana_x0 + BAR_LENGTH_PX * (MIN_MANA_TO_EQUIP / 100)), mana_y)
-                        if not is_bar_filled(mana_pixel, (83, 80, 218), tol=25):
-                            ts = time.strftime('%H:%M:%S')
-                            print(f"[{ts}] ⚠️ Mana < {MIN_MANA_TO_EQUIP}% → NO EQUIPO RING")
-                            time.sleep(POLL_SECONDS)
-                            continue
-                    send_key_f17()
-                    action = f"EQUIPANDO RING (HP ≤ {EQUIP_BELOW}%)"
-                    ring_used = True
-
-                elif hp_high and current_equipped:
-                    send_key_end()
-                    action = f"DESEQUIPANDO RING (HP ≥ {UNEQUIP_ABOVE}%)"
-                    ring_used = True
-
-                if action:
-                    ts = time.strftime('%H:%M:%S')
-                    print(f"[{ts}] ⚡ {action}")
-                    _last_ring_ts = now
-
-            # === 3. POTIONS ===
-            if POTIONS_ENABLED and (now - _last_potion_ts) >= 1.0:
-                if ring_used:
-                    time.sleep(0.6)
-
-                potions = [
-                    (HARD_POTION_CFG, _last_hard_potion_ts, "ULTIMATE SPIRIT", "hp_percent"),
-                    (MID_POTION_CFG, _last_mid_potion_ts, "GREAT SPIRIT", "hp_percent"),
-                    (MANA_POTION_CFG, _last_mana_potion_ts, "MANA", "mana_percent")
-                ]
-
-                for cfg, last_ts, name, percent_key in potions:
-                    if not cfg.get("enabled", False):
-                        continue
-                    pct = cfg.get(percent_key, 90 if percent_key == "mana_percent" else 80)
-                    cd = cfg.get("cooldown_sec", 1.0)
-                    if (now - last_ts) < cd:
-                        continue
-
-                    is_mana = percent_key == "mana_percent"
-                    x0 = mana_x0 if is_mana else hp_x0
-                    y = mana_y if is_mana else hp_y
-                    expected = (83, 80, 218) if is_mana else (211, 79, 79)
-
-                    pixel = get_pixel(client_rgb, int(x0 + BAR_LENGTH_PX * (pct / 100.0)), y)
-                    if not is_bar_filled(pixel, expected, tol=25):
-                        hotkey = cfg["hotkey"]
-                        send_spell_key(hotkey)
-                        ts = time.strftime('%H:%M:%S')
-                        print(f"[{ts}] 🧪 {name} POTION ({'mana' if is_mana else 'hp'}≤{pct}%) → {hotkey}")
-                        if name == "ULTIMATE SPIRIT":
-                            globals()['_last_hard_potion_ts'] = now
-                        elif name == "GREAT SPIRIT":
-                            globals()['_last_mid_potion_ts'] = now
-                        else:
-                            globals()['_last_mana_potion_ts'] = now
-                        _last_potion_ts = now
-                        break
-
-            time.sleep(POLL_SECONDS)
+            if recorder is not None:
+                recorder.write(frame)
+
+            while not_sent:
+                hotkey, reason = not_sent.popleft()
+                if ENGINE.cancel(hotkey):
+                    print(f"↩️ {hotkey} no se envió ({reason}): cooldown deshecho")
+
+            now = CLOCK()
+            for action in ENGINE.tick(rois, now):
+                if action.hotkey:
+                    dispatch.submit(action.hotkey, action.priority)
+                if action.log:
+                    print(action.log)
+
+            # heart/mana: verificación barata cada pocos ticks; frame completo solo si se perdieron
+            if recorder is not None:
+                ENGINE.track(rois, lambda: frame)
+            else:
+                ENGINE.track(rois, lambda: capture_client(hwnd))
+
+            wake = ENGINE.cooldowns.sleep_for(now)
 
     except KeyboardInterrupt:
-        print("\n\n¡Detenido! Buena caza, monk.")
\ No newline at end of file
+        print("\n\n¡Detenido! Buena caza, monk.")
+    finally:
+        dispatch.close()
+        if recorder is not None:
+            recorder.close()
\ No newline at end of file
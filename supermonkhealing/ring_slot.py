@@ -0,0 +1,162 @@
+# ring_slot.py - Estado del slot del ring (vacío / energy ring / otro) desde un parche del slot, no un pixel
+#
+# is_ring_equipped leía un solo pixel fijo (RING_SLOT_X, RING_SLOT_Y) y lo comparaba con ENERGY_RING_COLOR:
+# se rompe si el HUD se corre y no distingue "sin ring" de "otro ring".
+# RingSlotDetector lee un parche de RING_PATCH x RING_PATCH alrededor de ese punto, ubicado respecto
+# del ancla heart.png (se calibra una vez: la posición queda relativa al ancla y la sigue si se mueve).
+# Por tick votan solo los 4 pixels del centro del parche (donde está el ícono del ring): cada uno va por
+# la tabla de colores (color_lut.py) y vota "energy ring" u "oscuro" (fondo del slot vacío). Un tobytes()
+# del parche y 4 lookups desde Python cuestan menos que leer y comparar el pixel de antes, en todos los
+# ticks (sin caché: el ruido del proyector no lo encarece).
+# signature() clasifica el parche entero (fracciones de pixels); se usa si el parche quedó recortado en
+# el borde del frame.
+#
+#   python ring_slot.py   → parches sintéticos: aciertos y costo por tick vs el pixel suelto
+import operator
+import time
+
+import numpy as np
+
+import common_path  # noqa: F401  (../common en sys.path)
+
+RING_PATCH = 6                  # lado del parche (px)
+ENERGY_MIN_FRACTION = 0.25      # parche entero: pixels del color del energy ring para decir "energy"
+EMPTY_MIN_FRACTION = 0.8        # parche entero: pixels oscuros para decir "empty"
+ENERGY_MIN_VOTES = 2            # de los 4 pixels del centro
+EMPTY_MIN_VOTES = 3
+SLOT_DARK_COLOR = (40, 40, 40)  # fondo del slot vacío (RGB) ± SLOT_DARK_TOLERANCE
+SLOT_DARK_TOLERANCE = 40
+
+EMPTY, ENERGY, OTHER = "empty", "energy", "other"
+
+
+def sample_points(patch):
+    """Los 4 pixels del centro del parche, (x, y)."""
+    lo, hi = patch // 2 - 1, patch // 2
+    return [(lo, lo), (hi, lo), (lo, hi), (hi, hi)]
+
+
+class RingSlotDetector:
+    """
+    slot = RingSlotDetector(HUD_COLORS, "energy_ring", "slot_dark")
+    slot.calibrate(anchor_xy, (RING_SLOT_X, RING_SLOT_Y)) una vez; slot.rect(anchor_xy) → ROI a registrar;
+    slot.classify(view) → EMPTY / ENERGY / OTHER.
+    """
+
+    def __init__(self, lut, energy_class, dark_class, patch=RING_PATCH):
+        self.lut = lut
+        self.energy_bit = int(lut.bit(energy_class))
+        self.dark_bit = int(lut.bit(dark_class))
+        self.patch = patch
+        self.offset = None          # centro del parche relativo al ancla
+        # pixels que votan, como índices del parche visto como uint32 (BGRX contiguo de patch x patch)
+        self._samples = operator.itemgetter(*(y * patch + x for x, y in sample_points(patch)))
+        # bits de clase → voto: 1 energy ring, 16 oscuro (se suman y se separan con & 15 / >> 4)
+        self._vote = bytes(1 if b & self.energy_bit else 16 if b & self.dark_bit else 0 for b in range(256))
+
+    def calibrate(self, anchor_xy, slot_xy):
+        """Guarda el punto del slot (coords del client) relativo al ancla."""
+        self.offset = (slot_xy[0] - anchor_xy[0], slot_xy[1] - anchor_xy[1])
+
+    def rect(self, anchor_xy):
+        half = self.patch // 2
+        return (anchor_xy[0] + self.offset[0] - half, anchor_xy[1] + self.offset[1] - half,
+                self.patch, self.patch)
+
+    def signature(self, view):
+        """(fracción energy ring, fracción oscura) del parche."""
+        bits = self.lut.classify(view.data)
+        n = bits.size
+        return (np.count_nonzero(bits & self.energy_bit) / n,
+                np.count_nonzero(bits & self.dark_bit) / n)
+
+    def _classify_patch(self, view):
+        if view.width == 0 or view.height == 0:
+            return EMPTY
+        energy, dark = self.signature(view)
+        if energy >= ENERGY_MIN_FRACTION:
+            return ENERGY
+        if dark >= EMPTY_MIN_FRACTION:
+            return EMPTY
+        return OTHER
+
+    def classify(self, view):
+        if view is None:
+            return EMPTY
+        if view.data.shape != (self.patch, self.patch, 4):
+            return self._classify_patch(view)           # recortado en el borde del frame
+        lookup, vote = self.lut.lookup, self._vote
+        votes = 0
+        for px in self._samples(memoryview(view.data.tobytes()).cast("I")):
+            votes += vote[lookup[px & 0xFFFFFF]]
+        if votes & 15 >= ENERGY_MIN_VOTES:
+            return ENERGY
+        if votes >> 4 >= EMPTY_MIN_VOTES:
+            return EMPTY
+        return OTHER
+
+
+# ========================
+# BENCHMARK
+# ========================
+def _synthetic_slot(kind, rng, patch=RING_PATCH):
+    """Parche BGRX sintético: slot vacío, energy ring o un ring dorado, con ruido."""
+    from healer_engine import ENERGY_RING_COLOR
+
+    px = rng.integers(15, 60, size=(patch, patch, 3))       # fondo oscuro del slot
+    ring = np.zeros((patch, patch), dtype=bool)
+    yy, xx = np.mgrid[:patch, :patch] - (patch - 1) / 2
+    ring[np.hypot(yy, xx) < patch * 0.4] = True
+    if kind == ENERGY:
+        px[ring] = np.array(ENERGY_RING_COLOR[::-1]) + rng.integers(-12, 13, size=(ring.sum(), 3))
+    elif kind == OTHER:
+        px[ring] = np.array((40, 170, 205)) + rng.integers(-12, 13, size=(ring.sum(), 3))
+    out = np.empty((patch, patch, 4), dtype=np.uint8)
+    out[..., :3] = np.clip(px, 0, 255)
+    out[..., 3] = 255
+    return out
+
+
+def bench_ring_slot(n=300, seed=0):
+    from capture import Frame
+    from healer_engine import HUD_COLORS, ENERGY_RING_COLOR, RING_TOLERANCE
+
+    rng = np.random.default_rng(seed)
+    kinds = [EMPTY, ENERGY, OTHER]
+    crops = [(k, _synthetic_slot(k, rng)) for k in kinds for _ in range(n)]
+    slot = RingSlotDetector(HUD_COLORS, "energy_ring", "slot_dark")
+    half = RING_PATCH // 2
+
+    def old(view):
+        # la lectura de antes: pixel central vs ENERGY_RING_COLOR, comparación por canal en Python
+        color = view.pixel_rgb(view.x0 + half, view.y0 + half)
+        if color is None:
+            return False
+        return all(abs(c - e) <= RING_TOLERANCE for c, e in zip(color, ENERGY_RING_COLOR))
+
+    views = [(k, Frame(c, 100, 100)) for k, c in crops]
+    old_ok = sum(old(v) == (k == ENERGY) for k, v in views)
+    ok = sum(slot.classify(v) == k for k, v in views)
+    full_ok = sum(slot._classify_patch(v) == k for k, v in views)
+
+    # cada parche es distinto (ruido en todos los pixels, como un proyector que recomprime): costo por tick
+    def per_tick(fn, reps=20):
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            for _, v in views:
+                fn(v)
+        return (time.perf_counter() - t0) / (reps * len(views))
+
+    t_old = per_tick(old)
+    t_new = per_tick(slot.classify)
+    t_full = per_tick(slot._classify_patch, reps=3)
+
+    print(f"RingSlot: parches {RING_PATCH}x{RING_PATCH} sintéticos con ruido, {n} por clase (vacío / energy / otro)")
+    print(f"  pixel suelto: equipado sí/no correcto {old_ok}/{len(views)} (no distingue vacío de otro) | "
+          f"{t_old * 1e6:.2f} µs")
+    print(f"  RingSlotDetector (4 pixels votan): clase correcta {ok}/{len(views)} | "
+          f"{t_new * 1e6:.2f} µs ({t_new / t_old:.2f}x el pixel suelto)")
+    print(f"  parche entero (signature): clase correcta {full_ok}/{len(views)} | {t_full * 1e6:.2f} µs")
+
+if __name__ == "__main__":
+    bench_ring_slot()
@@ -8,6 +8,10 @@ import win32gui
 import win32ui
 import win32con
 
+import common_path  # noqa: F401  (../common en sys.path)
+from template_search import locate
+from templates import TEMPLATES
+
 OBS_TITLE_PREFIX = "Windowed Projector (Source)"
 THRESHOLD = 0.92
 
@@ -95,13 +99,12 @@ def crop_client_area(win_img_pil: Image.Image, hwnd) -> np.ndarray:
 
 
 def locate_center(search_bgr: np.ndarray, template_path: str, threshold: float):
-    templ = cv2.imread(template_path, cv2.IMREAD_COLOR)
+    templ = TEMPLATES.bgr(template_path)
     if templ is None:
         print(f"Error: No se pudo cargar {template_path}")
         return None
 
-    res = cv2.matchTemplate(search_bgr, templ, cv2.TM_CCOEFF_NORMED)
-    min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+    max_val, max_loc = locate(search_bgr, templ, threshold)
 
     if max_val < threshold:
         return None